@@ -0,0 +1,60 @@
+"""
+Helpers for the multi-document /analyze/batch endpoint
+Extraction and segmentation run in worker processes, so nothing here touches the model
+"""
+
+import os
+import zipfile
+from typing import List, Tuple
+
+from text_extraction import extract_text
+from clause_segmentation import segment_clauses
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+
+def expand_upload(filename: str, file_path: str, dest_dir: str,
+                  max_documents: int = None, max_bytes: int = None) -> List[Tuple[str, str]]:
+    """
+    Returns (document name, path) pairs for an uploaded file.
+    Zip archives are unpacked into dest_dir and yield every supported member.
+    ValueError if an archive holds more than max_documents supported members
+    or unpacks to more than max_bytes.
+    """
+    if not filename.lower().endswith('.zip'):
+        return [(filename, file_path)]
+
+    documents = []
+    with zipfile.ZipFile(file_path) as archive:
+        members = [(idx, member) for idx, member in enumerate(archive.infolist())
+                   if not member.is_dir() and member.filename.lower().endswith(SUPPORTED_EXTENSIONS)]
+        if max_documents is not None and len(members) > max_documents:
+            raise ValueError(f"{filename} holds {len(members)} documents (at most {max_documents} allowed)")
+        if max_bytes is not None and sum(member.file_size for _, member in members) > max_bytes:
+            raise ValueError(f"{filename} unpacks to more than {max_bytes // (1024 * 1024)} MB")
+
+        written = 0
+        for idx, member in members:
+            name = member.filename
+            # Flatten member paths so nothing is written outside dest_dir
+            target = os.path.join(dest_dir, f"{idx}_{os.path.basename(name)}")
+            with archive.open(member) as src, open(target, "wb") as dst:
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    # Sizes in the archive directory can lie: count what is actually written
+                    written += len(chunk)
+                    if max_bytes is not None and written > max_bytes:
+                        raise ValueError(f"{filename} unpacks to more than {max_bytes // (1024 * 1024)} MB")
+                    dst.write(chunk)
+            documents.append((name, target))
+    return documents
+
+
+def extract_and_segment(file_path: str) -> List[str]:
+    """Extract text from a document and split it into clauses"""
+    text = extract_text(file_path)
+    if not text:
+        return []
+    return segment_clauses(text)
@@ -0,0 +1,227 @@
+"""
+Dynamic batching scheduler for clause inference
+
+Requests submit their clauses here instead of calling the model directly.
+A worker thread collects pending clauses from all documents into batches of up
+to max_batch_size, waiting at most max_wait_ms for a batch to fill, runs one
+batched inference call and routes each result back to the submitter's future.
+
+Pending clauses are queued per document, and the scheduling policy decides
+which documents fill the next batch:
+    "round_robin"    take `weight` clauses from each document in turn (default)
+    "shortest_first" drain the document with the fewest remaining clauses first
+    "fifo"           strict arrival order across all documents
+
+Clauses may carry a deadline: they are dropped if it passes before they are
+scheduled, and a batch made only of clauses with deadlines is passed the
+latest of them so inference can stop generating once it is reached.
+
+Several kinds of inference (e.g. full analysis and classify-only) can share
+the scheduler: each clause is submitted with a task name, and every batch
+holds clauses of a single task.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Union
+
+InferBatch = Callable[[List[str], Optional[float]], list]
+
+DEFAULT_TASK = "analyze"
+SCHEDULING_POLICIES = ("round_robin", "shortest_first", "fifo")
+
+# Number of finished documents kept for the queue wait percentiles
+WAIT_STATS_WINDOW = 1000
+
+
+class BatchScheduler:
+    def __init__(self, infer_batch: Union[InferBatch, Dict[str, InferBatch]], max_batch_size: int = 8,
+                 max_wait_ms: float = 20, workers: int = 1, policy: str = "round_robin"):
+        """
+        Args:
+            infer_batch: Takes a list of clauses and a deadline (or None),
+                returns one result per clause. A dict maps task names to
+                such functions; a single function serves DEFAULT_TASK.
+            max_batch_size: Largest batch handed to infer_batch
+            max_wait_ms: How long a partial batch waits for more clauses
+            workers: Threads running infer_batch (all share one model)
+            policy: One of SCHEDULING_POLICIES
+        """
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.infer_batch = infer_batch if isinstance(infer_batch, dict) else {DEFAULT_TASK: infer_batch}
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.policy = policy
+        # (document_id, task) -> deque of (seq, clause, future, submitted_at, deadline); ordered for round robin
+        self._queues: "OrderedDict[object, deque]" = OrderedDict()
+        self._weights: Dict[object, int] = {}
+        self._waits: Dict[object, list] = {}
+        self._pending = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._batches = 0
+        self._batched_clauses = 0
+        self._first_waits = deque(maxlen=WAIT_STATS_WINDOW)
+        self._mean_waits = deque(maxlen=WAIT_STATS_WINDOW)
+
+        for i in range(workers):
+            threading.Thread(target=self._run, name=f"batch-scheduler-{i}", daemon=True).start()
+
+    def submit(self, clause: str, document_id=None, weight: int = 1, deadline: float = None,
+               task: str = DEFAULT_TASK) -> Future:
+        """
+        Queue a clause; the returned future resolves to its inference result.
+        Clauses sharing a document_id are scheduled as one document, which
+        gets `weight` clauses per round-robin turn. deadline is a
+        time.monotonic() value after which the result is no longer wanted.
+        task selects the infer_batch function that runs the clause.
+        """
+        if task not in self.infer_batch:
+            raise ValueError(f"Unknown inference task: {task}")
+        future = Future()
+        if document_id is None:
+            document_id = future
+        key = (document_id, task)
+        with self._cond:
+            if key not in self._queues:
+                self._queues[key] = deque()
+                self._weights[key] = max(1, int(weight))
+                self._waits.setdefault(document_id, [])
+            self._queues[key].append((next(self._seq), clause, future, time.monotonic(), deadline))
+            self._pending += 1
+            self._cond.notify()
+        return future
+
+    def pop_document_waits(self, document_id) -> dict:
+        """
+        Queue wait summary for a document whose clauses have all been
+        scheduled; also feeds the percentiles in stats(). Callers pop every
+        document they submitted, finished or not, so none are left behind.
+        """
+        with self._cond:
+            waits = self._waits.pop(document_id, [])
+            if not waits:
+                return {"clauses": 0, "first_wait_ms": 0.0, "mean_wait_ms": 0.0, "max_wait_ms": 0.0}
+            summary = {
+                "clauses": len(waits),
+                "first_wait_ms": round(min(waits) * 1000, 1),
+                "mean_wait_ms": round(sum(waits) / len(waits) * 1000, 1),
+                "max_wait_ms": round(max(waits) * 1000, 1),
+            }
+            # stats() sorts these under the same lock
+            self._first_waits.append(summary["first_wait_ms"])
+            self._mean_waits.append(summary["mean_wait_ms"])
+        return summary
+
+    def stats(self) -> dict:
+        with self._cond:
+            first_waits = sorted(self._first_waits)
+            mean_waits = sorted(self._mean_waits)
+            return {
+                "policy": self.policy,
+                "pending_clauses": self._pending,
+                "queued_documents": len({document_id for document_id, _ in self._queues}),
+                "batches": self._batches,
+                "avg_batch_size": round(self._batched_clauses / self._batches, 2) if self._batches else 0.0,
+                "p50_first_wait_ms": _percentile(first_waits, 50),
+                "p95_first_wait_ms": _percentile(first_waits, 95),
+                "p50_mean_wait_ms": _percentile(mean_waits, 50),
+                "p95_mean_wait_ms": _percentile(mean_waits, 95),
+            }
+
+    def _pick_document(self, task: Optional[str]):
+        """Returns ((document_id, task), number of clauses to take), or (None, 0)"""
+        keys = [key for key in self._queues if task is None or key[1] == task]
+        if not keys:
+            return None, 0
+        if self.policy == "fifo":
+            return min(keys, key=lambda k: self._queues[k][0][0]), 1
+        if self.policy == "shortest_first":
+            # Ties go to the earliest document (dict order)
+            return min(keys, key=lambda k: len(self._queues[k])), self.max_batch_size
+        return keys[0], self._weights[keys[0]]
+
+    def _select(self):
+        """Returns (task, list of (clause, future, deadline))"""
+        batch = []
+        task = None
+        now = time.monotonic()
+        while len(batch) < self.max_batch_size:
+            # The first document picked decides the task for the whole batch
+            key, take = self._pick_document(task)
+            if key is None:
+                break
+            document_id, task = key
+            queue = self._queues[key]
+            for _ in range(min(take, self.max_batch_size - len(batch))):
+                if not queue:
+                    break
+                _, clause, future, submitted_at, deadline = queue.popleft()
+                self._pending -= 1
+                if deadline is not None and now >= deadline:
+                    future.cancel()
+                # Skip clauses whose caller gave up (cancelled or past deadline)
+                if future.set_running_or_notify_cancel():
+                    if document_id in self._waits:
+                        self._waits[document_id].append(now - submitted_at)
+                    batch.append((clause, future, deadline))
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+                del self._weights[key]
+                # Anonymous documents are never popped by a caller
+                if isinstance(document_id, Future):
+                    self._waits.pop(document_id, None)
+        return task, batch
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            # Give a partial batch a short window to fill up
+            deadline = time.monotonic() + self.max_wait
+            while self._pending < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            task, batch = self._select()
+            if batch:
+                self._batches += 1
+                self._batched_clauses += len(batch)
+            return task, batch
+
+    def _run(self):
+        while True:
+            task, batch = self._next_batch()
+            if not batch:
+                continue
+            deadlines = [deadline for _, _, deadline in batch]
+            batch_deadline = None if None in deadlines else max(deadlines)
+            try:
+                results = self.infer_batch[task]([clause for clause, _, _ in batch], batch_deadline)
+                if len(results) != len(batch):
+                    # zip would leave the extra futures waiting forever
+                    raise RuntimeError(f"{task} returned {len(results)} results for {len(batch)} clauses")
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                # A submitter may have cancelled while the batch ran
+                if not future.done():
+                    future.set_result(result)
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
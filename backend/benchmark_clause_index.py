@@ -0,0 +1,52 @@
+"""
+Benchmark similarity index lookups at scale
+Fills a ClauseIndex with random SimHashes, then times lookups of stored
+clauses with a few flipped bits (hits) and of unrelated hashes (misses)
+
+Usage:
+    python benchmark_clause_index.py [entries] [threshold]
+"""
+
+import random
+import sys
+import time
+
+from clause_index import ClauseIndex, simhash, HASH_BITS
+
+if __name__ == "__main__":
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.95
+    queries = 10_000
+
+    index = ClauseIndex(threshold=threshold)
+    rng = random.Random(0)
+    print(f"📥 Inserting {entries:,} entries (threshold {threshold}, max distance {index.max_distance} bits)...")
+    start = time.perf_counter()
+    stored = []
+    for i in range(entries):
+        value = rng.getrandbits(HASH_BITS)
+        index.add_hash(value, {"id": i})
+        if i % (entries // queries or 1) == 0:
+            stored.append(value)
+    print(f"   {time.perf_counter() - start:.1f} s")
+
+    def near(value):
+        for bit in rng.sample(range(HASH_BITS), index.max_distance):
+            value ^= 1 << bit
+        return value
+
+    for label, probes in [("near-duplicate hits", [near(v) for v in stored]),
+                          ("misses", [rng.getrandbits(HASH_BITS) for _ in stored])]:
+        found = 0
+        start = time.perf_counter()
+        for value in probes:
+            if index.lookup_hash(value) is not None:
+                found += 1
+        elapsed = time.perf_counter() - start
+        print(f"🔎 {label}: {elapsed / len(probes) * 1e6:.1f} µs/lookup, {found}/{len(probes)} matched")
+
+    clause = "The Receiving Party shall hold all Confidential Information of Acme Corp in strict confidence for 5 years."
+    start = time.perf_counter()
+    for _ in range(1000):
+        simhash(clause)
+    print(f"#️⃣  simhash: {(time.perf_counter() - start) * 1000:.1f} µs/clause")
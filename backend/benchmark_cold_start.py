@@ -0,0 +1,57 @@
+"""
+Compare cold-start time-to-ready of loading from the hub cache against a
+local snapshot written by `python model_loader.py prepare-model <dir>`
+Every start runs in a fresh process, so imports and page cache effects
+are part of the measurement the way they are for a new replica
+
+Usage:
+    python benchmark_cold_start.py ./model_snapshot [--runs 3]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def time_to_ready(snapshot_dir: str = None) -> dict:
+    """Returns the process wall time and the loader's own time-to-ready"""
+    command = [sys.executable, "model_loader.py", "time-to-ready"]
+    if snapshot_dir:
+        command.append(snapshot_dir)
+    start = time.perf_counter()
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - start
+    loader = json.loads(output.strip().splitlines()[-1])["time_to_ready"]
+    return {"process": wall, "load": loader}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    runs = 3
+    if "--runs" in args:
+        idx = args.index("--runs")
+        runs = int(args[idx + 1])
+        del args[idx:idx + 2]
+    if len(args) != 1:
+        print(__doc__)
+        sys.exit(1)
+    snapshot_dir = args[0]
+
+    print(f"⏱️  Measuring time-to-ready over {runs} cold starts each")
+    results = {}
+    for label, source in [("hub", None), ("snapshot", snapshot_dir)]:
+        samples = []
+        for i in range(runs):
+            samples.append(time_to_ready(source))
+            print(f"   {label} run {i + 1}: load {samples[-1]['load']:.2f}s, process {samples[-1]['process']:.2f}s")
+        results[label] = samples
+
+    print("\n" + "=" * 60)
+    print(f"{'source':<12}{'median load s':>16}{'median process s':>20}")
+    print("=" * 60)
+    for label, samples in results.items():
+        load = statistics.median(s["load"] for s in samples)
+        process = statistics.median(s["process"] for s in samples)
+        print(f"{label:<12}{load:>16.2f}{process:>20.2f}")
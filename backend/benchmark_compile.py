@@ -0,0 +1,69 @@
+"""
+Compare per-token decode latency of eager mode against compiled mode
+(static KV cache + torch.compile, see generation.compile_model)
+Both runs decode greedily on the same clauses, so outputs should match
+
+Usage:
+    python benchmark_compile.py                   # built-in test clauses
+    python benchmark_compile.py contract.pdf ...  # clauses from documents
+    python benchmark_compile.py --batch 4 ...     # clauses per generate call
+
+Run it twice to see the warmup time with compiled artifacts cached on disk.
+"""
+
+import os
+import sys
+import time
+
+# The model is compiled below, after the eager run
+os.environ["CLAUSEWISE_COMPILE"] = "0"
+
+import generation
+from measure_output_lengths import load_clauses
+
+
+def run(call_granite_batch, clauses, batch_size):
+    generation.reset_generation_stats()
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(clauses), batch_size):
+        outputs += [result for _, result in call_granite_batch(clauses[i:i + batch_size])]
+    elapsed = time.perf_counter() - start
+    return generation.get_generation_stats()["single_pass"], outputs, elapsed
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    batch_size = 1
+    if "--batch" in args:
+        idx = args.index("--batch")
+        batch_size = int(args[idx + 1])
+        del args[idx:idx + 2]
+    clauses = load_clauses(args)
+
+    from granite_api import call_granite_batch, model, tokenizer
+
+    generation.FORCE_GREEDY = True
+    generation.WARMUP_BATCH_SIZES = (batch_size,)
+    print(f"⏱️  Benchmarking eager vs compiled on {len(clauses)} clauses (batch size {batch_size})")
+
+    print("\n--- Eager ---")
+    # One untimed call so both runs start warm
+    call_granite_batch(clauses[:batch_size])
+    eager_stats, eager_outputs, eager_elapsed = run(call_granite_batch, clauses, batch_size)
+
+    print("\n--- Compiled ---")
+    start = time.perf_counter()
+    generation.compile_model(model, tokenizer)
+    warmup_seconds = time.perf_counter() - start
+    compiled_stats, compiled_outputs, compiled_elapsed = run(call_granite_batch, clauses, batch_size)
+
+    same = sum(1 for a, b in zip(eager_outputs, compiled_outputs) if a == b)
+    print("\n" + "=" * 80)
+    print(f"{'mode':<12}{'tokens/sec':>12}{'ms/token':>12}{'total s':>10}{'same output':>14}")
+    print("=" * 80)
+    for mode, stats, elapsed in [("eager", eager_stats, eager_elapsed), ("compiled", compiled_stats, compiled_elapsed)]:
+        tps = stats["tokens_per_sec"]
+        ms_per_token = 1000 / tps if tps else 0.0
+        print(f"{mode:<12}{tps:>12.2f}{ms_per_token:>12.1f}{elapsed:>10.1f}{same:>8}/{len(clauses)}")
+    print(f"\nCompile + warmup: {warmup_seconds:.1f}s")
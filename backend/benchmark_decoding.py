@@ -0,0 +1,65 @@
+"""
+Compare decode speed of assisted decoding modes against plain greedy decoding
+All modes decode greedily here so prompt lookup / draft model outputs are
+directly comparable (assisted greedy decoding produces the same text)
+
+Usage:
+    python benchmark_decoding.py                   # built-in test clauses
+    python benchmark_decoding.py contract.pdf ...  # clauses from documents
+    python benchmark_decoding.py --two-pass ...    # also benchmark granite_api_advanced
+
+Set CLAUSEWISE_DRAFT_MODEL to include the draft_model mode.
+"""
+
+import sys
+
+import generation
+from measure_output_lengths import load_clauses
+
+
+def run_mode(mode, analyzers, clauses):
+    generation.DECODING_MODE = mode
+    generation.reset_generation_stats()
+    outputs = []
+    for call_granite in analyzers:
+        for clause in clauses:
+            outputs.append(call_granite(clause)[1])
+    return generation.get_generation_stats(), outputs
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    two_pass = "--two-pass" in args
+    clauses = load_clauses([a for a in args if not a.startswith("--")])
+
+    from granite_api import call_granite
+    analyzers = [call_granite]
+    kinds = ["single_pass"]
+    if two_pass:
+        from granite_api_advanced import call_granite as call_granite_two_pass
+        analyzers.append(call_granite_two_pass)
+        kinds += ["extract_info", "final_analysis"]
+
+    modes = ["", "prompt_lookup"]
+    if generation.DRAFT_MODEL_NAME:
+        modes.append("draft_model")
+
+    generation.FORCE_GREEDY = True
+    print(f"⏱️  Benchmarking {len(modes)} decoding modes on {len(clauses)} clauses")
+
+    results = {}
+    for mode in modes:
+        print(f"\n--- Mode: {mode or 'greedy'} ---")
+        results[mode] = run_mode(mode, analyzers, clauses)
+
+    baseline_stats, baseline_outputs = results[""]
+    print("\n" + "=" * 80)
+    print(f"{'mode':<16}{'kind':<18}{'tokens/sec':>12}{'speedup':>10}{'same output':>14}")
+    print("=" * 80)
+    for mode, (stats, outputs) in results.items():
+        same = sum(1 for a, b in zip(outputs, baseline_outputs) if a == b)
+        for kind in kinds:
+            tps = stats[kind]["tokens_per_sec"]
+            base_tps = baseline_stats[kind]["tokens_per_sec"]
+            speedup = tps / base_tps if base_tps else 0.0
+            print(f"{mode or 'greedy':<16}{kind:<18}{tps:>12.2f}{speedup:>9.2f}x{same:>8}/{len(outputs)}")
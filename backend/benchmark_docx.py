@@ -0,0 +1,143 @@
+"""
+Speed and peak memory of DOCX extraction: the python-docx object model
+(the previous extract_text path, doc.paragraphs only) against
+text_extraction.iter_docx streaming word/document.xml
+
+The synthetic agreement has numbered clauses, fee schedule tables and
+several sections. Every run is a fresh process and reports its own peak RSS.
+
+Usage:
+    python benchmark_docx.py [--paragraphs 20000] [--tables 200] [--sections 10]
+"""
+
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SENTENCES = [
+    "The Supplier shall deliver the Goods to the Delivery Address on the Delivery Date.",
+    "Either party may terminate this Agreement by giving not less than thirty days written notice.",
+    "The Customer shall pay each invoice within forty-five days of the date of the invoice.",
+    "Neither party shall be liable for any indirect or consequential loss arising under this Agreement.",
+]
+TABLE_ROWS = 20
+
+
+def write_docx(path: str, paragraphs: int, tables: int, sections: int, seed: int = 0):
+    import docx
+
+    rng = random.Random(seed)
+    doc = docx.Document()
+    per_table = max(1, paragraphs // max(1, tables))
+    per_section = max(1, paragraphs // max(1, sections))
+    table = 0
+    for n in range(paragraphs):
+        doc.add_paragraph(f"{n + 1}. {rng.choice(SENTENCES)}")
+        if table < tables and (n + 1) % per_table == 0:
+            rows = doc.add_table(rows=TABLE_ROWS, cols=3)
+            for r, row in enumerate(rows.rows):
+                cells = row.cells
+                cells[0].text = f"Fee item {table + 1}.{r + 1}"
+                cells[1].text = f"£{rng.randint(100, 99999)}"
+                cells[2].text = rng.choice(["monthly", "per invoice", "capped at 10% of fees"])
+            table += 1
+        if (n + 1) % per_section == 0 and n + 1 < paragraphs:
+            doc.add_section()
+    doc.save(path)
+
+
+def run_python_docx(path: str) -> dict:
+    """The previous extract_text DOCX branch"""
+    import docx
+
+    doc = docx.Document(path)
+    text = ""
+    for para in doc.paragraphs:
+        text += para.text + "\n"
+    return {"chars": len(text), "table_rows": text.count("Fee item"), "sections": 0}
+
+
+def run_iter_docx(path: str) -> dict:
+    """Streaming: only one block of text alive at a time"""
+    from clause_segmentation import SECTION_BREAK
+    from text_extraction import iter_docx
+
+    counts = {"chars": 0, "table_rows": 0, "sections": 0}
+    for block in iter_docx(path):
+        counts["chars"] += len(block)
+        counts["table_rows"] += block.count("Fee item")
+        counts["sections"] += block.count(SECTION_BREAK)
+    return counts
+
+
+def peak_rss_mb() -> float:
+    """
+    This process' peak RSS. VmHWM starts over at exec; ru_maxrss would
+    include the parent's RSS at fork time.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode: str, path: str) -> dict:
+    """Run one reader in a fresh process; returns its peak RSS, time and counts"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--run", mode, path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def option(args: list, name: str, default: int) -> int:
+    return int(args[args.index(name) + 1]) if name in args else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--run"]:
+        mode, path = args[1], args[2]
+        start = time.perf_counter()
+        counts = run_python_docx(path) if mode == "python-docx" else run_iter_docx(path)
+        counts["seconds"] = time.perf_counter() - start
+        counts["peak_mb"] = peak_rss_mb()
+        print(json.dumps(counts))
+        sys.exit(0)
+
+    paragraphs = option(args, "--paragraphs", 20000)
+    tables = option(args, "--tables", 200)
+    sections = option(args, "--sections", 10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.docx")
+        print(f"📝 Writing {paragraphs} paragraphs, {tables} tables of {TABLE_ROWS} rows, {sections} sections...")
+        write_docx(path, paragraphs, tables, sections)
+        print(f"   {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        # Paragraph text must match python-docx; tables and sections come on top
+        from clause_segmentation import ROW_BREAK, SECTION_BREAK
+        from text_extraction import iter_docx
+        import docx
+        streamed = [line for line in "".join(iter_docx(path)).replace(SECTION_BREAK, "").split("\n")
+                    if line and ROW_BREAK not in line]
+        expected = [p.text for p in docx.Document(path).paragraphs if p.text]
+        print(f"   Paragraph text identical: {'yes' if streamed == expected else 'NO'}")
+
+        rows = [(mode, measure(mode, path)) for mode in ("python-docx", "iter_docx")]
+
+    print("\n" + "=" * 78)
+    print(f"{'reader':<14}{'seconds':>10}{'peak RSS MB':>14}{'chars':>12}{'table rows':>14}{'sections':>12}")
+    print("=" * 78)
+    for mode, r in rows:
+        print(f"{mode:<14}{r['seconds']:>10.2f}{r['peak_mb']:>14.1f}{r['chars']:>12,}"
+              f"{r['table_rows']:>8}/{tables * TABLE_ROWS:<5}{r['sections']:>12}")
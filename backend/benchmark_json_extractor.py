@@ -0,0 +1,167 @@
+"""
+Fuzz test and microbenchmark for json_validator.extract_json_object
+
+fuzz:  random analysis objects (braces, quotes and apostrophes inside the
+       strings) are serialized, damaged the ways model output is damaged
+       (surrounding text, unescaped quotes, raw newlines, trailing or missing
+       commas, a missing colon, single quotes around values with apostrophes,
+       truncation) and must parse back to the same dict,
+       or for truncated text at least to a dict, without exceptions
+bench: the scanner against the regex extraction it replaced: time per call
+       on typical, damaged and long outputs, and how many damaged outputs
+       each one recovers
+
+Usage:
+    python benchmark_json_extractor.py fuzz [--cases 20000] [--seed 0]
+    python benchmark_json_extractor.py bench
+"""
+
+import json
+import random
+import re
+import sys
+import time
+
+from json_validator import extract_json_object
+
+FIELDS = ["original", "simplified", "risk", "reason"]
+WORDS = ["party", "shall", "{term}", "[section 2]", "agreement", "the", "Company's",
+         "notice", "liability", "days", "(30)", "\\", "}", "{", ":", ","]
+
+
+def legacy_extract(text: str):
+    """The previous extraction in granite_api.parse_output: nested-brace regex + json.loads"""
+    match = re.search(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", text, flags=re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+
+
+def legacy_fix_and_extract(text: str):
+    """The previous json_validator.fix_json_string repair passes + json.loads"""
+    match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', text, flags=re.DOTALL)
+    if not match:
+        return None
+    json_str = match.group()
+    json_str = re.sub(r'(?<!\\)"(?=\w)', r'\"', json_str)
+    json_str = json_str.replace("'", '"')
+    json_str = re.sub(r',\s*}', '}', json_str)
+    json_str = re.sub(r',\s*]', ']', json_str)
+    json_str = re.sub(r'"\s*\n\s*"', '",\n"', json_str)
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
+
+
+def random_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+
+
+def random_analysis(rng: random.Random) -> dict:
+    data = {field: random_text(rng) for field in FIELDS}
+    data["risk"] = rng.choice(["HIGH", "MEDIUM", "LOW"])
+    return data
+
+
+def damage(rng: random.Random, data: dict):
+    """Returns (damaged text, dict it must parse back to, or None for truncated text)"""
+    data = dict(data)
+    text = json.dumps(data, indent=rng.choice([None, 2]))
+    kind = rng.choice(["clean", "surrounding", "trailing_comma", "missing_comma", "missing_colon",
+                       "raw_newline", "unescaped_quote", "single_quotes", "truncated"])
+    if kind == "surrounding":
+        text = f"Here is the analysis {{as requested}}:\n{text}\nLet me know {{if}} you need more."
+        # The leading {as requested} is itself an object; put the real one first
+        text = text.split("\n", 1)[1]
+    elif kind == "trailing_comma":
+        text = text[:text.rindex('"') + 1] + ",\n}"
+    elif kind == "missing_comma":
+        text = text.replace('",\n  "', '"\n  "').replace('", "', '" "')
+    elif kind == "missing_colon":
+        text = text.replace('"risk": ', '"risk" ')
+    elif kind == "raw_newline":
+        text = text.replace(" the ", " the\n")
+        data = {k: v.replace(" the ", " the\n") for k, v in data.items()}
+    elif kind == "unescaped_quote":
+        data["simplified"] = data["simplified"] + ' "quoted" words'
+        text = json.dumps(data).replace('\\"quoted\\"', '"quoted"')
+    elif kind == "single_quotes":
+        # Apostrophes ("Company's") stay unescaped inside the single quotes
+        data["reason"] = "the Company's " + data["reason"]
+        if any('"' in v or "\\" in v for v in data.values()):
+            text = json.dumps(data)
+        else:
+            text = "{" + ", ".join(f"'{k}': '{v}'" for k, v in data.items()) + "}"
+    elif kind == "truncated":
+        return text[:rng.randint(1, len(text) - 1)], None
+    return text, data
+
+
+def fuzz(cases: int, seed: int):
+    rng = random.Random(seed)
+    failures = 0
+    for case in range(cases):
+        text, expected = damage(rng, random_analysis(rng))
+        try:
+            result = extract_json_object(text)
+        except Exception as e:
+            print(f"❌ case {case}: {type(e).__name__}: {e}\n   {text!r}")
+            failures += 1
+            continue
+        if result is None or (expected is not None and result != expected):
+            failures += 1
+            if failures <= 10:
+                print(f"❌ case {case}: got {result!r}\n   from {text!r}")
+    print(f"{'✅' if not failures else '❌'} {cases - failures}/{cases} fuzz cases passed")
+    return failures
+
+
+def bench():
+    rng = random.Random(0)
+    typical = [json.dumps(random_analysis(rng)) for _ in range(2000)]
+    damaged = [damage(rng, random_analysis(rng)) for _ in range(2000)]
+    deeply_nested = json.dumps({"risk": "HIGH", "reason": "r", "simplified": "s",
+                                "original": "o", "terms": {"a": {"b": {"c": "{" * 50}}}})
+    long_output = "JSON output: " + json.dumps({
+        "original": "{x} " * 2000, "simplified": "plain words " * 500, "risk": "HIGH", "reason": "r"
+    })
+
+    def timed(fn, inputs, repeat=1):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in inputs:
+                fn(text)
+        return (time.perf_counter() - start) / (repeat * len(inputs)) * 1e6
+
+    def recovered(fn, cases):
+        ok = 0
+        for text, expected in cases:
+            result = fn(text)
+            if result is not None and (expected is None or result == expected):
+                ok += 1
+        return ok / len(cases) * 100
+
+    functions = [("regex", legacy_extract), ("regex + fix", legacy_fix_and_extract),
+                 ("scanner", extract_json_object)]
+    print(f"{'':<26}" + "".join(f"{name:>14}" for name, _ in functions))
+    print(f"{'typical (µs/call)':<26}" + "".join(f"{timed(fn, typical, 5):>14.1f}" for _, fn in functions))
+    print(f"{'damaged (µs/call)':<26}" + "".join(f"{timed(fn, [t for t, _ in damaged]):>14.1f}" for _, fn in functions))
+    print(f"{'long output (µs/call)':<26}" + "".join(f"{timed(fn, [long_output], 50):>14.1f}" for _, fn in functions))
+    print(f"{'damaged recovered (%)':<26}" + "".join(f"{recovered(fn, damaged):>14.1f}" for _, fn in functions))
+    print(f"{'3-level nesting parsed':<26}" + "".join(f"{'yes' if (fn(deeply_nested) or {}).get('terms') else 'no':>14}" for _, fn in functions))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] not in ("fuzz", "bench"):
+        print(__doc__)
+        sys.exit(1)
+    if args[0] == "fuzz":
+        cases = int(args[args.index("--cases") + 1]) if "--cases" in args else 20000
+        seed = int(args[args.index("--seed") + 1]) if "--seed" in args else 0
+        sys.exit(1 if fuzz(cases, seed) else 0)
+    bench()
@@ -0,0 +1,249 @@
+"""
+Load test main.app under concurrent uploads without a model
+
+Starts the API (uvicorn, one process) with stub_inference.py standing in
+for Granite, then drives /analyze with a mix of synthetic documents and
+/health, closed-loop at each concurrency level. Reports throughput,
+latency percentiles, rejections (429) and errors per request kind, and
+the server's event-loop lag over the run.
+
+The server inherits the environment, so CLAUSEWISE_* settings apply, e.g.
+CLAUSEWISE_STUB_BATCH_MS / _CLAUSE_MS / _JITTER for inference latency
+(see stub_inference.py) or CLAUSEWISE_PIPELINE_MIN_MB=0.1 to send the
+larger documents through the pipelined path.
+
+Usage:
+    python benchmark_load.py [--concurrency 1,4,8] [--duration 30]
+                             [--mix small=6,medium=3,large=1,health=2]
+                             [--mode classify] [--strategy single_pass]
+                             [--url http://localhost:8000]   # existing server, real model
+"""
+
+import asyncio
+import collections
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+# Numbered paragraphs per synthetic document
+DOCUMENT_PARAGRAPHS = {"small": 5, "medium": 25, "large": 100}
+DEFAULT_MIX = "small=6,medium=3,large=1,health=2"
+# Wait before retrying after a 429 instead of hammering admission control
+REJECTED_BACKOFF_SECONDS = 0.5
+LAG_INTERVAL_SECONDS = 0.05
+
+SENTENCES = [
+    "The Supplier shall deliver the Goods to the Delivery Address on the Delivery Date.",
+    "Either party may terminate this Agreement by giving not less than thirty days written notice.",
+    "The Customer shall pay each invoice within forty-five days of the date of the invoice.",
+    "Neither party shall be liable for any indirect or consequential loss arising under this Agreement.",
+    "The Supplier shall indemnify and hold harmless the Customer against all claims without limitation.",
+    "All intellectual property rights in the Deliverables shall vest in the Customer on creation.",
+    "Each party shall keep confidential all information disclosed to it under this Agreement.",
+    "Any notice given under this Agreement shall be in writing and delivered by hand or by post.",
+]
+
+
+def synthetic_document(paragraphs: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    return "\n".join(
+        f"{n + 1}. " + " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 5)))
+        for n in range(paragraphs)
+    ).encode("utf-8")
+
+
+def serve(port: int):
+    """Server process: the API on the stub, plus an event-loop lag probe"""
+    import stub_inference
+    stub_inference.install()
+    import main
+    import uvicorn
+
+    lags = collections.deque(maxlen=100000)
+
+    async def probe():
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL_SECONDS)
+            lags.append(loop.time() - start - LAG_INTERVAL_SECONDS)
+
+    @main.app.on_event("startup")
+    async def start_probe():
+        asyncio.get_running_loop().create_task(probe())
+
+    @main.app.post("/loadtest/lag")
+    async def lag_since_last_call():
+        """Event-loop lag samples since the previous call, in ms"""
+        samples = sorted(lag * 1000 for lag in lags)
+        lags.clear()
+        return {"samples": len(samples), **percentiles(samples)}
+
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server() -> tuple:
+    """Launch serve() in a child process; returns (process, base URL, log path)"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    log = tempfile.NamedTemporaryFile(prefix="clausewise_load_", suffix=".log", delete=False)
+    # Server output goes to a log: main prints a few lines per document
+    process = subprocess.Popen([sys.executable, __file__, "--serve", str(port)],
+                               stdout=log, stderr=subprocess.STDOUT,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if requests.get(url + "/health", timeout=1).ok:
+                return process, url, log.name
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    with open(log.name) as f:
+        print(f.read()[-3000:])
+    raise RuntimeError("API server did not start")
+
+
+def percentiles(values: list) -> dict:
+    """p50/p90/p99/max of sorted values"""
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": statistics.median(values), "p90": pick(0.9), "p99": pick(0.99), "max": values[-1]}
+
+
+def run_level(url: str, concurrency: int, duration: float, mix: dict, documents: dict, form: dict) -> tuple:
+    """
+    Closed loop: `concurrency` clients send back-to-back requests for
+    `duration` seconds. Returns the records and the seconds until the last
+    response.
+    """
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    records = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    stop_at = started + duration
+
+    def client(worker: int):
+        rng = random.Random(worker)
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            kind = rng.choices(kinds, weights)[0]
+            start = time.perf_counter()
+            clauses = 0
+            try:
+                if kind == "health":
+                    response = session.get(url + "/health", timeout=300)
+                else:
+                    body = rng.choice(documents[kind])
+                    response = session.post(url + "/analyze", files={"file": (f"{kind}.txt", body)},
+                                            data=form, timeout=300)
+                    if response.status_code == 200:
+                        clauses = response.json().get("total_clauses", 0)
+                status = response.status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            with lock:
+                records.append((kind, status, time.perf_counter() - start, clauses))
+            if status == 429:
+                time.sleep(REJECTED_BACKOFF_SECONDS)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.monotonic() - started
+
+
+def report(concurrency: int, duration: float, records: list, lag: dict):
+    by_kind = collections.defaultdict(list)
+    for record in records:
+        by_kind[record[0]].append(record)
+    for kind in sorted(by_kind):
+        rows = by_kind[kind]
+        ok = [r for r in rows if r[1] == 200]
+        rejected = sum(1 for r in rows if r[1] == 429)
+        errors = len(rows) - len(ok) - rejected
+        latency = percentiles(sorted(r[2] * 1000 for r in ok))
+        print(f"{concurrency:>5}  {kind:<8}{len(rows):>7}{len(ok) / duration:>8.2f}"
+              f"{sum(r[3] for r in ok) / duration:>10.1f}{latency['p50']:>9.0f}{latency['p90']:>9.0f}"
+              f"{latency['p99']:>9.0f}{latency['max']:>9.0f}{rejected / len(rows):>8.1%}{errors / len(rows):>8.1%}")
+    if lag:
+        print(f"{'':>7}event loop lag ms ({lag['samples']} samples): p50 {lag['p50']:.1f}, "
+              f"p90 {lag['p90']:.1f}, p99 {lag['p99']:.1f}, max {lag['max']:.1f}")
+    statuses = collections.Counter(r[1] for r in records if r[1] not in (200, 429))
+    if statuses:
+        print(f"{'':>7}errors: {', '.join(f'{s} x{n}' for s, n in statuses.most_common())}")
+
+
+def option(args: list, name: str, default: str) -> str:
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--serve"]:
+        serve(int(args[1]))
+        sys.exit(0)
+
+    levels = [int(c) for c in option(args, "--concurrency", "1,4,8").split(",")]
+    duration = float(option(args, "--duration", "30"))
+    mix = {k: float(w) for k, w in (pair.split("=") for pair in option(args, "--mix", DEFAULT_MIX).split(","))}
+    unknown = set(mix) - set(DOCUMENT_PARAGRAPHS) - {"health"}
+    if unknown:
+        print(f"❌ Unknown request kinds: {', '.join(sorted(unknown))} "
+              f"(expected {', '.join(DOCUMENT_PARAGRAPHS)} or health)")
+        sys.exit(1)
+    form = {}
+    if "--mode" in args:
+        form["mode"] = option(args, "--mode", "full")
+    if "--strategy" in args:
+        form["strategy"] = option(args, "--strategy", "")
+
+    # A few variants per size so documents are not byte-identical
+    documents = {kind: [synthetic_document(n, seed) for seed in range(4)] for kind, n in DOCUMENT_PARAGRAPHS.items()}
+
+    process = None
+    url = option(args, "--url", "")
+    if not url:
+        print("🚀 Starting API with stub inference...")
+        process, url, log_path = start_server()
+        print(f"   {url} (server log: {log_path})")
+
+    try:
+        print("\n" + "=" * 98)
+        print(f"{'conc':>5}  {'kind':<8}{'reqs':>7}{'ok/s':>8}{'clause/s':>10}{'p50 ms':>9}{'p90 ms':>9}"
+              f"{'p99 ms':>9}{'max ms':>9}{'429':>8}{'errors':>8}")
+        print("=" * 98)
+        for concurrency in levels:
+            lag = None
+            try:
+                # Discard samples from before this level
+                requests.post(url + "/loadtest/lag", timeout=10)
+            except requests.RequestException:
+                pass
+            records, elapsed = run_level(url, concurrency, duration, mix, documents, form)
+            try:
+                response = requests.post(url + "/loadtest/lag", timeout=10)
+                lag = response.json() if response.ok else None
+            except requests.RequestException:
+                pass
+            report(concurrency, elapsed, records, lag)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
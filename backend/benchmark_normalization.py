@@ -0,0 +1,122 @@
+"""
+Throughput of normalization.normalize_text against the cleanup it replaced
+(strip_html_tags' replace chain + three markdown regexes + whitespace join
+in the backend, then the frontend's strip_html again on every rerun)
+
+Inputs are model-like texts: mostly plain sentences, some with markdown
+emphasis, HTML tags or entities.
+
+Usage:
+    python benchmark_normalization.py [--texts 20000]
+"""
+
+import random
+import re
+import sys
+import time
+
+from normalization import normalize_text
+
+SENTENCES = [
+    "The tenant must pay rent on the first day of each month.",
+    "Either party may end the agreement with 30 days notice.",
+    "The company is not liable for indirect losses.",
+    "You give up your right to a jury trial.",
+    "Late payments are charged interest at 5% per month.",
+]
+DECORATIONS = [
+    lambda s: s,
+    lambda s: s,
+    lambda s: s,
+    lambda s: s.replace("must", "**must**"),
+    lambda s: s.replace("not", "*not*"),
+    lambda s: f"<p>{s}</p>",
+    lambda s: s.replace(" ", "&nbsp;", 2).replace("%", "&#37;"),
+    lambda s: f"`{s}`\n\n",
+]
+
+
+def legacy_strip_html_tags(text: str) -> str:
+    """The previous granite_api.strip_html_tags"""
+    if not isinstance(text, str):
+        return str(text)
+    clean = re.sub(r'<[^>]+>', '', text)
+    html_entities = {
+        '&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"',
+        '&#39;': "'", '&nbsp;': ' ', '&apos;': "'", '&cent;': '¢',
+        '&pound;': '£', '&yen;': '¥', '&euro;': '€', '&copy;': '©',
+        '&reg;': '®', '&trade;': '™', '&times;': '×', '&divide;': '÷',
+        '&mdash;': '—', '&ndash;': '–', '&hellip;': '...',
+        '&laquo;': '«', '&raquo;': '»', '&bull;': '•'
+    }
+    for entity, char in html_entities.items():
+        clean = clean.replace(entity, char)
+    clean = re.sub(r'&#?\w+;', '', clean)
+    clean = re.sub(r'\s+', ' ', clean)
+    return clean.strip()
+
+
+def legacy_backend(text: str) -> str:
+    """The previous parse_output cleanup of one field"""
+    text = legacy_strip_html_tags(text)
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = re.sub(r'`(.+?)`', r'\1', text)
+    return " ".join(text.split())
+
+
+def legacy_frontend(text: str) -> str:
+    """The previous frontend strip_html, defined inside the render loop"""
+    def strip_html(text):
+        clean = re.sub(r'<[^>]+>', '', text)
+        clean = clean.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
+        clean = clean.replace('&quot;', '"').replace('&#39;', "'")
+        return clean.strip()
+    return strip_html(text)
+
+
+def make_texts(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(DECORATIONS)(rng.choice(SENTENCES)) for _ in range(rng.randint(1, 3)))
+        for _ in range(count)
+    ]
+
+
+def throughput(fn, texts: list, repeat: int = 3) -> float:
+    """Best texts/sec over repeat runs"""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = max(best, len(texts) / (time.perf_counter() - start))
+    return best
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    count = int(args[args.index("--texts") + 1]) if "--texts" in args else 20000
+    texts = make_texts(count)
+
+    print(f"⏱️  Normalizing {count} model-like texts")
+    pipelines = [
+        ("legacy backend", legacy_backend),
+        ("legacy backend + frontend", lambda t: legacy_frontend(legacy_backend(t))),
+        ("normalize_text", normalize_text),
+    ]
+    print("\n" + "=" * 60)
+    print(f"{'pipeline':<30}{'texts/sec':>15}{'µs/text':>15}")
+    print("=" * 60)
+    for name, fn in pipelines:
+        tps = throughput(fn, texts)
+        print(f"{name:<30}{tps:>15,.0f}{1e6 / tps:>15.2f}")
+
+    differ = [t for t in texts if legacy_backend(t) != normalize_text(t)]
+    # Expected differences: the legacy code deleted entities it had no entry
+    # for (e.g. &#37;), html.unescape decodes them
+    print(f"\nSame output as the legacy backend: {count - len(differ)}/{count}")
+    if differ:
+        print(f"   e.g. {differ[0]!r}")
+        print(f"   legacy:     {legacy_backend(differ[0])!r}")
+        print(f"   normalized: {normalize_text(differ[0])!r}")
@@ -0,0 +1,176 @@
+"""
+Peak memory of analyzing a synthetic N-page PDF in memory (the /analyze
+path for small uploads) against the staged pipeline (pipeline.py)
+
+Inference is a stub that answers immediately with a model-sized analysis,
+so only extraction, segmentation, results and serialization count. Every
+run is a fresh process and reports its own peak RSS.
+
+Usage:
+    python benchmark_pipeline.py [--pages 100,1000]
+"""
+
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SENTENCES = [
+    "The Supplier shall deliver the Goods to the Delivery Address on the Delivery Date.",
+    "Either party may terminate this Agreement by giving not less than thirty days written notice.",
+    "The Customer shall pay each invoice within forty-five days of the date of the invoice.",
+    "Neither party shall be liable for any indirect or consequential loss arising under this Agreement.",
+    "All intellectual property rights in the Deliverables shall vest in the Customer on creation.",
+    "The Supplier shall maintain insurance with a reputable insurer for the duration of this Agreement.",
+    "This Agreement shall be governed by and construed in accordance with the laws of England.",
+    "Any notice given under this Agreement shall be in writing and delivered by hand or by post.",
+]
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 50, seed: int = 0):
+    """A plain text PDF (Helvetica, one content stream per page) without extra dependencies"""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = []
+        for line in range(lines_per_page):
+            # Section numbers keep clauses distinct across pages
+            text = f"{page + 1}.{line + 1} {rng.choice(SENTENCES)}"
+            text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            lines.append(f"BT /F1 9 Tf 40 {800 - line * 15} Td ({text}) Tj ET")
+        stream = "\n".join(lines).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def stub_analysis(clause: str) -> dict:
+    """About the size of a real single-pass analysis"""
+    return {
+        "original": clause,
+        "simplified": "In plain terms: " + clause[: len(clause) // 2],
+        "risk": "MEDIUM",
+        "reason": "The clause allocates obligations and liability between the parties.",
+        "clean": True
+    }
+
+
+def run_buffered(pdf_path: str) -> int:
+    """The in-memory /analyze path: whole text, clause list, results and JSON at once"""
+    from text_extraction import extract_text
+    from clause_segmentation import segment_clauses
+    from risk import enhance_risk_assessment
+
+    text = extract_text(pdf_path)
+    clauses = segment_clauses(text)
+    results = enhance_risk_assessment([stub_analysis(clause) for clause in clauses])
+    body = json.dumps({"success": True, "total_clauses": len(results), "clauses": results})
+    with open(os.devnull, "w") as sink:
+        sink.write(body)
+    return len(results)
+
+
+def run_pipelined(pdf_path: str) -> int:
+    """The pipelined /analyze path, response streamed from the spill to a sink"""
+    from pipeline import ResultSpill, run_pipeline
+    from risk import enhance_risk_assessment
+
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        def submit(clause):
+            future = loop.create_future()
+            loop.call_soon(future.set_result, (True, stub_analysis(clause)))
+            return future
+
+        with tempfile.TemporaryDirectory() as tmp:
+            spill = ResultSpill(os.path.join(tmp, "results.jsonl"))
+            counts = await run_pipeline(
+                pdf_path, spill, submit,
+                finish=lambda clause, ok, out: enhance_risk_assessment([out])[0],
+                fallback=stub_analysis
+            )
+            with open(os.devnull, "wb") as sink:
+                for chunk in spill.iter_json({"success": True, **counts}):
+                    sink.write(chunk)
+            spill.close()
+        return counts["total_clauses"]
+
+    return asyncio.run(main())
+
+
+def peak_rss_mb() -> float:
+    """
+    This process' peak RSS. VmHWM starts over at exec; ru_maxrss would
+    include the parent's RSS at fork time.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode: str, pdf_path: str) -> dict:
+    """Run one mode in a fresh process; returns its peak RSS, time and clause count"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--run", mode, pdf_path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--run"]:
+        mode, pdf_path = args[1], args[2]
+        start = time.perf_counter()
+        clauses = run_buffered(pdf_path) if mode == "buffered" else run_pipelined(pdf_path)
+        print(json.dumps({"peak_mb": peak_rss_mb(), "seconds": time.perf_counter() - start, "clauses": clauses}))
+        sys.exit(0)
+
+    pages_list = [100, 1000]
+    if "--pages" in args:
+        pages_list = [int(p) for p in args[args.index("--pages") + 1].split(",")]
+
+    print(f"⏱️  Peak RSS analyzing synthetic PDFs of {', '.join(map(str, pages_list))} pages (stub inference)")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in pages_list:
+            pdf_path = os.path.join(tmp, f"synthetic_{pages}.pdf")
+            write_pdf(pdf_path, pages)
+            size_mb = os.path.getsize(pdf_path) / 1024 / 1024
+            for mode in ("buffered", "pipelined"):
+                result = measure(mode, pdf_path)
+                rows.append((pages, size_mb, mode, result))
+                print(f"   {pages} pages, {mode}: {result['peak_mb']:.0f} MB")
+
+    print("\n" + "=" * 72)
+    print(f"{'pages':>6}{'PDF MB':>9}{'mode':>12}{'clauses':>10}{'peak RSS MB':>14}{'seconds':>10}")
+    print("=" * 72)
+    for pages, size_mb, mode, result in rows:
+        print(f"{pages:>6}{size_mb:>9.1f}{mode:>12}{result['clauses']:>10}{result['peak_mb']:>14.1f}{result['seconds']:>10.1f}")
@@ -0,0 +1,116 @@
+"""
+Deterministic, model-free runs of the analysis path for performance and
+regression testing, from model outputs recorded once (inference_replay.py)
+
+Record once with the model, saving the results as the baseline:
+    CLAUSEWISE_RECORD=outputs.jsonl python benchmark_replay.py contract.pdf --save baseline.json
+
+Then replay as often as needed (only the tokenizer is loaded):
+    CLAUSEWISE_REPLAY=outputs.jsonl python benchmark_replay.py contract.pdf --check baseline.json [--runs 5]
+
+Documents are segmented and analyzed in scheduler-sized batches with the
+chosen strategy, then turned into /analyze results (build_clause_result,
+enhance_risk_assessment). Reports the time per stage and whether every
+run, and the baseline, produced identical results. Without a document a
+synthetic agreement is used.
+"""
+
+import json
+import sys
+import time
+
+from inference_replay import get_replay_stats
+
+
+def option(args: list, name: str, default: str) -> str:
+    if name in args:
+        idx = args.index(name)
+        value = args[idx + 1]
+        del args[idx:idx + 2]
+        return value
+    return default
+
+
+def analyze(clauses: list, strategy: str, batch_size: int) -> tuple:
+    """/analyze results for the clauses, and seconds spent analyzing and enhancing"""
+    from main import build_clause_result
+    from risk import enhance_risk_assessment
+    from strategies import run_strategy
+
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(clauses), batch_size):
+        batch = clauses[i:i + batch_size]
+        for clause, (ok, out) in zip(batch, run_strategy(strategy, batch)):
+            results.append(build_clause_result(clause, ok, out))
+    analyzed = time.perf_counter()
+    results = enhance_risk_assessment(results)
+    return results, analyzed - start, time.perf_counter() - analyzed
+
+
+def differences(expected: list, actual: list) -> list:
+    """(clause index, field, expected, actual) for every mismatch"""
+    if len(expected) != len(actual):
+        return [(None, "total_clauses", len(expected), len(actual))]
+    found = []
+    for n, (a, b) in enumerate(zip(expected, actual)):
+        for key in sorted(set(a) | set(b)):
+            if a.get(key) != b.get(key):
+                found.append((n, key, a.get(key), b.get(key)))
+    return found
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    save_path = option(args, "--save", "")
+    check_path = option(args, "--check", "")
+    runs = int(option(args, "--runs", "1"))
+    strategy = option(args, "--strategy", "single_pass")
+    batch_size = int(option(args, "--batch", "8"))
+
+    from main import segment_document
+    if args:
+        from text_extraction import extract_text
+        texts = [extract_text(path) for path in args]
+    else:
+        from benchmark_segmentation import synthetic_agreement
+        texts = [synthetic_agreement(paragraphs=60)]
+    clauses = [clause for text in texts for clause in segment_document(text)]
+    print(f"⏱️  {len(clauses)} clauses, strategy {strategy}, batches of {batch_size}, {runs} run(s)")
+
+    timings = []
+    outputs = []
+    for _ in range(runs):
+        results, analyze_s, enhance_s = analyze(clauses, strategy, batch_size)
+        timings.append((analyze_s, enhance_s))
+        outputs.append(results)
+
+    print("\n" + "=" * 64)
+    print(f"{'run':>4}{'analyze ms':>14}{'enhance ms':>14}{'total ms':>12}{'clauses/s':>12}")
+    print("=" * 64)
+    for n, (analyze_s, enhance_s) in enumerate(timings, 1):
+        total = analyze_s + enhance_s
+        print(f"{n:>4}{analyze_s * 1000:>14.1f}{enhance_s * 1000:>14.1f}{total * 1000:>12.1f}"
+              f"{len(clauses) / total:>12.0f}")
+    print(f"\n📼 {json.dumps(get_replay_stats())}")
+
+    if runs > 1:
+        unstable = sum(1 for results in outputs[1:] if differences(outputs[0], results))
+        print(f"🔁 Runs identical: {'yes' if not unstable else f'NO ({unstable} of {runs - 1} differ from run 1)'}")
+
+    if save_path:
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(outputs[0], f, indent=1)
+        print(f"💾 Baseline saved to {save_path}")
+
+    if check_path:
+        with open(check_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        found = differences(expected, outputs[0])
+        if not found:
+            print(f"✅ Identical to {check_path}")
+        else:
+            print(f"❌ {len(found)} difference(s) from {check_path}:")
+            for n, key, a, b in found[:20]:
+                print(f"   clause {n} {key}: {str(a)[:60]!r} -> {str(b)[:60]!r}")
+            sys.exit(1)
@@ -0,0 +1,110 @@
+"""
+Payload size and serialization time of each /analyze response format
+(response_formats.py) for synthetic documents, in full and classify mode
+
+Serialize covers what the server does per response (compact conversion,
+encoding, compression); decode covers the client side back to the default
+form. msgpack and brotli rows are skipped unless the packages are installed.
+
+Usage:
+    python benchmark_response_formats.py [--clauses 200,5000] [--repeat 5]
+"""
+
+import random
+import sys
+import time
+
+import response_formats as rf
+from response_formats import COMPACT_JSON, COMPACT_MSGPACK, JSON, decode_payload, encode_payload
+
+WORDS = ("supplier customer party parties agreement goods services deliver delivery date notice terminate "
+         "invoice pay interest liable loss indirect consequential rights property vest assign licence warrant "
+         "represent indemnify claim damages breach remedy cure period days months written consent confidential "
+         "information disclose obligation insurance governed law jurisdiction court dispute arbitration fees "
+         "charges costs expenses tax price schedule milestone acceptance test defect repair replace refund").split()
+COMMON = "the of to and any shall in by or with under this such all for on be".split()
+
+
+def synthetic_clause(rng: random.Random) -> str:
+    """Varied wording, so compression ratios are not flattered by repetition"""
+    sentences = []
+    for _ in range(rng.randint(1, 4)):
+        words = [rng.choice(COMMON) if rng.random() < 0.4 else rng.choice(WORDS) for _ in range(rng.randint(10, 30))]
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def synthetic_payload(clauses: int, mode: str, seed: int = 0) -> dict:
+    """An /analyze response shaped like the real one"""
+    rng = random.Random(seed)
+    results = []
+    for n in range(clauses):
+        original = f"{n + 1}. " + synthetic_clause(rng)
+        risk = rng.choice(["HIGH", "MEDIUM", "LOW"])
+        if mode == "classify":
+            result = {"original": original, "simplified": "", "risk": risk,
+                      "reason": f"Label likelihood: HIGH {rng.random():.2f}, MEDIUM {rng.random():.2f}, "
+                                f"LOW {rng.random():.2f}",
+                      "classify_only": True, "clean": True}
+        else:
+            result = {"original": original, "simplified": synthetic_clause(rng),
+                      "risk": risk, "reason": synthetic_clause(rng).split(". ")[0],
+                      "clean": True}
+        if rng.random() < 0.05:
+            result["fallback"] = True
+        results.append(result)
+    return {"success": True, "document_id": "0" * 32, "strategy": "single_pass", "total_clauses": clauses,
+            "queue_wait": {"first_wait_ms": 12.5, "mean_wait_ms": 40.1}, "model_analyzed_clauses": clauses,
+            "deadline_reached": False, "elapsed_seconds": 12.34, "clauses": results}
+
+
+def formats() -> list:
+    rows = [("json", JSON, None), ("json+gzip", JSON, "gzip")]
+    if rf.brotli is not None:
+        rows.append(("json+br", JSON, "br"))
+    rows += [("compact", COMPACT_JSON, None), ("compact+gzip", COMPACT_JSON, "gzip")]
+    if rf.brotli is not None:
+        rows.append(("compact+br", COMPACT_JSON, "br"))
+    if rf.msgpack is not None:
+        rows += [("msgpack", COMPACT_MSGPACK, None), ("msgpack+gzip", COMPACT_MSGPACK, "gzip")]
+    return rows
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sizes = [200, 5000]
+    repeat = 5
+    if "--clauses" in args:
+        sizes = [int(n) for n in args[args.index("--clauses") + 1].split(",")]
+    if "--repeat" in args:
+        repeat = int(args[args.index("--repeat") + 1])
+
+    missing = [name for name, module in (("msgpack", rf.msgpack), ("brotli", rf.brotli)) if module is None]
+    if missing:
+        print(f"⚠️  Not installed, skipped: {', '.join(missing)}")
+
+    print("\n" + "=" * 84)
+    print(f"{'clauses':>8}{'mode':>10}  {'format':<14}{'bytes':>12}{'vs json':>9}{'serialize ms':>15}{'decode ms':>12}")
+    print("=" * 84)
+    for clauses in sizes:
+        for mode in ("full", "classify"):
+            payload = synthetic_payload(clauses, mode)
+            baseline = None
+            for name, media_type, encoding in formats():
+                body = encode_payload(payload, media_type, encoding)
+                # Every format must round-trip to the same response
+                assert decode_payload(body, media_type, encoding) == payload, name
+                baseline = baseline or len(body)
+                serialize = best_ms(lambda: encode_payload(payload, media_type, encoding), repeat)
+                decode = best_ms(lambda: decode_payload(body, media_type, encoding), repeat)
+                print(f"{clauses:>8}{mode:>10}  {name:<14}{len(body):>12,}{len(body) / baseline:>9.0%}"
+                      f"{serialize:>15.1f}{decode:>12.1f}")
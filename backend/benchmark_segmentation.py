@@ -0,0 +1,98 @@
+"""
+Compare word-count segmentation (segment_clauses) with token-budget
+segmentation (segment_clauses_by_tokens) by the padding single-pass batches
+would carry: eager batches pad to their longest prompt, compiled mode pads
+every prompt to its bucket (generation.PROMPT_BUCKETS)
+
+Only the tokenizer and the prompt template are used; nothing is generated.
+
+Usage:
+    python benchmark_segmentation.py contract.pdf ...  [--bucket 1024] [--batch 8]
+    python benchmark_segmentation.py                    # synthetic agreement
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from clause_segmentation import segment_clauses, segment_clauses_by_tokens
+from generation import PROMPT_BUCKETS
+
+SENTENCES = [
+    "The Supplier shall deliver the Goods to the Delivery Address on the Delivery Date.",
+    "Either party may terminate this Agreement by giving not less than thirty days written notice.",
+    "The Customer shall pay each invoice within forty-five days of the date of the invoice, "
+    "failing which interest shall accrue at four percent above the base rate.",
+    "Neither party shall be liable for any indirect or consequential loss.",
+    "All intellectual property rights in the Deliverables shall vest in the Customer on creation, "
+    "and the Supplier hereby assigns to the Customer with full title guarantee all such rights, "
+    "including by way of present assignment of future rights, free from all encumbrances.",
+    "Notices shall be in writing.",
+]
+
+
+def synthetic_agreement(paragraphs: int = 300, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n".join(
+        f"{n + 1}. " + " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 8)))
+        for n in range(paragraphs)
+    )
+
+
+def padding(prompt_lengths: list, batch_size: int, compiled: bool) -> float:
+    """Share of prompt positions in batches that are padding"""
+    padded = 0
+    for i in range(0, len(prompt_lengths), batch_size):
+        batch = prompt_lengths[i:i + batch_size]
+        longest = max(batch)
+        width = next((b for b in PROMPT_BUCKETS if b >= longest), longest) if compiled else longest
+        padded += width * len(batch)
+    return 1 - sum(prompt_lengths) / padded
+
+
+def option(args: list, name: str, default: int) -> int:
+    if name in args:
+        idx = args.index(name)
+        value = int(args[idx + 1])
+        del args[idx:idx + 2]
+        return value
+    return default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bucket = option(args, "--bucket", PROMPT_BUCKETS[-1])
+    batch_size = option(args, "--batch", 8)
+
+    if args:
+        from text_extraction import extract_text
+        texts = [extract_text(path) for path in args]
+    else:
+        texts = [synthetic_agreement()]
+
+    from granite_api import build_prompt, clause_token_range, tokenizer
+
+    min_tokens, max_tokens = clause_token_range(bucket)
+    print(f"⏱️  Segmenting {len(texts)} document(s); token target {min_tokens}-{max_tokens} "
+          f"(bucket {bucket}, batch size {batch_size})")
+
+    modes = [
+        ("words", lambda text: segment_clauses(text)),
+        ("tokens", lambda text: segment_clauses_by_tokens(text, tokenizer, min_tokens, max_tokens)),
+    ]
+    print("\n" + "=" * 96)
+    print(f"{'mode':<8}{'clauses':>9}{'seg ms':>9}{'prompt tok p50':>16}{'p90':>7}{'max':>7}"
+          f"{'over bucket':>13}{'eager pad':>12}{'compiled pad':>14}")
+    print("=" * 96)
+    for mode, segment in modes:
+        start = time.perf_counter()
+        clauses = [c for text in texts for c in segment(text)]
+        seg_ms = (time.perf_counter() - start) * 1000
+        prompts = tokenizer([build_prompt(c) for c in clauses])["input_ids"]
+        lengths = [len(ids) for ids in prompts]
+        ordered = sorted(lengths)
+        over = sum(1 for n in lengths if n > bucket)
+        print(f"{mode:<8}{len(clauses):>9}{seg_ms:>9.1f}{statistics.median(lengths):>16.0f}"
+              f"{ordered[int(0.9 * (len(ordered) - 1))]:>7}{ordered[-1]:>7}{over:>13}"
+              f"{padding(lengths, batch_size, False):>11.1%}{padding(lengths, batch_size, True):>13.1%}")
@@ -0,0 +1,133 @@
+"""
+Throughput of remote inference workers (inference_worker.py) behind a
+WorkerPool (inference_coordinator.py) on one machine, and failover when a
+worker dies mid-run
+
+Workers run stub_inference.py (CLAUSEWISE_STUB_* set their latency) and
+listen on Unix sockets, or on localhost ports with --tcp. Batches are
+pushed from as many threads as main.py's scheduler would use.
+
+Usage:
+    python benchmark_workers.py [--workers 1,2,4] [--batches 64] [--batch-size 8] [--tcp]
+
+To drive the full API instead, start workers and point main at them:
+    python inference_worker.py --port 8101 --stub &
+    python inference_worker.py --port 8102 --stub &
+    CLAUSEWISE_REMOTE_WORKERS=http://127.0.0.1:8101,http://127.0.0.1:8102 uvicorn main:app
+    python benchmark_load.py --url http://127.0.0.1:8000
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inference_coordinator import WorkerPool
+
+CLAUSE = ("The Supplier shall indemnify and hold harmless the Customer against all claims, "
+          "losses and damages arising from any breach of this Agreement.")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_workers(count: int, tmp: str, tcp: bool) -> list:
+    """(process, address) per worker, once every one answers /health"""
+    workers = []
+    for n in range(count):
+        if tcp:
+            port = free_port()
+            args, address = ["--port", str(port)], f"http://127.0.0.1:{port}"
+        else:
+            path = os.path.join(tmp, f"worker{n}.sock")
+            args, address = ["--uds", path], f"unix:{path}"
+        process = subprocess.Popen([sys.executable, "inference_worker.py", "--stub", *args],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        workers.append((process, address))
+
+    probe = WorkerPool([address for _, address in workers], health_interval=3600)
+    deadline = time.monotonic() + 60
+    while probe.healthy_count() < count:
+        if time.monotonic() > deadline:
+            stop_workers(workers)
+            raise RuntimeError("Inference workers did not start")
+        time.sleep(0.2)
+        probe.check_health()
+    probe.close()
+    return workers
+
+
+def stop_workers(workers: list):
+    for process, _ in workers:
+        process.terminate()
+    for process, _ in workers:
+        process.wait()
+
+
+def run_batches(pool: WorkerPool, batches: int, batch_size: int, threads: int) -> tuple:
+    """Seconds to run all batches, and how many came back as failures"""
+    def one(_):
+        results = pool.run_strategy("single_pass", [CLAUSE] * batch_size)
+        return sum(1 for ok, _ in results if not ok)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        failed = sum(executor.map(one, range(batches)))
+    return time.perf_counter() - start, failed
+
+
+def option(args: list, name: str, default: str) -> str:
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    levels = [int(n) for n in option(args, "--workers", "1,2,4").split(",")]
+    batches = int(option(args, "--batches", "64"))
+    batch_size = int(option(args, "--batch-size", "8"))
+    tcp = "--tcp" in args
+
+    print(f"⏱️  {batches} batches of {batch_size} clauses per run, stub inference, "
+          f"{'TCP' if tcp else 'Unix sockets'}")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in levels:
+            workers = start_workers(count, tmp, tcp)
+            pool = WorkerPool([address for _, address in workers])
+            try:
+                seconds, failed = run_batches(pool, batches, batch_size, threads=2 * count)
+                spread = [w.batches for w in pool.workers]
+                rows.append((f"{count} worker(s)", seconds, failed, pool.retried_batches, spread))
+            finally:
+                pool.close()
+                stop_workers(workers)
+
+        # Failover: kill one worker while batches are in flight
+        count = max(levels[-1], 2)
+        workers = start_workers(count, tmp, tcp)
+        pool = WorkerPool([address for _, address in workers])
+        try:
+            killer = threading.Timer(1.0, workers[0][0].kill)
+            killer.start()
+            seconds, failed = run_batches(pool, batches, batch_size, threads=2 * count)
+            killer.join()
+            spread = [w.batches for w in pool.workers]
+            rows.append((f"{count}, 1 killed", seconds, failed, pool.retried_batches, spread))
+        finally:
+            pool.close()
+            stop_workers(workers)
+
+    print("\n" + "=" * 80)
+    print(f"{'run':<16}{'seconds':>9}{'clauses/s':>11}{'speedup':>9}{'failed':>8}{'retried':>9}  batches per worker")
+    print("=" * 80)
+    base = rows[0][1]
+    for name, seconds, failed, retried, spread in rows:
+        print(f"{name:<16}{seconds:>9.1f}{batches * batch_size / seconds:>11.1f}{base / seconds:>8.1f}x"
+              f"{failed:>8}{retried:>9}  {spread}")
@@ -0,0 +1,172 @@
+"""
+Near-duplicate clause index
+
+Boilerplate clauses often differ only by party names, dates or numbering, so
+exact-match caching misses them. Each analyzed clause is reduced to a 64-bit
+SimHash over word shingles of its normalized text; a new clause whose SimHash
+is within the configured similarity of a stored one reuses that analysis.
+A few words change what a clause means while barely moving its SimHash, so
+a match must also have the same meaning key: its other numbers (amounts,
+durations) and negations ("not", "without", ...).
+
+Lookups use banded buckets: with at most d differing bits, splitting the hash
+into d + 1 bands guarantees a near duplicate matches one band exactly, so only
+that bucket's entries are compared. Entries are appended to a JSON lines file
+and reloaded on startup.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from array import array
+from typing import Optional, Tuple
+
+HASH_BITS = 64
+SHINGLE_SIZE = 3
+
+_NUMBERING = re.compile(r'^\s*(?:(?:section|article|clause)\s+)?(?:\d+(?:\.\d+)+\s+|\(?[0-9a-z]{1,4}[.)]\s*)+',
+                        re.IGNORECASE)
+# Runs of capitalized words after the first word: party names, defined terms
+_PROPER_NOUNS = re.compile(r"(?<!^)\b[A-Z][\w&'-]*(?:\s+[A-Z][\w&'-]*)*")
+_MONTHS = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+_DATES = re.compile(
+    r'\b(?:\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.]\d{1,2}[/.]\d{2,4}'
+    rf'|\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS},?\s+\d{{4}}|{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}})\b',
+    re.IGNORECASE
+)
+_DIGITS = re.compile(r'\d+')
+_NUMBERS = re.compile(r'\d+(?:[.,]\d+)*')
+_NEGATIONS = re.compile(r"\b(?:not|no|never|without|neither|nor|none|cannot)\b|n't\b", re.IGNORECASE)
+_NON_WORD = re.compile(r'[^\w#]+')
+
+
+def normalize_clause(text: str) -> str:
+    """Drop leading numbering, mask names, dates and digits, lowercase, strip punctuation"""
+    text = _NUMBERING.sub('', text)
+    text = _DATES.sub('#', text)
+    text = _PROPER_NOUNS.sub('N', text).lower()
+    text = _DIGITS.sub('#', text)
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def meaning_key(text: str) -> str:
+    """Numbers other than numbering and dates, and negations, in order"""
+    text = _DATES.sub(' ', _NUMBERING.sub('', text))
+    numbers = _NUMBERS.findall(text)
+    negations = [m.lower() for m in _NEGATIONS.findall(text)]
+    return " ".join(numbers) + "|" + " ".join(negations)
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word shingles of the normalized clause"""
+    words = normalize_clause(text).split()
+    if len(words) <= SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    counts = [0] * HASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(HASH_BITS):
+            if h >> bit & 1:
+                counts[bit] += 1
+            else:
+                counts[bit] -= 1
+
+    value = 0
+    for bit in range(HASH_BITS):
+        if counts[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+class ClauseIndex:
+    def __init__(self, path: str = None, threshold: float = 0.95):
+        """
+        Args:
+            path: JSON lines file to load from and append to (None = memory only)
+            threshold: Minimum similarity (1 - differing bits / 64) for a match
+        """
+        self.path = path
+        self.threshold = threshold
+        self.max_distance = int((1 - threshold) * HASH_BITS)
+
+        # Split the hash into max_distance + 1 bands of near-equal width
+        n_bands = self.max_distance + 1
+        self._bands = []
+        start = 0
+        for i in range(n_bands):
+            width = HASH_BITS // n_bands + (1 if i < HASH_BITS % n_bands else 0)
+            self._bands.append((start, (1 << width) - 1))
+            start += width
+
+        self._hashes = array('Q')
+        self._keys = []
+        self._results = []
+        self._buckets = [dict() for _ in self._bands]
+        self._lock = threading.Lock()
+        self._file = None
+
+        if path:
+            if os.path.exists(path):
+                self._load(path)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _load(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    # Entries written before meaning keys existed never match
+                    self._insert(entry["simhash"], entry["result"], entry.get("key"))
+        print(f"📚 Loaded {len(self)} clauses into the similarity index")
+
+    def _insert(self, value: int, result: dict, key: Optional[str]):
+        entry_id = len(self._hashes)
+        self._hashes.append(value)
+        self._keys.append(key)
+        self._results.append(result)
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            buckets.setdefault(value >> shift & mask, []).append(entry_id)
+
+    def add(self, clause: str, result: dict):
+        """Store the analysis of a clause"""
+        self.add_hash(simhash(clause), result, meaning_key(clause))
+
+    def add_hash(self, value: int, result: dict, key: str = ""):
+        with self._lock:
+            self._insert(value, result, key)
+            if self._file:
+                self._file.write(json.dumps({"simhash": value, "key": key, "result": result}) + "\n")
+                self._file.flush()
+
+    def lookup(self, clause: str) -> Optional[Tuple[dict, float]]:
+        """Returns (stored analysis, similarity) of the closest match, or None"""
+        return self.lookup_hash(simhash(clause), meaning_key(clause))
+
+    def lookup_hash(self, value: int, key: str = "") -> Optional[Tuple[dict, float]]:
+        best_id, best_distance = None, self.max_distance + 1
+        with self._lock:
+            for (shift, mask), buckets in zip(self._bands, self._buckets):
+                for entry_id in buckets.get(value >> shift & mask, ()):
+                    if self._keys[entry_id] != key:
+                        continue
+                    distance = bin(self._hashes[entry_id] ^ value).count("1")
+                    if distance < best_distance:
+                        best_id, best_distance = entry_id, distance
+                        if distance == 0:
+                            break
+            if best_id is None:
+                return None
+            return self._results[best_id], 1 - best_distance / HASH_BITS
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
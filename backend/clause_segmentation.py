@@ -1,15 +1,39 @@
 import re
-from typing import List
+from typing import Iterable, Iterator, List
+
+# Structure markers text extraction can leave in the text (see
+# text_extraction.iter_docx); any other whitespace is normalized away.
+# Private-use characters, so form feeds and vertical tabs in TXT and PDF
+# text (e.g. PDF page breaks) stay plain whitespace
+SECTION_BREAK = "\ue000"  # ends the current clause
+ROW_BREAK = "\ue001"      # ends a sentence: table rows have no full stops
+
+_WHITESPACE = re.compile(r'\s+')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\s*\ue001\s*')
+_ROW_BREAKS = re.compile(r'\s*\ue001\s*')
 
 def segment_clauses(text: str, min_words: int = 10, max_words: int = 150) -> List[str]:
     """
     Improved clause segmentation that supports:
     - Numbered clauses (1., 2., A., (a), etc.)
     - Legal-style headings (e.g., 'Confidentiality', 'Termination', etc.)
+    - Section and table row breaks marked by text extraction
     """
 
+    # Remove duplicates while preserving order
+    seen = set()
+    final_clauses: List[str] = []
+    for section in text.split(SECTION_BREAK):
+        for c in _segment_section(section, min_words, max_words):
+            if c not in seen:
+                seen.add(c)
+                final_clauses.append(c)
+
+    return final_clauses
+
+def _segment_section(text: str, min_words: int, max_words: int) -> List[str]:
     # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WHITESPACE.sub(' ', text).strip()
 
     # Split on heading-style lines (Capitalized words)
     heading_pattern = r'(?:(?<=\n)|^)([A-Z][A-Za-z ]{3,60})(?=\n|:)'
@@ -52,7 +76,7 @@ def segment_clauses(text: str, min_words: int = 10, max_words: int = 150) -> Lis
         if wc < min_words:
             continue
         if wc > max_words:
-            sentences = re.split(r'(?<=[.!?])\s+', clause)
+            sentences = _SENTENCE_BREAK.split(clause)
             current = ""
             for s in sentences:
                 test = (current + " " + s).strip() if current else s
@@ -65,12 +89,164 @@ def segment_clauses(text: str, min_words: int = 10, max_words: int = 150) -> Lis
             if current:
                 cleaned_clauses.append(current.strip())
         else:
-            cleaned_clauses.append(clause)
+            cleaned_clauses.append(_ROW_BREAKS.sub(' ', clause).strip())
+
+    return cleaned_clauses
+
+def iter_clauses(pieces: Iterable[str], min_words: int = 10, max_words: int = 150) -> Iterator[str]:
+    """
+    Streaming segment_clauses for very large documents: takes the text in
+    pieces (pages or blocks, as from text_extraction.iter_text) and yields
+    clauses as soon as they are complete, holding at most one clause and
+    one piece in memory.
+
+    Whitespace is normalized before segment_clauses splits anything, so
+    for a long document it comes down to packing sentences into clauses of
+    at most max_words words; this does the same packing incrementally.
+    """
+    # Hashes instead of the clauses themselves keep the duplicate check small
+    seen = set()
+    current = ""
+    tail = ""
+    packed = False
+
+    def pack(sentences):
+        nonlocal current, packed
+        for s in sentences:
+            test = (current + " " + s).strip() if current else s
+            if len(test.split()) <= max_words:
+                current = test
+                continue
+            packed = True
+            if current and hash(current) not in seen:
+                seen.add(hash(current))
+                yield current
+            current = s
+
+    def end_section():
+        nonlocal current, packed
+        # A section that fits in one clause still needs min_words
+        if current and (packed or len(current.split()) >= min_words) and hash(current) not in seen:
+            seen.add(hash(current))
+            yield current
+        current, packed = "", False
+
+    def split_sentences(text):
+        return _SENTENCE_BREAK.split(_WHITESPACE.sub(' ', text).strip())
+
+    for piece in pieces:
+        tail += piece
+        *sections, tail = tail.split(SECTION_BREAK)
+        for section in sections:
+            yield from pack(s for s in split_sentences(section) if s)
+            yield from end_section()
+        sentences = _SENTENCE_BREAK.split(_WHITESPACE.sub(' ', tail).lstrip())
+        # The last sentence may continue in the next piece
+        tail = sentences.pop()
+        yield from pack(s for s in sentences if s)
+
+    yield from pack(s for s in split_sentences(tail) if s)
+    yield from end_section()
+
+def segment_clauses_by_tokens(text: str, tokenizer, min_tokens: int, max_tokens: int,
+                              min_words: int = 10) -> List[str]:
+    """
+    Clause segmentation sized in model tokens instead of words, so clauses
+    fit a prompt bucket (see granite_api.clause_token_range).
+
+    Every sentence is measured in one batched call to the (fast) tokenizer;
+    a clause's length is taken as the sum of its sentences'. Sentences are
+    packed into clauses of at most max_tokens (longer sentences are split
+    between words), then clauses under min_tokens are merged into a
+    neighbour in the same section when the result still fits. Packed
+    clauses are measured once more and trimmed if the estimate was short.
+    Sections,
+    row breaks and the min_words floor for one-clause sections work as in
+    segment_clauses.
+    """
+    sections = []
+    for section in text.split(SECTION_BREAK):
+        sentences = [s for s in _SENTENCE_BREAK.split(_WHITESPACE.sub(' ', section).strip()) if s]
+        if sentences:
+            sections.append(sentences)
+    if not sections:
+        return []
+
+    # One batch for every sentence in the document
+    flat = [s for sentences in sections for s in sentences]
+    lengths = iter(len(ids) for ids in tokenizer(flat, add_special_tokens=False)["input_ids"])
+    sections = [[(s, next(lengths)) for s in sentences] for sentences in sections]
+
+    # Split over-long sentences between words (a second batch, usually small)
+    long_parts = {}
+    for sentences in sections:
+        for s, n in sentences:
+            if n > max_tokens:
+                words = s.split()
+                parts = -(-n // max_tokens)
+                size = -(-len(words) // parts)
+                long_parts[s] = [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+    if long_parts:
+        flat = [p for parts in long_parts.values() for p in parts]
+        lengths = iter(len(ids) for ids in tokenizer(flat, add_special_tokens=False)["input_ids"])
+        long_parts = {s: [(p, next(lengths)) for p in parts] for s, parts in long_parts.items()}
+
+    packed = []
+    for sentences in sections:
+        # Greedy packing up to max_tokens
+        clauses = []
+        current, current_tokens = [], 0
+        for s, n in sentences:
+            for part, part_tokens in long_parts.get(s, [(s, n)]):
+                if current and current_tokens + part_tokens > max_tokens:
+                    clauses.append([current, current_tokens])
+                    current, current_tokens = [], 0
+                current.append(part)
+                current_tokens += part_tokens
+        if current:
+            clauses.append([current, current_tokens])
+
+        # Merge short clauses into a neighbour that has room
+        merged = []
+        for clause in clauses:
+            if merged and (clause[1] < min_tokens or merged[-1][1] < min_tokens) \
+                    and merged[-1][1] + clause[1] <= max_tokens:
+                merged[-1][0] += clause[0]
+                merged[-1][1] += clause[1]
+            else:
+                merged.append(clause)
+
+        if len(merged) == 1 and sum(len(s.split()) for s in merged[0][0]) < min_words:
+            continue
+        packed.extend(parts for parts, _ in merged)
+    # Every section fell under the min_words floor
+    if not packed:
+        return []
+
+    # Sums of sentence lengths are an estimate: check the clauses themselves
+    # in one more batch and move the last sentence out of any that came out
+    # over max_tokens (or halve a lone sentence between words)
+    while True:
+        lengths = tokenizer([" ".join(parts) for parts in packed], add_special_tokens=False)["input_ids"]
+        over = {i for i, ids in enumerate(lengths)
+                if len(ids) > max_tokens and (len(packed[i]) > 1 or " " in packed[i][0])}
+        if not over:
+            break
+        resized = []
+        for i, parts in enumerate(packed):
+            if i not in over:
+                resized.append(parts)
+            elif len(parts) > 1:
+                resized += [parts[:-1], parts[-1:]]
+            else:
+                words = parts[0].split()
+                resized += [[" ".join(words[:len(words) // 2])], [" ".join(words[len(words) // 2:])]]
+        packed = resized
 
-    # Remove duplicates while preserving order
     seen = set()
     final_clauses: List[str] = []
-    for c in cleaned_clauses:
+    for parts in packed:
+        c = " ".join(parts)
         if c not in seen:
             seen.add(c)
             final_clauses.append(c)
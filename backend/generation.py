@@ -0,0 +1,431 @@
+"""
+Generation helpers shared by the single-pass and two-pass analyzers.
+
+max_new_tokens is derived from the clause token count and the output schema
+of each prompt instead of a fixed number, and every generate call records its
+actual output length so the caps can be tuned from measured data
+(see measure_output_lengths.py).
+
+Decoding can optionally be assisted: much of the output is copied from the
+prompt (the echoed clause, quoted terms in "reason"), so drafting tokens from
+prompt n-grams or from a small draft model saves decode steps. It only
+applies to single-clause generations: batches of more than one clause (the
+server batches up to CLAUSEWISE_BATCH_SIZE) always decode plainly. Prompt
+lookup also turns off the repetition penalties, which would penalise the
+copied n-grams it drafts. Compare modes with benchmark_decoding.py.
+
+Compiled mode (opt-in) uses a static KV cache and torch.compile of the
+model's forward pass. Prompts are left-padded up to the nearest of
+PROMPT_BUCKETS so each bucket compiles once; warmup compiles them all at
+startup and the compiled artifacts are kept on disk for the next start.
+Compare against eager mode with benchmark_compile.py.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Dict
+
+# Assisted decoding mode (opt-in):
+#   ""              plain decoding
+#   "prompt_lookup" draft tokens by matching n-grams from the prompt
+#   "draft_model"   speculative decoding with CLAUSEWISE_DRAFT_MODEL
+DECODING_MODE = os.getenv("CLAUSEWISE_DECODING", "")
+PROMPT_LOOKUP_NUM_TOKENS = int(os.getenv("CLAUSEWISE_PROMPT_LOOKUP_TOKENS", "10"))
+DRAFT_MODEL_NAME = os.getenv("CLAUSEWISE_DRAFT_MODEL", "")
+
+# Drop sampling parameters and decode greedily (used by the benchmarks)
+FORCE_GREEDY = False
+
+# Set once the "assisted decoding skipped for a batch" notice has been printed
+_warned_batched_assist = False
+
+# Compiled mode: static cache + torch.compile, prompts padded to these lengths
+COMPILE_MODE = os.getenv("CLAUSEWISE_COMPILE", "0") == "1"
+PROMPT_BUCKETS = tuple(sorted(int(b) for b in os.getenv("CLAUSEWISE_PROMPT_BUCKETS", "256,512,1024").split(",")))
+# Batch sizes compiled at startup (default: 1 and the scheduler's batch size,
+# see warmup_batch_sizes). A compiled model pads every batch up to the next
+# of these, since a new batch size reallocates the static cache and
+# recompiles. Fewer sizes mean fewer compiles and reallocations but more
+# compute spent on padding rows; more sizes the reverse.
+WARMUP_BATCH_SIZES = tuple(int(b) for b in os.getenv("CLAUSEWISE_WARMUP_BATCH_SIZES", "").split(",") if b)
+COMPILE_CACHE_DIR = os.getenv("CLAUSEWISE_COMPILE_CACHE", "compile_cache")
+
+# Budget per output schema: a fixed overhead for the scaffolding the model
+# always writes (JSON keys, answer labels, reason) plus a share of the clause
+# length for fields that grow with it ("original" echo, "simplified" text).
+# These are estimates, not measurements: base and per_token come from the
+# size of each output schema, and the "max" caps keep the previous fixed
+# values. Re-derive them from real output lengths with
+# measure_output_lengths.py once a model is available, and check the cap hit
+# rate in /stats.
+GENERATION_BUDGETS = {
+    # granite_api.call_granite: original + simplified + risk + reason
+    "single_pass": {"base": 100, "per_token": 1.6, "min": 128, "max": 400},
+    # granite_api_advanced.extract_key_info: six short answers
+    "extract_info": {"base": 90, "per_token": 0.5, "min": 96, "max": 250},
+    # granite_api_advanced.generate_final_analysis: simplified + risk + reason
+    "final_analysis": {"base": 60, "per_token": 0.7, "min": 80, "max": 300},
+    # granite_api.simplify_clauses_batch: plain-English text only
+    "simplify": {"base": 40, "per_token": 0.6, "min": 48, "max": 200},
+}
+
+# Number of recent generations kept per prompt kind for the length distribution
+STATS_WINDOW = 2000
+
+_samples = {kind: deque(maxlen=STATS_WINDOW) for kind in GENERATION_BUDGETS}
+_calls = {kind: 0 for kind in GENERATION_BUDGETS}
+_cap_hits = {kind: 0 for kind in GENERATION_BUDGETS}
+_total_tokens = {kind: 0 for kind in GENERATION_BUDGETS}
+_total_seconds = {kind: 0.0 for kind in GENERATION_BUDGETS}
+
+_draft_model = None
+_draft_tokenizer = None
+
+
+def count_tokens(tokenizer, text: str) -> int:
+    """Number of tokens in text, without special tokens"""
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def max_new_tokens_for(kind: str, clause_tokens: int) -> int:
+    """
+    Generation budget for a prompt kind given the clause length in tokens.
+    """
+    budget = GENERATION_BUDGETS[kind]
+    tokens = int(budget["base"] + budget["per_token"] * clause_tokens)
+    return max(budget["min"], min(budget["max"], tokens))
+
+
+def largest_fitting_bucket(kind: str, clause_token_range) -> int:
+    """
+    Largest of PROMPT_BUCKETS whose longest clause, per clause_token_range
+    (granite_api.clause_token_range), still gets its full budget for kind
+    rather than the "max" cap. Longer clauses would have their output cut
+    off mid-JSON. The smallest usable bucket if none fits.
+    """
+    budget = GENERATION_BUDGETS[kind]
+    fitting, smallest = None, None
+    for bucket in PROMPT_BUCKETS:
+        try:
+            longest = clause_token_range(bucket)[1]
+        except ValueError:
+            # Too small for the prompt template
+            continue
+        smallest = smallest or bucket
+        if budget["base"] + budget["per_token"] * longest <= budget["max"]:
+            fitting = bucket
+    if smallest is None:
+        raise ValueError(f"No prompt bucket in {PROMPT_BUCKETS} fits the prompt template")
+    return fitting or smallest
+
+
+def _load_draft_model(device):
+    global _draft_model, _draft_tokenizer
+    if _draft_model is None:
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM
+
+        if not DRAFT_MODEL_NAME:
+            raise ValueError("CLAUSEWISE_DECODING=draft_model requires CLAUSEWISE_DRAFT_MODEL")
+        print(f"🔄 Loading draft model {DRAFT_MODEL_NAME}...")
+        _draft_tokenizer = AutoTokenizer.from_pretrained(DRAFT_MODEL_NAME)
+        _draft_model = AutoModelForCausalLM.from_pretrained(
+            DRAFT_MODEL_NAME,
+            dtype=torch.float32,
+            low_cpu_mem_usage=True
+        ).to(device)
+        print(f"✅ Draft model loaded")
+    return _draft_model, _draft_tokenizer
+
+
+def decoding_kwargs(model, tokenizer) -> dict:
+    """
+    Extra model.generate arguments for the configured DECODING_MODE.
+    """
+    if DECODING_MODE == "prompt_lookup":
+        # Drafts are n-grams copied from the prompt; the penalties reject exactly those
+        return {"prompt_lookup_num_tokens": PROMPT_LOOKUP_NUM_TOKENS,
+                "repetition_penalty": None, "no_repeat_ngram_size": None}
+    if DECODING_MODE == "draft_model":
+        draft_model, draft_tokenizer = _load_draft_model(model.device)
+        kwargs = {"assistant_model": draft_model}
+        # Draft models with a different vocabulary need both tokenizers
+        if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+            kwargs["tokenizer"] = tokenizer
+            kwargs["assistant_tokenizer"] = draft_tokenizer
+        return kwargs
+    return {}
+
+
+def is_compiled(model) -> bool:
+    return getattr(model, "_clausewise_compiled", False)
+
+
+def warmup_batch_sizes() -> tuple:
+    """WARMUP_BATCH_SIZES, or 1 and the largest batch the scheduler forms"""
+    if WARMUP_BATCH_SIZES:
+        return tuple(sorted(WARMUP_BATCH_SIZES))
+    from hardware_profile import max_batch_size
+    return tuple(sorted({1, max_batch_size()}))
+
+
+def pad_batch(model, inputs):
+    """
+    Repeat the first row of a tokenized batch up to the next warmup batch
+    size so a compiled model sees a fixed set of batch sizes. Returns
+    (inputs, rows added); a no-op in eager mode or past the largest size.
+    """
+    batch_size = inputs["input_ids"].shape[0]
+    target = next((b for b in warmup_batch_sizes() if b >= batch_size), batch_size)
+    if not is_compiled(model) or target == batch_size:
+        return inputs, 0
+
+    import torch
+    extra = target - batch_size
+    padded = {key: torch.cat([value, value[:1].expand(extra, *value.shape[1:])]) for key, value in inputs.items()}
+    return padded, extra
+
+
+def pad_to_bucket(model, inputs, pad_token_id: int):
+    """
+    Left-pad a tokenized batch up to the nearest prompt bucket so a compiled
+    model sees a fixed set of shapes. Returns (inputs, padding added);
+    a no-op in eager mode or for prompts longer than every bucket.
+    """
+    length = inputs["input_ids"].shape[1]
+    target = next((b for b in PROMPT_BUCKETS if b >= length), length)
+    if not is_compiled(model) or target == length:
+        return inputs, 0
+
+    import torch.nn.functional as F
+    pad = target - length
+    padded = dict(inputs)
+    padded["input_ids"] = F.pad(inputs["input_ids"], (pad, 0), value=pad_token_id)
+    padded["attention_mask"] = F.pad(inputs["attention_mask"], (pad, 0), value=0)
+    return padded, pad
+
+
+def compile_model(model, tokenizer):
+    """
+    Switch a loaded model to a static KV cache and a compiled forward pass,
+    then compile every prompt bucket. Compiled kernels are read from and
+    written to COMPILE_CACHE_DIR, so only the first start pays for them.
+    """
+    cache_dir = os.path.abspath(COMPILE_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Inductor's FX graph cache keeps compiled kernels across restarts
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(cache_dir, "inductor"))
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+    import torch
+
+    artifacts_path = os.path.join(cache_dir, "compile_artifacts.bin")
+    can_cache_artifacts = hasattr(torch.compiler, "load_cache_artifacts")
+    if can_cache_artifacts and os.path.exists(artifacts_path):
+        with open(artifacts_path, "rb") as f:
+            torch.compiler.load_cache_artifacts(f.read())
+        print(f"   Loaded compiled artifacts from {artifacts_path}")
+
+    print("🔧 Compiling model (static cache + torch.compile)...")
+    model.generation_config.cache_implementation = "static"
+    # CUDA graphs cut per-step launch overhead; they do not apply on CPU
+    mode = "reduce-overhead" if model.device.type == "cuda" else None
+    # Not fullgraph: GraniteMoE routes tokens to experts with data-dependent
+    # splits (.tolist()), which break the graph there
+    model.forward = torch.compile(model.forward, mode=mode)
+    model._clausewise_compiled = True
+
+    warmup(model, tokenizer)
+
+    if can_cache_artifacts:
+        artifacts = torch.compiler.save_cache_artifacts()
+        if artifacts is not None:
+            with open(artifacts_path, "wb") as f:
+                f.write(artifacts[0])
+    print(f"✅ Compiled mode ready (prompt buckets {', '.join(map(str, PROMPT_BUCKETS))})")
+
+
+def warmup(model, tokenizer):
+    """
+    Run one prefill and one decode step per prompt bucket and warmup batch
+    size. The largest bucket goes first with the largest generation budget,
+    so the static cache is allocated once at full size and reused after;
+    generation is stopped after two new tokens (prefill, then a decode step).
+    """
+    import torch
+
+    max_new_tokens = max(budget["max"] for budget in GENERATION_BUDGETS.values())
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+    for batch_size in warmup_batch_sizes():
+        for bucket in reversed(PROMPT_BUCKETS):
+            input_ids = torch.full((batch_size, bucket), pad_token_id, dtype=torch.long, device=model.device)
+            attention_mask = torch.ones_like(input_ids)
+            start = time.perf_counter()
+            with torch.inference_mode():
+                model.generate(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=False,
+                    pad_token_id=pad_token_id,
+                    # The budget sizes the cache; stop once a decode step has run
+                    stopping_criteria=new_tokens_stopping_criteria(bucket, 2)
+                )
+            print(f"   Warmed up batch {batch_size} x {bucket} tokens in {time.perf_counter() - start:.1f}s")
+
+
+def new_tokens_stopping_criteria(prompt_length: int, new_tokens: int):
+    """Stops generation once new_tokens tokens follow a prompt of prompt_length"""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class NewTokensCriteria(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            done = input_ids.shape[1] >= prompt_length + new_tokens
+            return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([NewTokensCriteria()])
+
+
+def deadline_stopping_criteria(deadline: float):
+    """Stops generation once time.monotonic() passes deadline"""
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class DeadlineCriteria(StoppingCriteria):
+        # Set once generation has been cut off
+        fired = False
+
+        def __call__(self, input_ids, scores, **kwargs):
+            expired = time.monotonic() >= deadline
+            self.fired = self.fired or expired
+            return torch.full((input_ids.shape[0],), expired, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([DeadlineCriteria()])
+
+
+def generate(model, tokenizer, inputs, kind: str, clause_tokens, deadline: float = None, **generate_kwargs):
+    """
+    model.generate with the configured decoding mode, recording output length
+    and decode speed for the prompt kind. inputs may hold a batch, in which
+    case clause_tokens is a list with one count per row. Generation is cut off
+    at deadline (a time.monotonic() value) if given. generate_kwargs must
+    include max_new_tokens.
+
+    Returns (outputs, cut): cut has one flag per row, True where the deadline
+    stopped that row before it finished.
+    """
+    global _warned_batched_assist
+    batch_size = inputs["input_ids"].shape[0]
+    if isinstance(clause_tokens, int):
+        clause_tokens = [clause_tokens]
+
+    if FORCE_GREEDY:
+        for key in ("temperature", "top_p", "top_k"):
+            generate_kwargs.pop(key, None)
+        generate_kwargs["do_sample"] = False
+    # Assisted decoding only supports a single sequence and a dynamic cache
+    if batch_size == 1 and not is_compiled(model):
+        for key, value in decoding_kwargs(model, tokenizer).items():
+            if value is None:
+                generate_kwargs.pop(key, None)
+            else:
+                generate_kwargs[key] = value
+    elif DECODING_MODE and batch_size > 1:
+        if not _warned_batched_assist:
+            _warned_batched_assist = True
+            print(f"   ℹ️  CLAUSEWISE_DECODING={DECODING_MODE} only applies to single-clause batches; "
+                  f"batches of {batch_size} decode plainly")
+    stopping = None
+    if deadline is not None:
+        stopping = deadline_stopping_criteria(deadline)
+        generate_kwargs["stopping_criteria"] = stopping
+
+    pad_token_id = generate_kwargs.get("pad_token_id", tokenizer.pad_token_id)
+    prompt_length = inputs["input_ids"].shape[1]
+    inputs, bucket_padding = pad_to_bucket(model, inputs, pad_token_id)
+    inputs, padding_rows = pad_batch(model, inputs)
+
+    start = time.perf_counter()
+    outputs = model.generate(**inputs, **generate_kwargs)
+    elapsed = time.perf_counter() - start
+    if padding_rows:
+        outputs = outputs[:batch_size]
+    # Callers slice outputs by their own prompt length
+    if bucket_padding:
+        outputs = outputs[:, bucket_padding:]
+
+    cut = [False] * batch_size
+    if stopping is not None and stopping[0].fired:
+        # Rows that had finished end in EOS/padding; the rest were cut off mid-output
+        finished = {pad_token_id, tokenizer.eos_token_id}
+        cut = [token not in finished for token in outputs[:, -1].tolist()]
+
+    if batch_size == 1:
+        new_tokens = [outputs.shape[1] - prompt_length]
+    else:
+        # Finished rows are padded up to the longest one
+        new_tokens = (outputs[:, prompt_length:] != pad_token_id).sum(dim=1).tolist()
+    for n_clause, n_new, was_cut in zip(clause_tokens, new_tokens, cut):
+        # A cut-off output says nothing about how long the full one would be
+        if not was_cut:
+            record_generation(kind, n_clause, n_new, generate_kwargs["max_new_tokens"], elapsed / batch_size)
+    return outputs, cut
+
+
+def record_generation(kind: str, clause_tokens: int, new_tokens: int, max_new_tokens: int,
+                      seconds: float = 0.0) -> bool:
+    """
+    Record the length of one generation. Returns True if it hit the cap.
+    """
+    hit_cap = new_tokens >= max_new_tokens
+    _calls[kind] += 1
+    _total_tokens[kind] += new_tokens
+    _total_seconds[kind] += seconds
+    if hit_cap:
+        _cap_hits[kind] += 1
+        print(f"   ⚠️  Generation hit its {max_new_tokens}-token cap ({kind}, {clause_tokens} clause tokens)")
+    _samples[kind].append((clause_tokens, new_tokens))
+    return hit_cap
+
+
+def get_samples(kind: str) -> list:
+    """(clause_tokens, new_tokens) pairs for the recent generations of a kind"""
+    return list(_samples[kind])
+
+
+def _percentile(sorted_values: list, pct: float) -> int:
+    if not sorted_values:
+        return 0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def get_generation_stats() -> Dict[str, dict]:
+    """
+    Output length distribution and cap hit rate for each prompt kind.
+    """
+    stats = {}
+    for kind in GENERATION_BUDGETS:
+        lengths = sorted(n for _, n in _samples[kind])
+        calls = _calls[kind]
+        stats[kind] = {
+            "calls": calls,
+            "cap_hits": _cap_hits[kind],
+            "cap_hit_rate": round(_cap_hits[kind] / calls, 4) if calls else 0.0,
+            "p50_tokens": _percentile(lengths, 50),
+            "p90_tokens": _percentile(lengths, 90),
+            "p99_tokens": _percentile(lengths, 99),
+            "max_tokens": lengths[-1] if lengths else 0,
+            "tokens_per_sec": round(_total_tokens[kind] / _total_seconds[kind], 2) if _total_seconds[kind] else 0.0,
+        }
+    return stats
+
+
+def reset_generation_stats():
+    for kind in GENERATION_BUDGETS:
+        _samples[kind].clear()
+        _calls[kind] = 0
+        _cap_hits[kind] = 0
+        _total_tokens[kind] = 0
+        _total_seconds[kind] = 0.0
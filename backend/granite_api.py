@@ -1,7 +1,12 @@
 import torch
-import json
-import re
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import LogitsProcessor, LogitsProcessorList
+
+from model_loader import MODEL_NAME, get_model
+from json_validator import extract_json_object
+from normalization import normalize_text, normalize_analysis
+from generation import PROMPT_BUCKETS, count_tokens, max_new_tokens_for, generate, pad_to_bucket
+from inference_replay import replay_outputs, record_outputs
+from risk import deadline_fallback
 
 # Import for fallback risk assessment
 try:
@@ -10,89 +15,66 @@ except ImportError:
     def assess_risk_by_keywords(text):
         return "MEDIUM"
 
-MODEL_NAME = "ibm-granite/granite-3.1-1b-a400m-instruct"
+# Shared with every other analysis strategy (see model_loader.get_model)
+tokenizer, model = get_model()
 
-# Force CPU mode due to RTX 5050 sm_120 incompatibility with current PyTorch
-# TODO: Switch to GPU when PyTorch adds sm_120 support
-FORCE_CPU = True
+RISK_LABELS = ["HIGH", "MEDIUM", "LOW"]
+# Token ids a risk label can start with inside the generated JSON
+LABEL_TOKEN_IDS = [
+    sorted({tokenizer.encode(variant, add_special_tokens=False)[0] for variant in (label, " " + label)})
+    for label in RISK_LABELS
+]
 
-# Load model and tokenizer once at startup
-print("🔄 Loading Granite model...")
-print(f"   CUDA available: {torch.cuda.is_available()}")
-if torch.cuda.is_available() and not FORCE_CPU:
-    print(f"   GPU: {torch.cuda.get_device_name(0)}")
+class LabelLogitsRecorder(LogitsProcessor):
+    """
+    Records, at every decode step, the best raw logit among each risk label's
+    first tokens so the model's certainty about the "risk" value can be
+    read back after generation. Leaves the scores untouched.
+    """
+    def __init__(self):
+        self.steps = []
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    def __call__(self, input_ids, scores):
+        self.steps.append(torch.stack(
+            [scores[:, ids].max(dim=1).values for ids in LABEL_TOKEN_IDS], dim=1
+        ).float().cpu())
+        return scores
 
-# Simple approach: Load in float16 on GPU if available, else CPU
-try:
-    if torch.cuda.is_available() and not FORCE_CPU:
-        print("   Attempting to load on GPU...")
-        model = AutoModelForCausalLM.from_pretrained(
-            MODEL_NAME,
-            dtype=torch.float16,
-            device_map="auto",
-            low_cpu_mem_usage=True
-        )
-        print(f"✅ Model loaded on GPU in float16")
-    else:
-        print("   Loading on CPU (FORCE_CPU=True or no GPU)...")
-        model = AutoModelForCausalLM.from_pretrained(
-            MODEL_NAME,
-            dtype=torch.float32,
-            device_map="cpu",
-            low_cpu_mem_usage=True
-        )
-        print(f"✅ Model loaded on CPU in float32")
-except Exception as e:
-    print(f"⚠️  Error loading model: {str(e)[:200]}")
-    print(f"   Trying CPU fallback...")
-    model = AutoModelForCausalLM.from_pretrained(
-        MODEL_NAME,
-        dtype=torch.float32,
-        device_map="cpu",
-        low_cpu_mem_usage=True
-    )
-    print(f"✅ Model loaded on CPU (fallback)")
+def risk_label_confidence(generated, label_logits):
+    """
+    Probability the model gave the emitted "risk" label, relative to the other
+    two labels, at the step it was generated. None if it cannot be located.
+    """
+    token_ids = generated.tolist()
+    # Decode each token once and find the "risk" key in the joined pieces,
+    # rather than decoding every growing prefix (quadratic in output length)
+    pieces = tokenizer.batch_decode([[token_id] for token_id in token_ids], skip_special_tokens=True)
+    key_end = "".join(pieces).find('"risk"')
+    if key_end < 0:
+        return None
+    key_end += len('"risk"')
 
-def strip_html_tags(text: str) -> str:
-    """Aggressively remove HTML tags and entities from text"""
-    if not isinstance(text, str):
-        return str(text)
-    
-    # Remove HTML tags (including self-closing and with attributes)
-    clean = re.sub(r'<[^>]+>', '', text)
-    
-    # Remove common HTML entities
-    html_entities = {
-        '&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"',
-        '&#39;': "'", '&nbsp;': ' ', '&apos;': "'", '&cent;': '¢',
-        '&pound;': '£', '&yen;': '¥', '&euro;': '€', '&copy;': '©',
-        '&reg;': '®', '&trade;': '™', '&times;': '×', '&divide;': '÷',
-        '&mdash;': '—', '&ndash;': '–', '&hellip;': '...',
-        '&laquo;': '«', '&raquo;': '»', '&bull;': '•'
-    }
-    for entity, char in html_entities.items():
-        clean = clean.replace(entity, char)
-    
-    # Remove any remaining HTML entities (numeric)
-    clean = re.sub(r'&#?\w+;', '', clean)
-    
-    # Remove excessive whitespace
-    clean = re.sub(r'\s+', ' ', clean)
-    
-    return clean.strip()
+    decoded = 0
+    for step, token_id in enumerate(token_ids):
+        if decoded >= key_end:
+            for label_idx, ids in enumerate(LABEL_TOKEN_IDS):
+                if token_id in ids:
+                    probs = torch.softmax(label_logits[step], dim=0)
+                    return RISK_LABELS[label_idx], float(probs[label_idx])
+        decoded += len(pieces[step])
+    return None
 
-def call_granite(clause: str):
-    print(f"   📝 Analyzing clause: {clause[:50]}...")
-    
+def escape_clause(clause: str) -> str:
     # Escape quotes in clause to prevent JSON issues
-    clause_escaped = clause.replace('"', '\\"').replace('\n', ' ')
+    return clause.replace('"', '\\"').replace('\n', ' ')
+
+def build_prompt(clause: str) -> str:
+    clause_escaped = escape_clause(clause)
     
     # Count words to emphasize thoroughness
     word_count = len(clause.split())
     
-    prompt = f"""TASK: Analyze legal clause and output JSON only.
+    return f"""TASK: Analyze legal clause and output JSON only.
 
 CLAUSE ({word_count} words):
 {clause_escaped}
@@ -125,14 +107,78 @@ Rules:
 
 JSON output:"""
 
+def clause_token_range(bucket: int) -> tuple:
+    """
+    (min_tokens, max_tokens) for clauses whose build_prompt lands in the
+    prompt bucket `bucket` rather than the one below it. The clause appears
+    twice in the prompt (CLAUSE and "original"), next to a fixed template.
+    """
+    template = len(tokenizer(build_prompt(""))["input_ids"])
+    below = max([b for b in PROMPT_BUCKETS if b < bucket], default=template)
+    max_tokens = (bucket - template) // 2
+    min_tokens = max(0, (below - template) // 2) + 1
+    if max_tokens < 16:
+        raise ValueError(f"Prompt bucket {bucket} leaves {max_tokens} tokens for the clause "
+                         f"(template is {template} tokens)")
+    # Keep a usable range when the bucket below is close
+    return min(min_tokens, max_tokens // 2), max_tokens
+
+def call_granite(clause: str):
+    return call_granite_batch([clause])[0]
+
+def call_granite_batch(clauses: list, deadline: float = None) -> list:
+    """
+    Analyze several clauses with a single batched generate call.
+    Returns one (success, result) tuple per clause, in order.
+    Generation stops early once time.monotonic() passes deadline; clauses
+    cut off that way get deadline_fallback results.
+    Model outputs are recorded or replayed as set up in inference_replay.py.
+    """
+    for clause in clauses:
+        print(f"   📝 Analyzing clause: {clause[:50]}...")
+
+    prompts = [build_prompt(c) for c in clauses]
+    replayed = replay_outputs(prompts)
+    if replayed is None:
+        texts, labels, cut = generate_analyses(clauses, prompts, deadline)
+        record_outputs("single_pass", prompts, texts,
+                       [{"risk_label": label, "deadline_cut": was_cut} for label, was_cut in zip(labels, cut)])
+    else:
+        texts = [entry["output"] for entry in replayed]
+        labels = [entry.get("risk_label") for entry in replayed]
+        cut = [entry.get("deadline_cut", False) for entry in replayed]
+
+    results = []
+    for clause, text, found, was_cut in zip(clauses, texts, labels, cut):
+        if was_cut:
+            # Truncated JSON would only parse into a repair or a fallback
+            results.append((True, deadline_fallback(clause)))
+            continue
+        print(f"   🔍 Raw output: {text[:200]}...")
+        ok, parsed = parse_output(clause, text)
+        if found and not parsed.get("fallback") and found[0] == parsed["risk"]:
+            parsed["risk_confidence"] = round(found[1], 4)
+        results.append((ok, parsed))
+    return results
+
+def generate_analyses(clauses: list, prompts: list, deadline: float = None) -> tuple:
+    """
+    The model side of call_granite_batch: the decoded output for each
+    prompt, the (risk label, confidence) read from the logits or None, and
+    whether the deadline cut the output off.
+    """
     # Tokenize input
-    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
-    print(f"   ⚙️  Analyzing {word_count} words with optimized deterministic prompt...")
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+    clause_tokens = [count_tokens(tokenizer, escape_clause(c)) for c in clauses]
+    max_new_tokens = max(max_new_tokens_for("single_pass", n) for n in clause_tokens)
+    print(f"   ⚙️  Analyzing {len(clauses)} clause(s), up to {max(clause_tokens)} tokens (budget {max_new_tokens})...")
 
     # Generate response with optimized parameters for thorough analysis
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=400,  # Increased for detailed step-by-step analysis
+    recorder = LabelLogitsRecorder()
+    outputs, cut = generate(
+        model, tokenizer, inputs, "single_pass", clause_tokens, deadline=deadline,
+        logits_processor=LogitsProcessorList([recorder]),
+        max_new_tokens=max_new_tokens,  # Scaled to clause length
         do_sample=True,      # Enable sampling for natural language
         temperature=0.2,     # Lower temperature for more focused analysis
         top_p=0.85,          # Slightly lower for more deterministic output
@@ -143,9 +189,25 @@ JSON output:"""
     )
     print(f"   ✅ Analysis complete")
 
-    # Decode model output
-    text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    print(f"   🔍 Raw output: {text[:200]}...")
+    prompt_length = inputs["input_ids"].shape[1]
+    # Assisted decoding scores several positions per step, so steps only
+    # line up with generated tokens for plain decoding
+    label_logits = None
+    if recorder.steps and len(recorder.steps) == outputs.shape[1] - prompt_length:
+        label_logits = torch.stack(recorder.steps, dim=1)
+
+    texts, labels = [], []
+    for row, output in enumerate(outputs):
+        # Decode model output
+        texts.append(tokenizer.decode(output, skip_special_tokens=True))
+        found = None
+        if label_logits is not None:
+            found = risk_label_confidence(output[prompt_length:], label_logits[row])
+        labels.append(found)
+    return texts, labels, cut
+
+def parse_output(clause: str, text: str):
+    """Extract and clean the JSON analysis from decoded model output"""
 
     # Try to extract JSON - look for the response after the prompt
     # First try to find JSON after common markers
@@ -156,62 +218,40 @@ JSON output:"""
     # Remove markdown code blocks if present
     text = text.strip().strip('`').strip()
     
-    # Extract JSON block
-    match = re.search(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", text, flags=re.DOTALL)
-    if match:
-        json_text = match.group()
-        
-        # Aggressively strip HTML from the JSON string itself before parsing
-        json_text = strip_html_tags(json_text)
-        
-        try:
-            parsed = json.loads(json_text)
-            # Add original clause
-            parsed["original"] = clause
-            # Validate required fields
-            if "simplified" in parsed and "risk" in parsed and "reason" in parsed:
-                # AGGRESSIVE CLEANUP PIPELINE
-                # Step 1: Strip HTML tags
-                parsed["simplified"] = strip_html_tags(str(parsed["simplified"]))
-                parsed["reason"] = strip_html_tags(str(parsed["reason"]))
-                
-                # Step 2: Remove markdown formatting
-                parsed["simplified"] = re.sub(r'\*\*(.+?)\*\*', r'\1', parsed["simplified"])  # **bold**
-                parsed["simplified"] = re.sub(r'\*(.+?)\*', r'\1', parsed["simplified"])      # *italic*
-                parsed["simplified"] = re.sub(r'`(.+?)`', r'\1', parsed["simplified"])        # `code`
-                parsed["reason"] = re.sub(r'\*\*(.+?)\*\*', r'\1', parsed["reason"])
-                parsed["reason"] = re.sub(r'\*(.+?)\*', r'\1', parsed["reason"])
-                parsed["reason"] = re.sub(r'`(.+?)`', r'\1', parsed["reason"])
-                
-                # Step 3: Remove extra whitespace and newlines
-                parsed["simplified"] = " ".join(parsed["simplified"].split())
-                parsed["reason"] = " ".join(parsed["reason"].split())
-                
-                # Step 4: Ensure non-empty
-                if not parsed["simplified"].strip():
-                    parsed["simplified"] = f"This clause addresses: {clause[:100]}..."
-                if not parsed["reason"].strip():
-                    parsed["reason"] = "Analysis based on clause content"
-                
-                # Step 5: Normalize risk value
-                risk = str(parsed["risk"]).upper().strip()
-                if risk not in ["HIGH", "MEDIUM", "LOW"]:
-                    # Try to extract from text
-                    if "HIGH" in risk:
-                        risk = "HIGH"
-                    elif "MEDIUM" in risk:
-                        risk = "MEDIUM"
-                    elif "LOW" in risk:
-                        risk = "LOW"
-                    else:
-                        risk = assess_risk_by_keywords(clause)
-                
-                parsed["risk"] = risk
-                print(f"   ✅ Parsed successfully: {risk} risk")
-                return True, parsed
-        except json.JSONDecodeError as e:
-            print(f"   ⚠️  JSON parse error: {e}")
-            print(f"   🔍 Attempted to parse: {json_text[:200]}...")
+    # Extract the first JSON object (string-aware, repaired in the same pass)
+    parsed = extract_json_object(text)
+    if parsed is not None:
+        # Add original clause
+        parsed["original"] = clause
+        # Validate required fields
+        if "simplified" in parsed and "risk" in parsed and "reason" in parsed:
+            # HTML, markdown and whitespace cleanup (see normalization.py)
+            normalize_analysis(parsed)
+            
+            # Ensure non-empty
+            if not parsed["simplified"].strip():
+                parsed["simplified"] = f"This clause addresses: {clause[:100]}..."
+            if not parsed["reason"].strip():
+                parsed["reason"] = "Analysis based on clause content"
+            
+            # Normalize risk value
+            risk = str(parsed["risk"]).upper().strip()
+            if risk not in ["HIGH", "MEDIUM", "LOW"]:
+                # Try to extract from text
+                if "HIGH" in risk:
+                    risk = "HIGH"
+                elif "MEDIUM" in risk:
+                    risk = "MEDIUM"
+                elif "LOW" in risk:
+                    risk = "LOW"
+                else:
+                    risk = assess_risk_by_keywords(clause)
+            
+            parsed["risk"] = risk
+            print(f"   ✅ Parsed successfully: {risk} risk")
+            return True, parsed
+    else:
+        print(f"   ⚠️  No JSON object in model output: {text[:200]}...")
 
     # Fallback - create a basic response with keyword-based risk
     print(f"   ⚠️  Using fallback response with keyword analysis")
@@ -224,5 +264,115 @@ JSON output:"""
         "original": clause,
         "simplified": f"This clause discusses: {simplified}",
         "risk": fallback_risk,
-        "reason": f"Keyword-based analysis indicates {fallback_risk} risk. AI model response was unclear."
+        "reason": f"Keyword-based analysis indicates {fallback_risk} risk. AI model response was unclear.",
+        "fallback": True
     }
+
+def build_classify_prompt(clause: str) -> str:
+    return f"""Classify the risk of this legal clause as HIGH, MEDIUM or LOW.
+HIGH: unlimited liability, indemnification, non-compete, unilateral termination, waiver of rights, irrevocable or perpetual terms, sole discretion, uncapped penalties
+MEDIUM: confidentiality, breach, termination conditions, IP assignment, arbitration, dispute resolution, limited obligations
+LOW: definitions, notices, effective dates, mutual standard terms, administrative procedures
+
+CLAUSE:
+{escape_clause(clause)}
+
+Risk level:"""
+
+# First token of each label as it follows "Risk level:" (first tokens differ,
+# so scoring them is enough to rank the labels)
+CLASSIFY_TOKEN_IDS = [tokenizer.encode(" " + label, add_special_tokens=False)[0] for label in RISK_LABELS]
+
+def classify_clauses_batch(clauses: list, deadline: float = None) -> list:
+    """
+    Classify-only mode: score HIGH/MEDIUM/LOW by their log-likelihood after a
+    single forward pass over a short prompt, with no decoding at all.
+    Returns one (success, result) tuple per clause, in order; "simplified"
+    is left empty for separate generation.
+    """
+    prompts = [build_classify_prompt(c) for c in clauses]
+    replayed = replay_outputs(prompts)
+    if replayed is None:
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+        inputs, _ = pad_to_bucket(model, inputs, tokenizer.pad_token_id)
+        with torch.inference_mode():
+            # Left padding puts every prompt's last token at the final position
+            logits = model(**inputs, use_cache=False).logits[:, -1, :]
+        label_probs = torch.softmax(logits[:, CLASSIFY_TOKEN_IDS].float(), dim=-1).cpu().tolist()
+        # Nothing is decoded: the label probabilities are the output
+        record_outputs("classify", prompts, [""] * len(prompts), [{"label_probs": p} for p in label_probs])
+    else:
+        label_probs = [entry.get("label_probs") for entry in replayed]
+
+    results = []
+    for clause, probs in zip(clauses, label_probs):
+        if probs is None:
+            # Not in the recording
+            results.append((False, None))
+            continue
+        best = max(range(len(probs)), key=probs.__getitem__)
+        scores = ", ".join(f"{label} {p:.2f}" for label, p in zip(RISK_LABELS, probs))
+        results.append((True, {
+            "original": clause,
+            "simplified": "",
+            "risk": RISK_LABELS[best],
+            "reason": f"Label likelihood: {scores}",
+            "risk_confidence": round(probs[best], 4),
+            "classify_only": True
+        }))
+    return results
+
+def build_simplify_prompt(clause: str) -> str:
+    return f"""TASK: Explain this legal clause in plain English.
+
+CLAUSE:
+{escape_clause(clause)}
+
+Rules:
+- One to three short sentences
+- No legal jargon, no HTML, no markdown
+- Do not copy the clause word for word
+
+Plain English:"""
+
+def simplify_clauses_batch(clauses: list, deadline: float = None) -> list:
+    """
+    Generate only the plain-English "simplified" text for several clauses.
+    Returns one string per clause, in order.
+    """
+    prompts = [build_simplify_prompt(c) for c in clauses]
+    replayed = replay_outputs(prompts)
+    if replayed is None:
+        texts = generate_simplified(clauses, prompts, deadline)
+        record_outputs("simplify", prompts, texts)
+    else:
+        texts = [entry["output"] for entry in replayed]
+
+    simplified = []
+    for clause, text in zip(clauses, texts):
+        text = normalize_text(text)
+        if not text:
+            text = f"This clause addresses: {clause[:100]}..."
+        simplified.append(text)
+    return simplified
+
+def generate_simplified(clauses: list, prompts: list, deadline: float = None) -> list:
+    """The model side of simplify_clauses_batch: decoded output per prompt"""
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+    clause_tokens = [count_tokens(tokenizer, escape_clause(c)) for c in clauses]
+    max_new_tokens = max(max_new_tokens_for("simplify", n) for n in clause_tokens)
+    print(f"   ✨ Simplifying {len(clauses)} clause(s) (budget {max_new_tokens})...")
+
+    outputs, _ = generate(
+        model, tokenizer, inputs, "simplify", clause_tokens, deadline=deadline,
+        max_new_tokens=max_new_tokens,
+        do_sample=True,
+        temperature=0.2,
+        top_p=0.85,
+        repetition_penalty=1.15,
+        no_repeat_ngram_size=3,
+        pad_token_id=tokenizer.eos_token_id
+    )
+
+    prompt_length = inputs["input_ids"].shape[1]
+    return [tokenizer.decode(output[prompt_length:], skip_special_tokens=True) for output in outputs]
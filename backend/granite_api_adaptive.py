@@ -0,0 +1,85 @@
+"""
+ADAPTIVE ANALYSIS
+Runs the cheap single-pass analysis (granite_api.py) on every clause and
+escalates to the two-pass analysis (granite_api_advanced.py) only for clauses
+where the single pass looks unreliable:
+
+1. Confidence starts from the probability the model gave its "risk" label
+   versus the other two labels (recorded during generation)
+2. It is reduced when the keyword risk from risk.py disagrees
+3. Clauses below ESCALATION_THRESHOLD, or whose single pass fell back to
+   keyword scoring, are re-analyzed with two passes
+"""
+
+import os
+import time
+
+from granite_api import call_granite_batch
+
+# Import for keyword cross-check
+try:
+    from risk import assess_risk_by_keywords
+except ImportError:
+    def assess_risk_by_keywords(text):
+        return "MEDIUM"
+
+ESCALATION_THRESHOLD = float(os.getenv("CLAUSEWISE_ESCALATION_THRESHOLD", "0.75"))
+
+# Confidence multiplier by how many levels keyword and model risk differ
+RISK_LEVEL = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+DISAGREEMENT_PENALTY = {0: 1.0, 1: 0.85, 2: 0.5}
+
+_counts = {"clauses": 0, "escalated": 0, "single_pass_seconds": 0.0, "two_pass_seconds": 0.0}
+
+
+def single_pass_confidence(clause: str, ok: bool, result: dict) -> float:
+    """Confidence in a single-pass result, from 0 (escalate) to 1"""
+    if not ok or not isinstance(result, dict) or result.get("fallback"):
+        return 0.0
+    # Without a recorded label probability (e.g. assisted decoding),
+    # rely on the keyword cross-check alone
+    confidence = result.get("risk_confidence", 1.0)
+    gap = abs(RISK_LEVEL.get(result.get("risk"), 1) - RISK_LEVEL[assess_risk_by_keywords(clause)])
+    return confidence * DISAGREEMENT_PENALTY[gap]
+
+
+def call_granite_batch_adaptive(clauses: list, deadline: float = None) -> list:
+    """
+    Single-pass analysis for the whole batch, two-pass only where needed.
+    Returns one (success, result) tuple per clause, in order.
+    """
+    from granite_api_advanced import call_granite as call_granite_two_pass
+
+    start = time.perf_counter()
+    results = call_granite_batch(clauses, deadline)
+    _counts["single_pass_seconds"] += time.perf_counter() - start
+    _counts["clauses"] += len(clauses)
+
+    for i, (clause, (ok, result)) in enumerate(zip(clauses, results)):
+        confidence = single_pass_confidence(clause, ok, result)
+        if confidence >= ESCALATION_THRESHOLD:
+            continue
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+        print(f"   🔼 Escalating to two-pass analysis (confidence {confidence:.2f})")
+        _counts["escalated"] += 1
+        start = time.perf_counter()
+        two_ok, two_result = call_granite_two_pass(clause, deadline)
+        _counts["two_pass_seconds"] += time.perf_counter() - start
+        if two_ok and not two_result.get("fallback"):
+            two_result["escalated"] = True
+            two_result["single_pass_confidence"] = round(confidence, 4)
+            results[i] = (two_ok, two_result)
+    return results
+
+
+def get_escalation_stats() -> dict:
+    clauses = _counts["clauses"]
+    return {
+        "clauses": clauses,
+        "escalated": _counts["escalated"],
+        "escalation_rate": round(_counts["escalated"] / clauses, 4) if clauses else 0.0,
+        "single_pass_seconds": round(_counts["single_pass_seconds"], 2),
+        "two_pass_seconds": round(_counts["two_pass_seconds"], 2),
+    }
@@ -4,16 +4,18 @@ This is an alternative implementation that uses a two-stage approach:
 1. First pass: Extract key information and risk signals
 2. Second pass: Generate final analysis based on extracted data
 
-To use this instead of the single-pass system:
-1. Rename current granite_api.py to granite_api_single.py
-2. Rename this file to granite_api.py
-3. Restart the backend
+To use this instead of the single-pass system, send strategy=two_pass to
+/analyze or set CLAUSEWISE_STRATEGY=two_pass (see strategies.py).
 """
 
-import torch
-import json
-import re
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import time
+
+from model_loader import get_model
+from json_validator import extract_json_object
+from normalization import normalize_analysis
+from generation import count_tokens, max_new_tokens_for, generate
+from inference_replay import replay_outputs, record_outputs
+from risk import deadline_fallback
 
 # Import for fallback risk assessment
 try:
@@ -22,65 +24,10 @@ except ImportError:
     def assess_risk_by_keywords(text):
         return "MEDIUM"
 
-MODEL_NAME = "ibm-granite/granite-3.1-1b-a400m-instruct"
-FORCE_CPU = True
-
-# Load model and tokenizer once at startup
-print("🔄 Loading Granite model...")
-print(f"   CUDA available: {torch.cuda.is_available()}")
-if torch.cuda.is_available() and not FORCE_CPU:
-    print(f"   GPU: {torch.cuda.get_device_name(0)}")
-
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-
-try:
-    if torch.cuda.is_available() and not FORCE_CPU:
-        print("   Attempting to load on GPU...")
-        model = AutoModelForCausalLM.from_pretrained(
-            MODEL_NAME,
-            dtype=torch.float16,
-            device_map="auto",
-            low_cpu_mem_usage=True
-        )
-        print(f"✅ Model loaded on GPU in float16")
-    else:
-        print("   Loading on CPU (FORCE_CPU=True or no GPU)...")
-        model = AutoModelForCausalLM.from_pretrained(
-            MODEL_NAME,
-            dtype=torch.float32,
-            device_map="cpu",
-            low_cpu_mem_usage=True
-        )
-        print(f"✅ Model loaded on CPU in float32")
-except Exception as e:
-    print(f"⚠️  Error loading model: {str(e)[:200]}")
-    print(f"   Trying CPU fallback...")
-    model = AutoModelForCausalLM.from_pretrained(
-        MODEL_NAME,
-        dtype=torch.float32,
-        device_map="cpu",
-        low_cpu_mem_usage=True
-    )
-    print(f"✅ Model loaded on CPU (fallback)")
-
-def strip_html_tags(text: str) -> str:
-    """Aggressively remove HTML tags and entities from text"""
-    if not isinstance(text, str):
-        return str(text)
-    
-    clean = re.sub(r'<[^>]+>', '', text)
-    html_entities = {
-        '&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"',
-        '&#39;': "'", '&nbsp;': ' ', '&apos;': "'", '&mdash;': '—',
-        '&ndash;': '–', '&hellip;': '...', '&bull;': '•'
-    }
-    for entity, char in html_entities.items():
-        clean = clean.replace(entity, char)
-    clean = re.sub(r'&#?\w+;', '', clean)
-    clean = re.sub(r'\s+', ' ', clean)
-    return clean.strip()
+# Shared with every other analysis strategy (see model_loader.get_model)
+tokenizer, model = get_model()
 
-def extract_key_info(clause: str) -> dict:
+def extract_key_info(clause: str, deadline: float = None) -> dict:
     """
     PASS 1: Extract key information from the clause
     Forces the model to read every word by asking specific questions
@@ -109,16 +56,24 @@ Violations: [answer]
 
 Your analysis:"""
 
-    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=250,
-        do_sample=False,
-        temperature=0.1,
-        pad_token_id=tokenizer.eos_token_id
-    )
-    
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    # Recorded or replayed model output (inference_replay.py)
+    replayed = replay_outputs([prompt])
+    cut = [False]
+    if replayed is None:
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        clause_tokens = count_tokens(tokenizer, clause_escaped)
+        max_new_tokens = max_new_tokens_for("extract_info", clause_tokens)
+        outputs, cut = generate(
+            model, tokenizer, inputs, "extract_info", clause_tokens, deadline,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            temperature=0.1,
+            pad_token_id=tokenizer.eos_token_id
+        )
+        response = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        record_outputs("extract_info", [prompt], [response])
+    else:
+        response = replayed[0]["output"]
     
     # Extract the analysis part
     if "Your analysis:" in response:
@@ -128,10 +83,12 @@ Your analysis:"""
     
     return {
         "raw_analysis": analysis,
-        "clause": clause
+        "clause": clause,
+        # The deadline stopped pass 1 before the model finished answering
+        "deadline_cut": cut[0]
     }
 
-def generate_final_analysis(key_info: dict) -> tuple:
+def generate_final_analysis(key_info: dict, deadline: float = None) -> tuple:
     """
     PASS 2: Generate final JSON output based on extracted information
     """
@@ -179,18 +136,26 @@ Output ONLY valid JSON (no markdown, no HTML, no extra text):
 
 JSON:"""
 
-    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=300,
-        do_sample=True,
-        temperature=0.2,
-        top_p=0.9,
-        repetition_penalty=1.1,
-        pad_token_id=tokenizer.eos_token_id
-    )
-    
-    text = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    replayed = replay_outputs([prompt])
+    if replayed is None:
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        clause_tokens = count_tokens(tokenizer, clause_escaped)
+        max_new_tokens = max_new_tokens_for("final_analysis", clause_tokens)
+        outputs, cut = generate(
+            model, tokenizer, inputs, "final_analysis", clause_tokens, deadline,
+            max_new_tokens=max_new_tokens,
+            do_sample=True,
+            temperature=0.2,
+            top_p=0.9,
+            repetition_penalty=1.1,
+            pad_token_id=tokenizer.eos_token_id
+        )
+        if cut[0]:
+            return True, deadline_fallback(clause)
+        text = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        record_outputs("final_analysis", [prompt], [text])
+    else:
+        text = replayed[0]["output"]
     
     # Extract JSON
     for marker in ["JSON:", "JSON output:", "```json", "```"]:
@@ -198,46 +163,44 @@ JSON:"""
             text = text.split(marker)[-1]
     
     text = text.strip().strip('`').strip()
-    match = re.search(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", text, flags=re.DOTALL)
+    parsed = extract_json_object(text)
     
-    if match:
-        json_text = strip_html_tags(match.group())
-        try:
-            parsed = json.loads(json_text)
-            parsed["original"] = clause
+    if parsed is not None:
+        parsed["original"] = clause
+        
+        if "simplified" in parsed and "risk" in parsed and "reason" in parsed:
+            normalize_analysis(parsed)
             
-            if "simplified" in parsed and "risk" in parsed and "reason" in parsed:
-                parsed["simplified"] = strip_html_tags(str(parsed["simplified"]))
-                parsed["reason"] = strip_html_tags(str(parsed["reason"]))
-                parsed["simplified"] = " ".join(parsed["simplified"].split())
-                parsed["reason"] = " ".join(parsed["reason"].split())
-                
-                risk = str(parsed["risk"]).upper()
-                if risk in ["HIGH", "MEDIUM", "LOW"]:
-                    parsed["risk"] = risk
-                    return True, parsed
-        except json.JSONDecodeError as e:
-            print(f"   ⚠️  JSON parse error: {e}")
+            risk = str(parsed["risk"]).upper()
+            if risk in ["HIGH", "MEDIUM", "LOW"]:
+                parsed["risk"] = risk
+                return True, parsed
+    else:
+        print(f"   ⚠️  No JSON object in model output")
     
     # Fallback
     return False, None
 
-def call_granite(clause: str):
+def call_granite(clause: str, deadline: float = None):
     """
     TWO-PASS ANALYSIS:
     Pass 1: Extract key information (forces word-by-word reading)
     Pass 2: Generate final JSON output
+    Either pass cut off at deadline gives a deadline fallback.
     """
     print(f"   📝 Analyzing clause: {clause[:50]}...")
     print(f"   🔍 PASS 1: Extracting key information...")
     
     # Pass 1: Extract information
-    key_info = extract_key_info(clause)
+    key_info = extract_key_info(clause, deadline)
+    if key_info["deadline_cut"] or (deadline is not None and time.monotonic() >= deadline):
+        print(f"   ⏱️  Deadline reached after pass 1")
+        return True, deadline_fallback(clause)
     print(f"   ✅ Key info extracted")
     print(f"   🔍 PASS 2: Generating final analysis...")
     
     # Pass 2: Generate final output
-    success, result = generate_final_analysis(key_info)
+    success, result = generate_final_analysis(key_info, deadline)
     
     if success:
         print(f"   ✅ Two-pass analysis complete")
@@ -252,5 +215,6 @@ def call_granite(clause: str):
         "original": clause,
         "simplified": f"This clause discusses: {simplified}",
         "risk": fallback_risk,
-        "reason": f"Keyword-based analysis indicates {fallback_risk} risk. Two-pass analysis was inconclusive."
+        "reason": f"Keyword-based analysis indicates {fallback_risk} risk. Two-pass analysis was inconclusive.",
+        "fallback": True
     }
@@ -0,0 +1,408 @@
+"""
+Hardware probe and tuned inference configuration
+
+probe_hardware() reads what this host offers: CPU model and ISA features
+(AVX2, AVX-512, AVX-512 BF16, AMX), physical cores per NUMA node, available
+memory, and CUDA GPUs together with whether the installed PyTorch has
+kernels for them (a GPU newer than the build, such as sm_120 on an older
+wheel, counts as unusable rather than failing at load).
+
+`tune` loads the model once per candidate dtype and times a fixed amount
+of batched decoding for each thread count and batch size, then saves the
+fastest combination with the hardware it was measured on to
+CLAUSEWISE_HARDWARE_PROFILE. model_loader.get_model() applies that profile
+(device, dtype, torch threads) and main.py takes its batch size, as long
+as the probe still matches; otherwise the probe's defaults are used, or
+the host is tuned on the spot with CLAUSEWISE_AUTOTUNE=1.
+CLAUSEWISE_DEVICE, CLAUSEWISE_DTYPE, CLAUSEWISE_THREADS and
+CLAUSEWISE_BATCH_SIZE override the profile.
+
+Usage:
+    python hardware_profile.py probe
+    python hardware_profile.py tune [--model NAME] [--batch-sizes 1,4,8,16]
+"""
+
+import glob
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+PROFILE_PATH = os.getenv("CLAUSEWISE_HARDWARE_PROFILE", "hardware_profile.json")
+AUTOTUNE = os.getenv("CLAUSEWISE_AUTOTUNE", "0") == "1"
+TUNE_BATCH_SIZES = tuple(int(b) for b in os.getenv("CLAUSEWISE_TUNE_BATCH_SIZES", "1,4,8,16").split(","))
+# Tokens decoded per trial (EOS ignored, so every config does the same work)
+TUNE_NEW_TOKENS = int(os.getenv("CLAUSEWISE_TUNE_NEW_TOKENS", "48"))
+
+ISA_FLAGS = ("avx2", "avx512f", "avx512_vnni", "avx512_bf16", "avx512_fp16", "amx_tile", "amx_bf16", "amx_fp16")
+BYTES_PER_PARAM = {"float32": 4, "bfloat16": 2, "float16": 2}
+
+# A representative clause; tuning prompts repeat it to a typical prompt length
+TUNE_CLAUSE = ("The Supplier shall indemnify, defend and hold harmless the Customer and its affiliates "
+               "from and against any and all claims, losses, damages, liabilities, costs and expenses "
+               "arising out of or relating to any breach of this Agreement by the Supplier. ")
+
+_active = None
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _parse_cpulist(text: str) -> list:
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.extend(range(int(first), int(last) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def probe_cpu() -> dict:
+    model = platform.processor() or platform.machine()
+    flags = set()
+    for line in _read("/proc/cpuinfo").splitlines():
+        key, _, value = line.partition(":")
+        key = key.strip()
+        if key == "model name":
+            model = value.strip()
+        elif key == "flags" and not flags:
+            flags = set(value.split())
+
+    # Physical cores are distinct (package, core) pairs; SMT siblings share one
+    core_of = {}
+    for cpu_dir in glob.glob("/sys/devices/system/cpu/cpu[0-9]*"):
+        core_id = _read(os.path.join(cpu_dir, "topology", "core_id"))
+        package_id = _read(os.path.join(cpu_dir, "topology", "physical_package_id"))
+        if core_id:
+            core_of[int(cpu_dir.rsplit("cpu", 1)[1])] = (package_id, core_id)
+
+    logical = os.cpu_count() or 1
+    numa_nodes = []
+    for node_dir in sorted(glob.glob("/sys/devices/system/node/node[0-9]*")):
+        cpus = _parse_cpulist(_read(os.path.join(node_dir, "cpulist")))
+        if cpus:
+            numa_nodes.append({
+                "node": int(node_dir.rsplit("node", 1)[1]),
+                "cpus": len(cpus),
+                "cores": len({core_of.get(cpu, cpu) for cpu in cpus}),
+            })
+    physical = len(set(core_of.values())) or logical
+
+    capability = None
+    try:
+        import torch
+        capability = torch.backends.cpu.get_cpu_capability()
+    except (ImportError, AttributeError):
+        pass
+
+    return {
+        "model": model,
+        "isa": [flag for flag in ISA_FLAGS if flag in flags],
+        "torch_capability": capability,
+        "logical_cpus": logical,
+        "physical_cores": physical,
+        "numa_nodes": numa_nodes or [{"node": 0, "cpus": logical, "cores": physical}],
+    }
+
+
+def available_memory_gb():
+    for line in _read("/proc/meminfo").splitlines():
+        if line.startswith("MemAvailable:"):
+            return round(int(line.split()[1]) / 1024 ** 2, 2)
+    try:
+        return round(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024 ** 3, 2)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def probe_gpus() -> list:
+    try:
+        import torch
+    except ImportError:
+        return []
+    if not torch.cuda.is_available():
+        return []
+
+    # Kernels built into this PyTorch: sm_XY runs on exactly XY, compute_XY (PTX) on XY and newer.
+    # Suffixed entries such as compute_90a still start with their number.
+    arch_list = torch.cuda.get_arch_list()
+    ptx = [int(m.group(1)) for m in (re.match(r"compute_(\d+)", arch) for arch in arch_list) if m]
+    gpus = []
+    for i in range(torch.cuda.device_count()):
+        props = torch.cuda.get_device_properties(i)
+        capability = props.major * 10 + props.minor
+        supported = f"sm_{capability}" in arch_list or any(version <= capability for version in ptx)
+        gpus.append({
+            "name": props.name,
+            "capability": f"{props.major}.{props.minor}",
+            "memory_gb": round(props.total_memory / 1024 ** 3, 2),
+            "supported": supported,
+        })
+    return gpus
+
+
+def probe_hardware() -> dict:
+    try:
+        import torch
+        torch_version = torch.__version__
+    except ImportError:
+        torch_version = None
+    return {
+        "cpu": probe_cpu(),
+        "memory_gb": available_memory_gb(),
+        "gpus": probe_gpus(),
+        "torch": torch_version,
+    }
+
+
+def fingerprint(hardware: dict) -> dict:
+    """What a tuned profile depends on (free memory changes, so it is left out)"""
+    cpu = hardware["cpu"]
+    return {
+        "cpu": cpu["model"],
+        "isa": cpu["isa"],
+        "logical_cpus": cpu["logical_cpus"],
+        "numa_nodes": len(cpu["numa_nodes"]),
+        "gpus": [gpu["name"] for gpu in hardware["gpus"] if gpu["supported"]],
+        "torch": hardware["torch"],
+    }
+
+
+def usable_gpu(hardware: dict):
+    return next((gpu for gpu in hardware["gpus"] if gpu["supported"]), None)
+
+
+def candidate_configs(hardware: dict, batch_sizes=TUNE_BATCH_SIZES) -> list:
+    """(device, dtype, threads, batch_size) combinations worth timing on this host"""
+    gpu = usable_gpu(hardware)
+    if gpu is not None:
+        # bfloat16 runs natively from Ampere (8.0) on
+        dtypes = ["float16", "bfloat16"] if float(gpu["capability"]) >= 8.0 else ["float16"]
+        return [("cuda", dtype, None, batch) for dtype in dtypes for batch in batch_sizes]
+
+    cpu = hardware["cpu"]
+    dtypes = ["float32"]
+    # bfloat16 only pays off with native BF16 matmuls; elsewhere it is emulated and slower
+    if "amx_bf16" in cpu["isa"] or "avx512_bf16" in cpu["isa"]:
+        dtypes.append("bfloat16")
+    physical = cpu["physical_cores"]
+    # All cores, one NUMA node's cores (no cross-node memory traffic), half, and SMT threads
+    threads = {physical, max(1, physical // 2), min(node["cores"] for node in cpu["numa_nodes"])}
+    if cpu["logical_cpus"] > physical:
+        threads.add(cpu["logical_cpus"])
+    return [("cpu", dtype, n, batch) for dtype in dtypes for n in sorted(threads) for batch in batch_sizes]
+
+
+def default_config(hardware: dict) -> dict:
+    """Untuned choice: the first usable GPU in float16, else every physical core in float32"""
+    if usable_gpu(hardware) is not None:
+        return {"device": "cuda", "dtype": "float16", "threads": None, "batch_size": None}
+    return {"device": "cpu", "dtype": "float32", "threads": hardware["cpu"]["physical_cores"], "batch_size": None}
+
+
+def load_profile(path: str = PROFILE_PATH):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_profile(profile: dict, path: str = PROFILE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    print(f"💾 Hardware profile saved to {path}")
+
+
+def _time_trial(model, tokenizer, device: str, threads, batch_size: int) -> float:
+    """Clauses per second decoding TUNE_NEW_TOKENS for a batch of batch_size"""
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    prompts = [TUNE_CLAUSE * 3] * batch_size
+    inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(device)
+    kwargs = {"max_new_tokens": TUNE_NEW_TOKENS, "min_new_tokens": TUNE_NEW_TOKENS,
+              "do_sample": False, "pad_token_id": tokenizer.pad_token_id}
+    with torch.inference_mode():
+        # One untimed run so allocation and kernel selection are not counted
+        model.generate(**inputs, max_new_tokens=2, do_sample=False, pad_token_id=tokenizer.pad_token_id)
+        if device == "cuda":
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        model.generate(**inputs, **kwargs)
+        if device == "cuda":
+            torch.cuda.synchronize()
+    return batch_size / (time.perf_counter() - start)
+
+
+def tune(model_name: str, batch_sizes=TUNE_BATCH_SIZES, path: str = PROFILE_PATH) -> dict:
+    """Time every candidate config, save the fastest as the profile and return it"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+
+    hardware = probe_hardware()
+    candidates = candidate_configs(hardware, batch_sizes)
+    print(f"🔬 Tuning {model_name}: {len(candidates)} configs")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    trials = []
+    n_params = None
+    for device, dtype in dict.fromkeys((c[0], c[1]) for c in candidates):
+        # Skip dtypes whose weights would not fit, once the parameter count is known
+        free_gb = (usable_gpu(hardware)["memory_gb"] if device == "cuda" else available_memory_gb())
+        if n_params and free_gb and n_params * BYTES_PER_PARAM[dtype] * 1.2 / 1024 ** 3 > free_gb:
+            print(f"   ⏭️  {device} {dtype}: weights would not fit in {free_gb} GB")
+            continue
+        model = AutoModelForCausalLM.from_pretrained(model_name, dtype=getattr(torch, dtype),
+                                                     device_map="auto" if device == "cuda" else "cpu",
+                                                     low_cpu_mem_usage=True)
+        model.eval()
+        n_params = n_params or sum(p.numel() for p in model.parameters())
+        for _, _, threads, batch_size in [c for c in candidates if c[:2] == (device, dtype)]:
+            try:
+                rate = _time_trial(model, tokenizer, device, threads, batch_size)
+            except (RuntimeError, MemoryError) as e:
+                print(f"   ⚠️  {device} {dtype} threads={threads} batch={batch_size}: {str(e)[:100]}")
+                continue
+            trials.append({"device": device, "dtype": dtype, "threads": threads,
+                           "batch_size": batch_size, "clauses_per_second": round(rate, 3)})
+            print(f"   {device} {dtype:<9} threads={threads} batch={batch_size:<3} {rate:.2f} clauses/s")
+        del model
+        if device == "cuda":
+            torch.cuda.empty_cache()
+
+    if not trials:
+        raise RuntimeError("No candidate configuration could run on this host")
+    best = max(trials, key=lambda t: t["clauses_per_second"])
+    profile = {
+        "model_name": model_name,
+        "fingerprint": fingerprint(hardware),
+        "hardware": hardware,
+        "config": {key: best[key] for key in ("device", "dtype", "threads", "batch_size")},
+        "trials": trials,
+        "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    print(f"🏁 Fastest: {best['device']} {best['dtype']}, threads={best['threads']}, "
+          f"batch={best['batch_size']} ({best['clauses_per_second']} clauses/s)")
+    if path:
+        save_profile(profile, path)
+    return profile
+
+
+def _apply_overrides(config: dict) -> dict:
+    config = dict(config)
+    if os.getenv("CLAUSEWISE_DEVICE"):
+        config["device"] = os.getenv("CLAUSEWISE_DEVICE")
+    if os.getenv("CLAUSEWISE_DTYPE"):
+        config["dtype"] = os.getenv("CLAUSEWISE_DTYPE")
+    if os.getenv("CLAUSEWISE_THREADS"):
+        config["threads"] = int(os.getenv("CLAUSEWISE_THREADS"))
+    return config
+
+
+def active_config(model_name: str) -> dict:
+    """
+    {"device", "dtype", "threads", "batch_size", "source"} for this process:
+    the saved profile if it was tuned for this model on matching hardware,
+    else a fresh tune (CLAUSEWISE_AUTOTUNE=1) or the probe's defaults.
+    """
+    global _active
+    if _active is not None:
+        return _active
+
+    hardware = probe_hardware()
+    profile = load_profile()
+    if profile and profile.get("model_name") == model_name and profile.get("fingerprint") == fingerprint(hardware):
+        config, source = profile["config"], PROFILE_PATH
+    else:
+        if profile:
+            print(f"⚠️  {PROFILE_PATH} was tuned for other hardware or another model; ignoring it")
+        if AUTOTUNE:
+            config, source = tune(model_name)["config"], "autotune"
+        else:
+            config, source = default_config(hardware), "defaults"
+    config = _apply_overrides(config)
+    if config["device"] not in ("cpu", "cuda") or config["dtype"] not in BYTES_PER_PARAM:
+        raise ValueError(f"Unknown inference config: {config['device']} {config['dtype']} "
+                         f"(expected cpu or cuda, and one of {', '.join(BYTES_PER_PARAM)})")
+
+    if config["device"] == "cuda" and usable_gpu(hardware) is None:
+        print("⚠️  No GPU this PyTorch build can run on; using CPU")
+        cpu_default = default_config({**hardware, "gpus": []})
+        config.update(device="cpu", dtype=cpu_default["dtype"], threads=cpu_default["threads"])
+    _active = {**config, "source": source}
+
+    cpu = hardware["cpu"]
+    print(f"🖥️  {cpu['model']}: {cpu['physical_cores']} cores / {cpu['logical_cpus']} threads, "
+          f"{len(cpu['numa_nodes'])} NUMA node(s), ISA {', '.join(cpu['isa']) or 'baseline'}, "
+          f"{hardware['memory_gb']} GB free")
+    print(f"   Inference config ({source}): {_active['device']} {_active['dtype']}, "
+          f"threads={_active['threads']}, batch={_active['batch_size']}")
+    return _active
+
+
+def tuned_batch_size():
+    """Batch size from the config the model was loaded with, if it has one"""
+    return _active.get("batch_size") if _active else None
+
+
+def max_batch_size() -> int:
+    """Largest batch the scheduler forms: CLAUSEWISE_BATCH_SIZE, else the tuned size, else 8"""
+    return int(os.getenv("CLAUSEWISE_BATCH_SIZE", "0")) or tuned_batch_size() or 8
+
+
+def print_report(hardware: dict):
+    cpu = hardware["cpu"]
+    print("=" * 60)
+    print("HARDWARE PROBE")
+    print("=" * 60)
+    print(f"CPU:      {cpu['model']}")
+    print(f"Cores:    {cpu['physical_cores']} physical, {cpu['logical_cpus']} logical")
+    for node in cpu["numa_nodes"]:
+        print(f"NUMA {node['node']}:   {node['cores']} cores, {node['cpus']} CPUs")
+    print(f"ISA:      {', '.join(cpu['isa']) or 'none of ' + ', '.join(ISA_FLAGS)}")
+    print(f"PyTorch:  {hardware['torch'] or 'not installed'} (CPU kernels: {cpu['torch_capability']})")
+    print(f"Memory:   {hardware['memory_gb']} GB available")
+    if not hardware["gpus"]:
+        print("GPU:      none visible to PyTorch")
+    for gpu in hardware["gpus"]:
+        status = "✅ supported" if gpu["supported"] else "❌ no kernels for it in this PyTorch build"
+        print(f"GPU:      {gpu['name']} (sm {gpu['capability']}, {gpu['memory_gb']} GB) {status}")
+    print("-" * 60)
+    default = default_config(hardware)
+    print(f"Untuned default: {default['device']} {default['dtype']}, threads={default['threads']}")
+    print(f"Candidates for `tune`: {len(candidate_configs(hardware))}")
+    profile = load_profile()
+    if profile:
+        matches = profile.get("fingerprint") == fingerprint(hardware)
+        print(f"Saved profile {PROFILE_PATH}: {profile['config']} "
+              f"({'matches this host' if matches else 'tuned on other hardware'})")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] not in ("probe", "tune"):
+        print(__doc__)
+        sys.exit(1)
+    if args[0] == "probe":
+        print_report(probe_hardware())
+    else:
+        from model_loader import MODEL_NAME
+        model_name = args[args.index("--model") + 1] if "--model" in args else MODEL_NAME
+        batch_sizes = TUNE_BATCH_SIZES
+        if "--batch-sizes" in args:
+            batch_sizes = tuple(int(b) for b in args[args.index("--batch-sizes") + 1].split(","))
+        tune(model_name, batch_sizes)
@@ -0,0 +1,241 @@
+"""
+Dispatch of clause batches to remote inference workers (inference_worker.py)
+
+With CLAUSEWISE_REMOTE_WORKERS set, e.g.
+    "http://10.0.0.5:8101,http://10.0.0.6:8101,unix:/run/clausewise/w1.sock"
+main.py loads no model: its scheduler threads hand every batch to a
+WorkerPool, which
+    - checks each worker's /health every CLAUSEWISE_WORKER_HEALTH_INTERVAL
+      seconds and skips the ones that fail
+    - sends a batch to the healthy worker with the fewest clauses in flight
+      from this process (ties: the one reporting less work of its own)
+    - retries a batch on another worker (up to CLAUSEWISE_WORKER_RETRIES
+      times) when its worker cannot be reached or fails, marking it down
+      until its next successful health check (a batch that only timed out
+      leaves its worker up if /health still answers)
+    - waits for a batch no longer than its deadline plus
+      CLAUSEWISE_WORKER_DEADLINE_MARGIN seconds
+Analysis batches no worker could run come back as failures, so they get
+keyword-scored fallback results like any model failure.
+
+Several workers on one machine: benchmark_workers.py.
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+REMOTE_WORKERS = [w.strip() for w in os.getenv("CLAUSEWISE_REMOTE_WORKERS", "").split(",") if w.strip()]
+HEALTH_INTERVAL = float(os.getenv("CLAUSEWISE_WORKER_HEALTH_INTERVAL", "5"))
+HEALTH_TIMEOUT = float(os.getenv("CLAUSEWISE_WORKER_HEALTH_TIMEOUT", "2"))
+# A batch that takes longer than this counts as a failed worker
+REQUEST_TIMEOUT = float(os.getenv("CLAUSEWISE_WORKER_TIMEOUT", "600"))
+RETRIES = int(os.getenv("CLAUSEWISE_WORKER_RETRIES", "2"))
+# Time past a batch's deadline for the worker to send back its fallbacks
+DEADLINE_MARGIN = float(os.getenv("CLAUSEWISE_WORKER_DEADLINE_MARGIN", "5"))
+
+
+class WorkerUnavailable(Exception):
+    """A worker could not be reached or failed a request"""
+
+
+class WorkerTimeout(WorkerUnavailable):
+    """A worker did not answer a request in time"""
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RemoteWorker:
+    def __init__(self, address: str):
+        self.address = address
+        self.healthy = False
+        # Clauses this process has sent and not had back
+        self.in_flight = 0
+        # Batches in progress as last reported by the worker (all coordinators)
+        self.reported_in_flight = 0
+        self.model = None
+        self.batches = 0
+        self.failures = 0
+        self.last_error = ""
+
+    def _connection(self, timeout: float) -> http.client.HTTPConnection:
+        if self.address.startswith("unix:"):
+            return UnixHTTPConnection(self.address[len("unix:"):], timeout)
+        url = urlparse(self.address)
+        return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+
+    def request(self, method: str, path: str, body: dict = None, timeout: float = REQUEST_TIMEOUT) -> dict:
+        """JSON request; WorkerUnavailable on connection errors, timeouts and 5xx, ValueError on 4xx"""
+        connection = self._connection(timeout)
+        try:
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            connection.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = response.read()
+        except socket.timeout as e:
+            raise WorkerTimeout(f"{self.address}: no answer in {timeout:.1f}s") from e
+        except (OSError, http.client.HTTPException) as e:
+            raise WorkerUnavailable(f"{self.address}: {type(e).__name__}: {e}") from e
+        finally:
+            connection.close()
+        if response.status >= 500:
+            raise WorkerUnavailable(f"{self.address}: HTTP {response.status}: {data[:200]!r}")
+        if response.status >= 400:
+            raise ValueError(f"{self.address}: HTTP {response.status}: {data[:200]!r}")
+        return json.loads(data)
+
+    def check_health(self) -> bool:
+        try:
+            health = self.request("GET", "/health", timeout=HEALTH_TIMEOUT)
+        except (WorkerUnavailable, ValueError) as e:
+            if self.healthy:
+                print(f"   ⚠️  Inference worker down: {e}")
+            self.healthy = False
+            self.last_error = str(e)
+            return False
+        if not self.healthy:
+            print(f"   🟢 Inference worker up: {self.address} ({health.get('model')})")
+        self.healthy = True
+        self.model = health.get("model")
+        self.reported_in_flight = health.get("in_flight", 0)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "address": self.address,
+            "healthy": self.healthy,
+            "model": self.model,
+            "in_flight_clauses": self.in_flight,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class WorkerPool:
+    def __init__(self, addresses: list, health_interval: float = HEALTH_INTERVAL, retries: int = RETRIES):
+        if not addresses:
+            raise ValueError("WorkerPool needs at least one worker address")
+        self.workers = [RemoteWorker(address) for address in addresses]
+        self.retries = retries
+        self._lock = threading.Lock()
+        self.retried_batches = 0
+        self.failed_batches = 0
+        self.check_health()
+        print(f"🛰️  {sum(w.healthy for w in self.workers)}/{len(self.workers)} inference workers healthy")
+        self._stop = threading.Event()
+        self._health_thread = threading.Thread(target=self._health_loop, args=(health_interval,),
+                                               name="worker-health", daemon=True)
+        self._health_thread.start()
+
+    def check_health(self):
+        for worker in self.workers:
+            worker.check_health()
+
+    def _health_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def close(self):
+        self._stop.set()
+
+    def _pick(self, clauses: int, tried: set):
+        """Least-loaded worker not tried yet; healthy ones first. Reserves its in-flight slot."""
+        with self._lock:
+            candidates = [w for w in self.workers if w not in tried]
+            # Health may be stale: a worker marked down is still worth a try when nothing else is left
+            healthy = [w for w in candidates if w.healthy]
+            candidates = healthy or candidates
+            if not candidates:
+                return None
+            worker = min(candidates, key=lambda w: (w.in_flight, w.reported_in_flight))
+            worker.in_flight += clauses
+            return worker
+
+    def infer(self, task: str, clauses: list, deadline: float = None) -> list:
+        """Run one batch on a worker, retrying on others; WorkerUnavailable if none could"""
+        tried = set()
+        errors = []
+        for attempt in range(1 + self.retries):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            worker = self._pick(len(clauses), tried)
+            if worker is None:
+                break
+            tried.add(worker)
+            if attempt:
+                with self._lock:
+                    self.retried_batches += 1
+            remaining = None if deadline is None else deadline - time.monotonic()
+            body = {"task": task, "clauses": clauses, "deadline_seconds": remaining}
+            timeout = REQUEST_TIMEOUT
+            if remaining is not None:
+                timeout = min(REQUEST_TIMEOUT, max(remaining, 0) + DEADLINE_MARGIN)
+            try:
+                results = worker.request("POST", "/infer", body, timeout=timeout)["results"]
+                if len(results) != len(clauses):
+                    raise WorkerUnavailable(f"{worker.address}: {len(results)} results for {len(clauses)} clauses")
+            except WorkerUnavailable as e:
+                # A slow batch is not a dead worker: keep it up if /health answers
+                alive = isinstance(e, WorkerTimeout) and worker.check_health()
+                with self._lock:
+                    worker.in_flight -= len(clauses)
+                    if not alive:
+                        worker.healthy = False
+                    worker.failures += 1
+                    worker.last_error = str(e)
+                errors.append(str(e))
+                print(f"   ⚠️  Batch of {len(clauses)} failed on a worker: {e}")
+                continue
+            except BaseException:
+                with self._lock:
+                    worker.in_flight -= len(clauses)
+                raise
+            with self._lock:
+                worker.in_flight -= len(clauses)
+                worker.batches += 1
+            return results
+        with self._lock:
+            self.failed_batches += 1
+        raise WorkerUnavailable("; ".join(errors) or "No inference worker available")
+
+    def run_strategy(self, strategy: str, clauses: list, deadline: float = None) -> list:
+        """strategies.run_strategy on a worker: one (success, result) per clause"""
+        try:
+            return [tuple(result) for result in self.infer(strategy, clauses, deadline)]
+        except WorkerUnavailable as e:
+            print(f"   ❌ {e}")
+            return [(False, None)] * len(clauses)
+
+    def simplify(self, clauses: list, deadline: float = None) -> list:
+        """granite_api.simplify_clauses_batch on a worker"""
+        return self.infer("simplify", clauses, deadline)
+
+    def model_name(self) -> str:
+        return next((w.model for w in self.workers if w.model), "unknown")
+
+    def healthy_count(self) -> int:
+        return sum(1 for w in self.workers if w.healthy)
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy_count(),
+            "retried_batches": self.retried_batches,
+            "failed_batches": self.failed_batches,
+            "workers": [w.stats() for w in self.workers],
+        }
@@ -0,0 +1,99 @@
+"""
+Record and replay of raw model outputs
+
+CLAUSEWISE_RECORD=<file> appends every generation the analyzers run to a
+JSON lines file: the prompt, its hash and the decoded model output (plus
+what was read from the logits, such as the risk label confidence).
+
+CLAUSEWISE_REPLAY=<file> serves those outputs by prompt hash instead of
+running the model. Only the tokenizer is loaded, answers are instant and
+identical on every run, and everything after the model (prompt building,
+parsing, JSON repair, normalization, risk enhancement) runs for real, so
+it can be benchmarked and regression-tested offline. A prompt missing from
+the recording gets an empty output, which the parsers turn into their
+usual fallback; misses are counted in get_replay_stats().
+
+    CLAUSEWISE_RECORD=outputs.jsonl python benchmark_replay.py contract.pdf
+    CLAUSEWISE_REPLAY=outputs.jsonl python benchmark_replay.py contract.pdf
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+RECORD_PATH = os.getenv("CLAUSEWISE_RECORD", "")
+REPLAY_PATH = os.getenv("CLAUSEWISE_REPLAY", "")
+if RECORD_PATH and REPLAY_PATH:
+    raise ValueError("Set CLAUSEWISE_RECORD or CLAUSEWISE_REPLAY, not both")
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class OutputRecorder:
+    """Appends (prompt, raw model output) pairs to a JSON lines file"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def append(self, kind: str, prompt: str, output: str, **extra):
+        entry = {"hash": prompt_hash(prompt), "kind": kind, "prompt": prompt, "output": output, **extra}
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+
+class OutputReplay:
+    """Recorded outputs by prompt hash; the first recording of a prompt wins"""
+
+    def __init__(self, path: str):
+        self.entries = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["hash"], entry)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        print(f"📼 Replaying {len(self.entries)} recorded model outputs from {path}")
+
+    def lookup(self, prompt: str) -> dict:
+        entry = self.entries.get(prompt_hash(prompt))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            print(f"   ⚠️  No recorded output for prompt {prompt_hash(prompt)[:12]}")
+            return {"output": ""}
+        return entry
+
+
+recorder = OutputRecorder(RECORD_PATH) if RECORD_PATH else None
+replay = OutputReplay(REPLAY_PATH) if REPLAY_PATH else None
+
+
+def replay_outputs(prompts: list):
+    """Recorded entries for the prompts, or None when not replaying"""
+    if replay is None:
+        return None
+    return [replay.lookup(prompt) for prompt in prompts]
+
+
+def record_outputs(kind: str, prompts: list, outputs: list, extras: list = None):
+    """Record one generation per prompt (no-op unless recording)"""
+    if recorder is None:
+        return
+    for i, (prompt, output) in enumerate(zip(prompts, outputs)):
+        recorder.append(kind, prompt, output, **(extras[i] if extras else {}))
+
+
+def get_replay_stats() -> dict:
+    if replay is None:
+        return {"replaying": False}
+    return {"replaying": True, "recorded": len(replay.entries), "hits": replay.hits, "misses": replay.misses}
@@ -0,0 +1,107 @@
+"""
+Inference worker: only the model part of ClauseWise, serving clause batches
+over HTTP (TCP or a Unix socket) to main.py instances that have
+CLAUSEWISE_REMOTE_WORKERS pointing at it (see inference_coordinator.py)
+
+    POST /infer   {"task": strategy name or "simplify", "clauses": [...],
+                   "deadline_seconds": seconds left, or null}
+                  -> {"results": one [success, result] per clause
+                                 (simplify: one string per clause)}
+    GET  /health  model name, batches in progress and served
+
+Batches run one at a time per worker thread (CLAUSEWISE_WORKER_THREADS,
+default 1: every thread shares the one model), so scale out with more
+workers rather than more threads.
+
+Usage:
+    python inference_worker.py --port 8101
+    python inference_worker.py --uds /tmp/clausewise_worker.sock
+    python inference_worker.py --port 8101 --stub      # stub_inference.py, no model
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from strategies import STRATEGIES, run_strategy
+
+WORKER_THREADS = int(os.getenv("CLAUSEWISE_WORKER_THREADS", "1"))
+
+app = FastAPI(title="ClauseWise inference worker")
+executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="infer")
+counts = {"in_flight": 0, "batches": 0, "clauses": 0, "seconds": 0.0}
+
+
+class InferRequest(BaseModel):
+    task: str
+    clauses: List[str]
+    deadline_seconds: Optional[float] = None
+
+
+def infer_batch(task: str, clauses: list, deadline: float = None) -> list:
+    if task == "simplify":
+        from granite_api import simplify_clauses_batch
+        return simplify_clauses_batch(clauses, deadline)
+    return run_strategy(task, clauses, deadline)
+
+
+@app.post("/infer")
+async def infer(request: InferRequest):
+    if request.task != "simplify" and request.task not in STRATEGIES:
+        raise HTTPException(400, f"Unknown task: {request.task}")
+    # Deadlines travel as time left: monotonic clocks differ between machines
+    deadline = None
+    if request.deadline_seconds is not None:
+        deadline = time.monotonic() + request.deadline_seconds
+
+    counts["in_flight"] += 1
+    start = time.perf_counter()
+    try:
+        results = await asyncio.get_running_loop().run_in_executor(
+            executor, infer_batch, request.task, request.clauses, deadline
+        )
+    finally:
+        counts["in_flight"] -= 1
+    counts["batches"] += 1
+    counts["clauses"] += len(request.clauses)
+    counts["seconds"] += time.perf_counter() - start
+    return {"results": results}
+
+
+@app.get("/health")
+async def health_check():
+    from granite_api import MODEL_NAME
+    return {
+        "status": "healthy",
+        "model": MODEL_NAME,
+        "threads": WORKER_THREADS,
+        "in_flight": counts["in_flight"],
+        "batches": counts["batches"],
+        "clauses": counts["clauses"],
+        "seconds_per_clause": round(counts["seconds"] / counts["clauses"], 3) if counts["clauses"] else 0.0
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = sys.argv[1:]
+    if "--stub" in args:
+        import stub_inference
+        stub_inference.install()
+    # Load the model before accepting batches, so /health means ready
+    import granite_api
+    print(f"🧠 Inference worker for {granite_api.MODEL_NAME}")
+
+    if "--uds" in args:
+        uvicorn.run(app, uds=args[args.index("--uds") + 1], log_level="warning")
+    else:
+        port = int(args[args.index("--port") + 1]) if "--port" in args else 8101
+        host = args[args.index("--host") + 1] if "--host" in args else "127.0.0.1"
+        uvicorn.run(app, host=host, port=port, log_level="warning")
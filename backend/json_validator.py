@@ -5,42 +5,206 @@ Attempts to repair malformed JSON from AI model output
 
 import json
 import re
+from typing import Optional
+
+# Prefixes the model sometimes writes before the JSON object
+PREFIXES = ["Here is the JSON:", "JSON:", "Output:", "Result:", "```json", "```"]
+
+_WHITESPACE = " \t\r\n"
+# Characters that can end a JSON value, for spotting a missing comma
+_VALUE_END = '"}]0123456789el'
+_CLOSERS = {"{": "}", "[": "]"}
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+# Characters that need attention inside a string, per string delimiter
+_STRING_STOPS = {
+    '"': re.compile(r'["\\\x00-\x1f]'),
+    "'": re.compile(r'[\'"\\\x00-\x1f]'),
+}
+# Outside strings: a run of number/literal characters, or one structural character
+_TOKEN = re.compile(r'[^\s"\'{}\[\],:]+|\S')
+# How far ahead a quote may look for a following "key": (keeps the scan linear)
+_KEY_LOOKAHEAD = 64
+
+
+def _next_significant(text: str, i: int) -> int:
+    """Index of the first non-whitespace character at or after i"""
+    n = len(text)
+    while i < n and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _starts_key(text: str, i: int) -> bool:
+    """Whether a short quoted string followed by ':' starts at text[i]"""
+    end = text.find(text[i], i + 1, i + _KEY_LOOKAHEAD)
+    return end > 0 and _next_significant(text, end + 1) < len(text) and text[_next_significant(text, end + 1)] == ":"
+
+
+def _starts_value(text: str, i: int) -> bool:
+    return i >= len(text) or text[i] in "\"'}]{[-0123456789" or text.startswith(("true", "false", "null"), i)
+
+
+def _closes_string(text: str, i: int, is_key: bool = False) -> bool:
+    """
+    Whether the quote at text[i] ends the current string. An interior quote
+    the model forgot to escape is followed by more text, while a closing
+    quote is followed by ':', '}', ']', a comma and the next value, or
+    (comma missing) the next "key":. A key missing its colon is closed by
+    the value that follows it.
+    """
+    j = _next_significant(text, i + 1)
+    if j >= len(text) or text[j] in ":}]":
+        return True
+    if is_key and _starts_value(text, j):
+        return True
+    if text[j] == ",":
+        return _starts_value(text, _next_significant(text, j + 1))
+    if text[j] in "\"'":
+        return "\n" in text[i + 1:j] or _starts_key(text, j)
+    return False
+
+
+def repair_json_object(text: str) -> Optional[str]:
+    """
+    Find the first balanced JSON object in text and repair it in one pass.
+
+    Tracks string state, so braces inside strings do not count, and fixes
+    while copying: unescaped quotes inside strings, raw newlines in strings,
+    single-quoted strings, trailing commas and missing commas between
+    fields. A truncated object is closed off. Returns the repaired JSON text,
+    or None if text has no object.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    out = []
+    stack = []          # open containers
+    quote = None        # delimiter of the string being copied, if any
+    last = ""           # last significant character emitted outside strings
+    key_start = -1      # position in out of the object key being copied
+    awaiting_colon = False
+    i, n = start, len(text)
+    while i < n:
+        if quote:
+            # Copy the plain run of the string, stop at the next special character
+            m = _STRING_STOPS[quote].search(text, i)
+            if m is None:
+                out.append(text[i:])
+                break
+            j = m.start()
+            out.append(text[i:j])
+            ch = text[j]
+            i = j + 1
+            if ch == "\\":
+                # \' is not a JSON escape; keep the apostrophe. A lone
+                # backslash at the end of truncated output is dropped.
+                nxt = text[i:i + 1]
+                out.append("'" if nxt == "'" else ch + nxt if nxt else "")
+                i += 1
+            elif ch == quote and _closes_string(text, j, key_start >= 0):
+                out.append('"')
+                quote = None
+                last = '"'
+                awaiting_colon = key_start >= 0
+                key_start = -1
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "'":
+                # An apostrophe inside a single-quoted string
+                out.append("'")
+            else:
+                out.append(_ESCAPES.get(ch, " "))
+            continue
+
+        # Outside strings: copy whitespace, act on the next token
+        m = _TOKEN.search(text, i)
+        if m is None:
+            break
+        out.append(text[i:m.start()])
+        token = m.group()
+        i = m.end()
+        ch = token[0]
+
+        if awaiting_colon and ch != ":":
+            # Key without its colon: keep the member rather than drop it
+            out.append(": null" if ch in "}]," else ":")
+            last = "l" if ch in "}]," else ":"
+            awaiting_colon = False
+        if ch in "\"'{[" and last and last in _VALUE_END and stack:
+            # Two values in a row: the comma between them is missing
+            out.append(",")
+            last = ","
+        if ch in "\"'":
+            if stack[-1] == "{" and last in "{,":
+                key_start = len(out)
+            out.append('"')
+            quote = ch
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+            last = ch
+        elif ch in "}]":
+            if _CLOSERS[stack[-1]] != ch:
+                # Stray closer: skip it
+                continue
+            if last == ",":
+                # Trailing comma: drop it (and the whitespace after it)
+                while out.pop() != ",":
+                    pass
+            stack.pop()
+            out.append(ch)
+            last = ch
+            if not stack:
+                return "".join(out)
+        else:
+            if ch == ":":
+                awaiting_colon = False
+            out.append(token)
+            last = token[-1]
+
+    # Truncated output: finish the last member and close open containers
+    if quote and key_start >= 0:
+        del out[key_start:]
+    elif quote:
+        out.append('"')
+        last = '"'
+    if awaiting_colon:
+        out.append(": null")
+    elif last == ":":
+        out.append(" null")
+    elif last == ",":
+        while out.pop() != ",":
+            pass
+    while stack:
+        out.append(_CLOSERS[stack.pop()])
+    return "".join(out)
+
+
+def extract_json_object(text: str) -> Optional[dict]:
+    """
+    Parse the first JSON object in model output, repairing it on the way
+    (see repair_json_object). Returns None if there is no usable object.
+    """
+    repaired = repair_json_object(text)
+    if repaired is None:
+        return None
+    try:
+        data = json.loads(repaired)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
 
 def fix_json_string(text: str) -> str:
     """
     Attempt to fix common JSON issues in AI-generated text
     """
     # Remove common prefixes
-    prefixes = ["Here is the JSON:", "JSON:", "Output:", "Result:", "```json", "```"]
-    for prefix in prefixes:
+    for prefix in PREFIXES:
         if prefix in text:
             text = text.split(prefix)[-1]
-    
-    # Remove trailing text after JSON
-    text = text.strip().strip('`').strip()
-    
-    # Find JSON object
-    match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', text, flags=re.DOTALL)
-    if not match:
-        return None
-    
-    json_str = match.group()
-    
-    # Fix common issues
-    # 1. Unescaped quotes in values
-    json_str = re.sub(r'(?<!\\)"(?=\w)', r'\"', json_str)
-    
-    # 2. Single quotes instead of double quotes
-    json_str = json_str.replace("'", '"')
-    
-    # 3. Trailing commas
-    json_str = re.sub(r',\s*}', '}', json_str)
-    json_str = re.sub(r',\s*]', ']', json_str)
-    
-    # 4. Missing commas between fields
-    json_str = re.sub(r'"\s*\n\s*"', '",\n"', json_str)
-    
-    return json_str
+    return repair_json_object(text)
 
 def extract_and_validate_json(text: str, required_fields: list) -> dict:
     """
@@ -53,25 +217,21 @@ def extract_and_validate_json(text: str, required_fields: list) -> dict:
     Returns:
         dict: Parsed JSON or None if invalid
     """
-    # Try to fix and parse JSON
-    fixed_json = fix_json_string(text)
-    if not fixed_json:
+    for prefix in PREFIXES:
+        if prefix in text:
+            text = text.split(prefix)[-1]
+    data = extract_json_object(text)
+    if data is None:
         return None
     
-    try:
-        data = json.loads(fixed_json)
-        
-        # Validate required fields
-        for field in required_fields:
-            if field not in data:
-                return None
-            if not data[field] or str(data[field]).strip() == "":
-                return None
-        
-        return data
+    # Validate required fields
+    for field in required_fields:
+        if field not in data:
+            return None
+        if not data[field] or str(data[field]).strip() == "":
+            return None
     
-    except json.JSONDecodeError:
-        return None
+    return data
 
 def create_fallback_json(clause: str, risk: str = "MEDIUM") -> dict:
     """
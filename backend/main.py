@@ -1,28 +1,88 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, Request, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import List
+import asyncio
+import glob
+import multiprocessing
 import os
 import shutil
 import json
-import re
+import time
+import uuid
+
+if __name__ == "__main__":
+    # Serve as `python -m uvicorn main:app`: worker processes re-import the
+    # __main__ module, and importing this one loads the model
+    import sys
+    os.execv(sys.executable, [sys.executable, "-m", "uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000",
+                              "--app-dir", os.path.dirname(os.path.abspath(__file__))])
 
 # Fallback path adjustment to ensure local imports work when launched from different CWDs
 try:
     from text_extraction import extract_text
-    from clause_segmentation import segment_clauses
-    from granite_api import call_granite, MODEL_NAME
-    from risk import assess_risk_by_keywords, enhance_risk_assessment
+    from clause_segmentation import segment_clauses, segment_clauses_by_tokens
+    from inference_coordinator import REMOTE_WORKERS, WorkerPool, WorkerUnavailable
+    if not REMOTE_WORKERS:
+        # Inference in this process (remote workers load the model themselves)
+        from granite_api import simplify_clauses_batch, clause_token_range, tokenizer, MODEL_NAME
+        from granite_api_adaptive import get_escalation_stats
+    from risk import assess_risk_by_keywords, deadline_fallback, enhance_risk_assessment
+    from generation import get_generation_stats, largest_fitting_bucket
+    from hardware_profile import max_batch_size
+    from batch_scheduler import BatchScheduler
+    from batch_processing import SUPPORTED_EXTENSIONS, expand_upload, extract_and_segment
+    from clause_index import ClauseIndex
+    from risk_classifier import RiskClassifier, TrainingLog
+    from strategies import STRATEGIES, DEFAULT_STRATEGY, run_strategy, record_strategy_run, get_strategy_stats
+    from normalization import normalize_analysis
+    from pipeline import ResultSpill, run_pipeline
+    from response_formats import render_response
+    from inference_replay import get_replay_stats
 except ImportError:
     import sys as _sys
     import os as _os
     _sys.path.append(_os.path.dirname(_os.path.abspath(__file__)))
     from text_extraction import extract_text
-    from clause_segmentation import segment_clauses
-    from granite_api import call_granite, MODEL_NAME
-    from risk import assess_risk_by_keywords, enhance_risk_assessment
+    from clause_segmentation import segment_clauses, segment_clauses_by_tokens
+    from inference_coordinator import REMOTE_WORKERS, WorkerPool, WorkerUnavailable
+    if not REMOTE_WORKERS:
+        # Inference in this process (remote workers load the model themselves)
+        from granite_api import simplify_clauses_batch, clause_token_range, tokenizer, MODEL_NAME
+        from granite_api_adaptive import get_escalation_stats
+    from risk import assess_risk_by_keywords, deadline_fallback, enhance_risk_assessment
+    from generation import get_generation_stats, largest_fitting_bucket
+    from hardware_profile import max_batch_size
+    from batch_scheduler import BatchScheduler
+    from batch_processing import SUPPORTED_EXTENSIONS, expand_upload, extract_and_segment
+    from clause_index import ClauseIndex
+    from risk_classifier import RiskClassifier, TrainingLog
+    from strategies import STRATEGIES, DEFAULT_STRATEGY, run_strategy, record_strategy_run, get_strategy_stats
+    from normalization import normalize_analysis
+    from pipeline import ResultSpill, run_pipeline
+    from response_formats import render_response
+    from inference_replay import get_replay_stats
+
 
+@asynccontextmanager
+async def lifespan(app):
+    # Result spills only live as long as the process that wrote them
+    stale = glob.glob(os.path.join(UPLOAD_DIR, "*.results.jsonl"))
+    for path in stale:
+        os.remove(path)
+    if stale:
+        print(f"🧹 Removed {len(stale)} result spill(s) left by a previous run")
+    yield
+    for document in documents.values():
+        if "spill" in document:
+            document["spill"].close()
 
-app = FastAPI(title="ClauseWise API")
+
+app = FastAPI(title="ClauseWise API", lifespan=lifespan)
 
 # CORS for Streamlit frontend
 app.add_middleware(
@@ -36,28 +96,317 @@ app.add_middleware(
 UPLOAD_DIR = "temp_uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Documents analyzed at once; further uploads get 429 until a slot frees up
+MAX_IN_FLIGHT_DOCUMENTS = int(os.getenv("CLAUSEWISE_MAX_IN_FLIGHT", "4"))
+# /analyze/batch requests have their own slots: a batch may hold at most
+# MAX_BATCH_DOCUMENTS documents (MAX_BATCH_MB unpacked) and analyzes at most
+# BATCH_DOCUMENT_CONCURRENCY of them at a time
+MAX_IN_FLIGHT_BATCHES = int(os.getenv("CLAUSEWISE_MAX_IN_FLIGHT_BATCHES", "1"))
+MAX_BATCH_DOCUMENTS = int(os.getenv("CLAUSEWISE_MAX_BATCH_DOCUMENTS", "200"))
+MAX_BATCH_BYTES = int(float(os.getenv("CLAUSEWISE_MAX_BATCH_MB", "200")) * 1024 * 1024)
+BATCH_DOCUMENT_CONCURRENCY = int(os.getenv("CLAUSEWISE_BATCH_CONCURRENCY", str(MAX_IN_FLIGHT_DOCUMENTS)))
+# Threads running model inference (all share one model, so keep this small).
+# With remote workers they only wait on HTTP: two per worker keeps the next
+# batch ready while one runs.
+INFERENCE_WORKERS = int(os.getenv("CLAUSEWISE_INFERENCE_WORKERS", str(2 * len(REMOTE_WORKERS) or 1)))
+RETRY_AFTER_SECONDS = int(os.getenv("CLAUSEWISE_RETRY_AFTER", "30"))
+# Clauses from all in-flight documents are batched together up to this size,
+# waiting at most BATCH_MAX_WAIT_MS for a partial batch to fill
+# (default: the batch size tuned for this host, see hardware_profile.py)
+BATCH_MAX_SIZE = max_batch_size()
+BATCH_MAX_WAIT_MS = float(os.getenv("CLAUSEWISE_BATCH_WAIT_MS", "20"))
+# How clauses from different documents share batches: round_robin (fair),
+# shortest_first (small documents jump ahead) or fifo
+SCHEDULING_POLICY = os.getenv("CLAUSEWISE_SCHEDULING", "round_robin")
+# Round-robin share per tenant, e.g. "acme=3,trial=1"; unknown tenants get 1
+TENANT_WEIGHTS = {
+    name.strip(): int(weight)
+    for name, weight in (
+        pair.split("=") for pair in os.getenv("CLAUSEWISE_TENANT_WEIGHTS", "").split(",") if "=" in pair
+    )
+}
+
+# Near-duplicate reuse: clauses within SIMILARITY_THRESHOLD of a previously
+# analyzed clause reuse its analysis. Enabled by setting the index file path.
+SIMILARITY_INDEX_PATH = os.getenv("CLAUSEWISE_SIMILARITY_INDEX", "")
+SIMILARITY_THRESHOLD = float(os.getenv("CLAUSEWISE_SIMILARITY_THRESHOLD", "0.95"))
+# Regenerate only the "simplified" text for reused analyses
+RESIMPLIFY_REUSED = os.getenv("CLAUSEWISE_RESIMPLIFY_REUSED", "0") == "1"
+
+# Granite results are appended here as training data for risk_classifier.py
+TRAINING_LOG_PATH = os.getenv("CLAUSEWISE_TRAINING_LOG", "")
+# Distilled classifier trained by risk_classifier.py; in classify mode
+# (strategy=classify_only) clauses it scores with at least
+# DISTILLED_CONFIDENCE skip the LLM
+DISTILLED_MODEL_PATH = os.getenv("CLAUSEWISE_DISTILLED_MODEL", "")
+DISTILLED_CONFIDENCE = float(os.getenv("CLAUSEWISE_DISTILLED_CONFIDENCE", "0.9"))
+# Let it answer for every strategy too; those full-mode results then come
+# back with an empty "simplified" (fetch it from /documents/.../simplify)
+DISTILLED_ALL_STRATEGIES = os.getenv("CLAUSEWISE_DISTILLED_ALL_STRATEGIES", "0") == "1"
+
+# Analyzed documents kept for on-demand simplification; oldest evicted first
+MAX_STORED_DOCUMENTS = int(os.getenv("CLAUSEWISE_MAX_STORED_DOCUMENTS", "100"))
+
+# Clause segmentation: "words" (segment_clauses) or "tokens", sized with the
+# model tokenizer so single-pass prompts fill SEGMENT_BUCKET and batches pad less
+SEGMENTATION = os.getenv("CLAUSEWISE_SEGMENTATION", "words")
+if SEGMENTATION not in ("words", "tokens"):
+    raise ValueError(f"Unknown CLAUSEWISE_SEGMENTATION: {SEGMENTATION} (expected words or tokens)")
+if SEGMENTATION == "tokens" and REMOTE_WORKERS:
+    raise ValueError("CLAUSEWISE_SEGMENTATION=tokens needs the model tokenizer here; use words with remote workers")
+# Default: the largest bucket whose longest clause still gets its full
+# single_pass budget, so "original" + "simplified" + "reason" are not cut off
+SEGMENT_BUCKET = int(os.getenv("CLAUSEWISE_SEGMENT_BUCKET", "0"))
+CLAUSE_TOKEN_RANGE = None
+if SEGMENTATION == "tokens":
+    SEGMENT_BUCKET = SEGMENT_BUCKET or largest_fitting_bucket("single_pass", clause_token_range)
+    CLAUSE_TOKEN_RANGE = clause_token_range(SEGMENT_BUCKET)
+
+# Uploads at least this large go through the bounded-memory pipeline
+# (pipeline.py); smaller ones are analyzed in memory, keyword-flagged clauses first
+PIPELINE_MIN_BYTES = int(float(os.getenv("CLAUSEWISE_PIPELINE_MIN_MB", "2")) * 1024 * 1024)
+
+# Remote inference workers (CLAUSEWISE_REMOTE_WORKERS, see inference_coordinator.py)
+worker_pool = WorkerPool(REMOTE_WORKERS) if REMOTE_WORKERS else None
+clause_index = ClauseIndex(SIMILARITY_INDEX_PATH, SIMILARITY_THRESHOLD) if SIMILARITY_INDEX_PATH else None
+training_log = TrainingLog(TRAINING_LOG_PATH) if TRAINING_LOG_PATH else None
+distilled_classifier = RiskClassifier.load(DISTILLED_MODEL_PATH) if DISTILLED_MODEL_PATH else None
+distilled_counts = {"local": 0, "escalated": 0}
+
+
+def analyze_clauses(clauses: list, deadline: float = None, strategy: str = DEFAULT_STRATEGY) -> list:
+    """
+    Batch inference with one analysis strategy (see strategies.py) and
+    near-duplicate reuse; returns one (success, result) per clause like
+    call_granite_batch.
+    """
+    full_analysis = STRATEGIES[strategy]["full_analysis"]
+    results = [None] * len(clauses)
+    misses, reused = [], []
+    for i, clause in enumerate(clauses):
+        match = clause_index.lookup(clause) if clause_index is not None and full_analysis else None
+        if match is None:
+            misses.append(i)
+            continue
+        stored, similarity = match
+        results[i] = (True, {**stored, "original": clause, "reused_similarity": round(similarity, 3)})
+        reused.append(i)
+
+    if reused:
+        print(f"   ♻️  Reusing analysis for {len(reused)} near-duplicate clause(s)")
+    if reused and RESIMPLIFY_REUSED:
+        try:
+            texts = simplify_batch([clauses[i] for i in reused], deadline)
+        except WorkerUnavailable as e:
+            # The stored simplification still reads fine; keep it
+            print(f"   ⚠️  Re-simplifying reused clauses failed: {e}")
+            texts = []
+        for i, text in zip(reused, texts):
+            results[i][1]["simplified"] = text
+
+    if misses:
+        batch = [clauses[i] for i in misses]
+        if worker_pool is not None:
+            # Timed here, round trip included, since the workers run the strategy
+            start = time.perf_counter()
+            outputs = worker_pool.run_strategy(strategy, batch, deadline)
+            record_strategy_run(strategy, batch, outputs, time.perf_counter() - start)
+        else:
+            outputs = run_strategy(strategy, batch, deadline)
+        for i, (ok, out) in zip(misses, outputs):
+            results[i] = (ok, out)
+            if full_analysis and ok and isinstance(out, dict) and not out.get("fallback"):
+                if clause_index is not None:
+                    clause_index.add(clauses[i], {k: v for k, v in out.items() if k != "original"})
+                if training_log is not None:
+                    training_log.append(clauses[i], out)
+    return results
+
+
+def simplify_batch(clauses: list, deadline: float = None) -> list:
+    """Plain-English text for a batch, on a remote worker if there are any"""
+    if worker_pool is not None:
+        return worker_pool.simplify(clauses, deadline)
+    return simplify_clauses_batch(clauses, deadline)
+
+
+# /analyze modes: "classify" is shorthand for strategy=classify_only
+ANALYSIS_MODES = ("full", "classify")
+
+# Blocking work runs off the event loop so it (and /health) stays responsive.
+# One scheduler task per strategy, so a batch never mixes strategies.
+scheduler = BatchScheduler({**{name: partial(analyze_clauses, strategy=name) for name in STRATEGIES},
+                            "simplify": simplify_batch},
+                           BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+                           workers=INFERENCE_WORKERS, policy=SCHEDULING_POLICY)
+io_executor = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT_DOCUMENTS, thread_name_prefix="extract")
+in_flight_documents = 0
+in_flight_batches = 0
+# document_id -> {"clauses": [...], "simplified": {clause index: text or pending future}}
+# (+ "spill": ResultSpill for pipelined documents, whose file is removed on eviction)
+documents = OrderedDict()
+
+# Worker processes that extract and segment documents for /analyze/batch
+EXTRACT_WORKERS = int(os.getenv("CLAUSEWISE_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+_extract_pool = None
+
+# Order in which clauses are sent to the model, by keyword risk
+RISK_PRIORITY = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+
+
+def submit_clause(clause: str, document_id: str, weight: int = 1, deadline: float = None,
+                  strategy: str = DEFAULT_STRATEGY) -> asyncio.Future:
+    """
+    Queue a clause for inference. In classify mode (or for every strategy
+    with CLAUSEWISE_DISTILLED_ALL_STRATEGIES), clauses the distilled
+    classifier is confident about are answered immediately without the LLM.
+    """
+    if distilled_classifier is not None and (strategy == "classify_only" or DISTILLED_ALL_STRATEGIES):
+        risk, confidence = distilled_classifier.classify(clause)
+        if confidence >= DISTILLED_CONFIDENCE:
+            distilled_counts["local"] += 1
+            future = asyncio.get_running_loop().create_future()
+            future.set_result((True, {
+                "original": clause,
+                "simplified": "",
+                "risk": risk,
+                "reason": f"Distilled classifier ({confidence:.0%} confidence)",
+                "distilled": True
+            }))
+            return future
+        distilled_counts["escalated"] += 1
+    return asyncio.wrap_future(scheduler.submit(clause, document_id, weight, deadline, strategy))
+
+
+def store_document(document_id: str, results):
+    """Keep a document's clauses so /documents/{id}/clauses/{n}/simplify can find them"""
+    if isinstance(results, ResultSpill):
+        # Pipelined documents stay on disk; their simplified text is read on demand
+        documents[document_id] = {"clauses": results.clauses(), "simplified": {}, "spill": results}
+    else:
+        documents[document_id] = {
+            "clauses": [r["original"] for r in results],
+            "simplified": {n: r["simplified"] for n, r in enumerate(results) if r.get("simplified")}
+        }
+    while len(documents) > MAX_STORED_DOCUMENTS:
+        _, evicted = documents.popitem(last=False)
+        if "spill" in evicted:
+            evicted["spill"].close()
+
+
+def segment_document(text: str) -> list:
+    """Split extracted text into clauses with the configured SEGMENTATION"""
+    if SEGMENTATION == "tokens":
+        return segment_clauses_by_tokens(text, tokenizer, *CLAUSE_TOKEN_RANGE)
+    return segment_clauses(text)
+
+
+def save_upload(file: UploadFile, file_path: str):
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        # Not fork: this process already runs scheduler threads and torch. The
+        # workers only import batch_processing; __main__ is uvicorn, never this
+        # module (see the __main__ block at the top)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _extract_pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context(method)
+        )
+    return _extract_pool
+
+
+def build_clause_result(clause: str, ok: bool, out) -> dict:
+    """Turn a call_granite result into a clause entry with the required keys"""
+    if not ok:
+        # Fallback to keyword risk scoring
+        return {
+            "original": clause,
+            "simplified": "",
+            "risk": assess_risk_by_keywords(clause),
+            "reason": "Model unavailable - fallback keyword scoring",
+            "clean": True
+        }
+
+    # Ensure a valid object with required keys (copied: results may be shared)
+    data = dict(out) if isinstance(out, dict) else {}
+    data.setdefault("original", clause)
+    data.setdefault("simplified", "")
+    # Normalize risk
+    risk_val = str(data.get("risk", "")).upper()
+    if risk_val not in {"LOW", "MEDIUM", "HIGH"}:
+        risk_val = assess_risk_by_keywords(clause)
+    data["risk"] = risk_val
+    data.setdefault("reason", data.get("explanation") or data.get("rationale") or "")
+    # No-op for analyses the parsers already normalized
+    return normalize_analysis(data)
+
 
 @app.post("/analyze")
-async def analyze_document(file: UploadFile = File(...)):
+async def analyze_document(request: Request, file: UploadFile = File(...), tenant: str = Form(""),
+                           deadline: float = Form(0), mode: str = Form("full"), strategy: str = Form("")):
     """
     Main endpoint: accepts document, returns analyzed clauses.
+
+    deadline: optional latency budget in seconds. Keyword-flagged clauses are
+    analyzed first; clauses the model has not finished when it runs out get
+    keyword-scored fallback results marked with "fallback": true and
+    "deadline_fallback": true.
+    mode: "full" (default) or "classify" for a fast risk map without
+    simplified text; fetch it per clause from
+    /documents/{document_id}/clauses/{n}/simplify when it is needed.
+    strategy: analysis strategy from strategies.py (defaults to
+    CLAUSEWISE_STRATEGY); overrides mode. With
+    CLAUSEWISE_DISTILLED_ALL_STRATEGIES=1, full-mode clauses the distilled
+    classifier answers ("distilled": true) have no simplified text either.
+
+    The response format follows the Accept header (JSON by default, or the
+    compact formats in response_formats.py) and is compressed as
+    Accept-Encoding allows. Large uploads are always streamed as JSON.
     """
+    global in_flight_documents
+    started = time.monotonic()
+    deadline_at = started + deadline if deadline > 0 else None
 
     # Validate file type
     if not file.filename.lower().endswith(('.pdf', '.docx', '.txt')):
         raise HTTPException(400, "Only PDF, DOCX, and TXT files are supported")
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(400, f"Unknown mode: {mode} (expected one of {', '.join(ANALYSIS_MODES)})")
+    if not strategy:
+        strategy = "classify_only" if mode == "classify" else DEFAULT_STRATEGY
+    if strategy not in STRATEGIES:
+        raise HTTPException(400, f"Unknown strategy: {strategy} (expected one of {', '.join(STRATEGIES)})")
+
+    # Admission control: reject fast instead of queueing without bound
+    if in_flight_documents >= MAX_IN_FLIGHT_DOCUMENTS:
+        raise HTTPException(
+            429,
+            f"Server busy: {in_flight_documents} documents in progress",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    in_flight_documents += 1
 
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    loop = asyncio.get_running_loop()
+    document_id = uuid.uuid4().hex
+    file_path = os.path.join(UPLOAD_DIR, f"{document_id}_{os.path.basename(file.filename)}")
 
     try:
         # Save uploaded file
         print(f"\n📄 Received file: {file.filename}")
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await loop.run_in_executor(io_executor, save_upload, file, file_path)
+        weight = TENANT_WEIGHTS.get(tenant, 1)
+
+        if os.path.getsize(file_path) >= PIPELINE_MIN_BYTES:
+            return await analyze_pipelined(file_path, document_id, strategy, weight, deadline_at, started)
 
         # Step 1: Extract text
         print("📖 Step 1: Extracting text...")
-        text = extract_text(file_path)
+        text = await loop.run_in_executor(io_executor, extract_text, file_path)
         print(f"   Extracted {len(text)} characters")
 
         if not text:
@@ -65,66 +414,326 @@ async def analyze_document(file: UploadFile = File(...)):
 
         # Step 2: Segment into clauses
         print("✂️  Step 2: Segmenting clauses...")
-        clauses = segment_clauses(text)
+        clauses = await loop.run_in_executor(io_executor, segment_document, text)
         print(f"   Found {len(clauses)} clauses")
 
         if not clauses:
             raise HTTPException(400, "No meaningful clauses found in the document")
 
         # Step 3: Analyze clauses with Granite
-        print(f"🤖 Step 3: Analyzing {len(clauses)} clauses with Granite AI...")
+        print(f"🤖 Step 3: Analyzing {len(clauses)} clauses with Granite AI ({strategy})...")
         results = []
 
-        for idx, clause in enumerate(clauses, 1):
-            print(f"\n   Clause {idx}/{len(clauses)}:")
-            ok, out = call_granite(clause)
+        # Submit every clause at once so the scheduler can batch them,
+        # keyword-flagged clauses first so they make it within a deadline
+        keyword_risks = [assess_risk_by_keywords(clause) for clause in clauses]
+        priority = sorted(range(len(clauses)), key=lambda i: RISK_PRIORITY[keyword_risks[i]])
+        futures = {}
+        for i in priority:
+            futures[i] = submit_clause(clauses[i], document_id, weight, deadline_at, strategy)
 
-            if not ok:
-                # Fallback to keyword risk scoring
-                results.append({
-                    "original": clause,
-                    "simplified": "",
-                    "risk": assess_risk_by_keywords(clause),
-                    "reason": "Model unavailable - fallback keyword scoring"
-                })
+        timeout = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        done, pending = await asyncio.wait(futures.values(), timeout=timeout)
+        for future in pending:
+            future.cancel()
 
+        model_analyzed = 0
+        deadline_fallbacks = 0
+        for idx, clause in enumerate(clauses):
+            future = futures[idx]
+            # The scheduler cancels clauses still queued when their deadline passes
+            if future not in done or future.cancelled():
+                deadline_fallbacks += 1
+                results.append(deadline_fallback(clause, keyword_risks[idx]))
                 continue
 
-            # Ensure a valid object with required keys
-            data = out if isinstance(out, dict) else {}
-            data.setdefault("original", clause)
-            data.setdefault("simplified", "")
-            # Normalize risk
-            risk_val = str(data.get("risk", "")).upper()
-            if risk_val not in {"LOW", "MEDIUM", "HIGH"}:
-                risk_val = assess_risk_by_keywords(clause)
-            data["risk"] = risk_val
-            data.setdefault("reason", data.get("explanation") or data.get("rationale") or "")
-
-            results.append(data)
+            try:
+                ok, out = future.result()
+            except Exception as e:
+                # One failed batch costs its clauses the model, not the whole document
+                print(f"   ❌ Inference failed: {e}")
+                ok, out = False, None
+            if isinstance(out, dict) and out.get("deadline_fallback"):
+                # Generation was cut off by the deadline
+                deadline_fallbacks += 1
+            elif ok:
+                model_analyzed += 1
+            results.append(build_clause_result(clause, ok, out))
+        if deadline_fallbacks:
+            print(f"   ⏰ Deadline reached: {deadline_fallbacks} clauses fall back to keyword scoring")
+        queue_wait = scheduler.pop_document_waits(document_id)
+        print(f"   ⏳ Queue wait: first clause {queue_wait['first_wait_ms']} ms, mean {queue_wait['mean_wait_ms']} ms")
         print("\n🔍 Step 4: Enhancing risk assessment...")
         final_results = enhance_risk_assessment(results)
+        store_document(document_id, final_results)
         print(f"✅ Analysis complete! Returning {len(final_results)} analyzed clauses\n")
-        return JSONResponse(content={
+        payload = {
             "success": True,
+            "document_id": document_id,
+            "strategy": strategy,
             "total_clauses": len(final_results),
+            "queue_wait": queue_wait,
+            "model_analyzed_clauses": model_analyzed,
+            "deadline_reached": bool(deadline_fallbacks),
+            "elapsed_seconds": round(time.monotonic() - started, 2),
             "clauses": final_results
-        })
+        }
+        # Serializing and compressing a long document takes a while
+        return await loop.run_in_executor(io_executor, render_response, payload, request.headers)
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(500, f"Analysis failed: {str(e)}")
 
     finally:
+        in_flight_documents -= 1
+        # Already popped on success; failed or cancelled documents must not leak their waits
+        scheduler.pop_document_waits(document_id)
         # Clean temp file
         if os.path.exists(file_path):
             os.remove(file_path)
 
 
+async def analyze_pipelined(file_path: str, document_id: str, strategy: str, weight: int,
+                            deadline_at: float, started: float) -> StreamingResponse:
+    """
+    /analyze for large uploads: extraction overlaps inference and results
+    are spilled to disk, so memory stays flat however many pages there are.
+    Same response fields as the in-memory path, streamed from the spill.
+    """
+    print("🚰 Large document: pipelined extract → segment → infer → enhance → serialize")
+    spill = ResultSpill(os.path.join(UPLOAD_DIR, f"{document_id}.results.jsonl"))
+    try:
+        counts = await run_pipeline(
+            file_path, spill,
+            submit=lambda clause: submit_clause(clause, document_id, weight, deadline_at, strategy),
+            finish=lambda clause, ok, out: enhance_risk_assessment([build_clause_result(clause, ok, out)])[0],
+            fallback=deadline_fallback,
+            deadline=deadline_at,
+            executor=io_executor
+        )
+    except BaseException:
+        spill.close()
+        raise
+    queue_wait = scheduler.pop_document_waits(document_id)
+    if not counts["total_clauses"]:
+        spill.close()
+        raise HTTPException(400, "No meaningful clauses found in the document")
+
+    store_document(document_id, spill)
+    print(f"✅ Analysis complete! Streaming {counts['total_clauses']} analyzed clauses\n")
+    return StreamingResponse(spill.iter_json({
+        "success": True,
+        "document_id": document_id,
+        "strategy": strategy,
+        "total_clauses": counts["total_clauses"],
+        "queue_wait": queue_wait,
+        "model_analyzed_clauses": counts["model_analyzed_clauses"],
+        "deadline_reached": counts["deadline_reached"],
+        "elapsed_seconds": round(time.monotonic() - started, 2)
+    }), media_type="application/json")
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(files: List[UploadFile] = File(...), tenant: str = Form(""), strategy: str = Form("")):
+    """
+    Analyze many documents (or zip archives of them) in one request.
+
+    Documents are extracted and segmented in parallel worker processes and
+    all their clauses share batched inference; a clause that appears in
+    several documents is analyzed once. Streams one JSON line per document
+    as it completes, followed by a summary line. strategy is as for /analyze.
+    Each document line carries a document_id for
+    /documents/{id}/clauses/{n}/simplify, as /analyze does.
+
+    Batches are admitted separately from /analyze documents
+    (CLAUSEWISE_MAX_IN_FLIGHT_BATCHES) and analyze at most
+    CLAUSEWISE_BATCH_CONCURRENCY documents at a time. An upload holding more
+    than CLAUSEWISE_MAX_BATCH_DOCUMENTS documents or unpacking to more than
+    CLAUSEWISE_MAX_BATCH_MB is rejected with 400.
+    """
+    global in_flight_batches
+    strategy = strategy or DEFAULT_STRATEGY
+    if strategy not in STRATEGIES:
+        raise HTTPException(400, f"Unknown strategy: {strategy} (expected one of {', '.join(STRATEGIES)})")
+
+    for file in files:
+        if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS + ('.zip',)):
+            raise HTTPException(400, f"Unsupported file: {file.filename}")
+
+    if in_flight_batches >= MAX_IN_FLIGHT_BATCHES:
+        raise HTTPException(
+            429,
+            f"Server busy: {in_flight_batches} batches in progress",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    in_flight_batches += 1
+
+    loop = asyncio.get_running_loop()
+    batch_id = uuid.uuid4().hex
+    batch_dir = os.path.join(UPLOAD_DIR, batch_id)
+    os.makedirs(batch_dir)
+
+    try:
+        uploads = []
+        unpacked_bytes = 0
+        for idx, file in enumerate(files):
+            file_path = os.path.join(batch_dir, f"{idx}_{os.path.basename(file.filename)}")
+            await loop.run_in_executor(io_executor, save_upload, file, file_path)
+            # Archives share the batch's document and byte budget
+            expanded = await loop.run_in_executor(
+                io_executor, expand_upload, file.filename, file_path, batch_dir,
+                MAX_BATCH_DOCUMENTS - len(uploads), MAX_BATCH_BYTES - unpacked_bytes
+            )
+            uploads += expanded
+            unpacked_bytes += sum(os.path.getsize(path) for _, path in expanded)
+            if len(uploads) > MAX_BATCH_DOCUMENTS:
+                raise ValueError(f"More than {MAX_BATCH_DOCUMENTS} documents in one batch")
+    except Exception as e:
+        in_flight_batches -= 1
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        raise HTTPException(400, f"Could not read upload: {str(e)}")
+
+    print(f"\n📦 Received batch of {len(uploads)} documents")
+    weight = TENANT_WEIGHTS.get(tenant, 1)
+    # Clause text -> inference future, shared by every document containing it
+    shared = {}
+    concurrency = asyncio.Semaphore(BATCH_DOCUMENT_CONCURRENCY)
+
+    async def analyze_one(name: str, path: str, document_id: str) -> dict:
+        try:
+            async with concurrency:
+                return await analyze_one_document(name, path, document_id)
+        finally:
+            # Already popped on success; failed or cancelled documents must not leak their waits
+            scheduler.pop_document_waits(document_id)
+
+    async def analyze_one_document(name: str, path: str, document_id: str) -> dict:
+        try:
+            if SEGMENTATION == "tokens":
+                # The tokenizer stays in this process; workers only extract
+                text = await loop.run_in_executor(get_extract_pool(), extract_text, path)
+                clauses = await loop.run_in_executor(io_executor, segment_document, text)
+            else:
+                clauses = await loop.run_in_executor(get_extract_pool(), extract_and_segment, path)
+        except Exception as e:
+            return {"document": name, "success": False, "error": f"Extraction failed: {str(e)}"}
+        if not clauses:
+            return {"document": name, "success": False, "error": "No meaningful clauses found in the document"}
+
+        futures = []
+        for clause in clauses:
+            if clause not in shared:
+                shared[clause] = submit_clause(clause, document_id, weight, strategy=strategy)
+            futures.append(shared[clause])
+        # A failed batch costs only its own clauses a keyword fallback, as in /analyze
+        outputs = await asyncio.gather(*futures, return_exceptions=True)
+        results = [
+            build_clause_result(clause, False, None) if isinstance(output, BaseException)
+            else build_clause_result(clause, *output)
+            for clause, output in zip(clauses, outputs)
+        ]
+        final_results = enhance_risk_assessment(results)
+        store_document(document_id, final_results)
+        print(f"   ✅ {name}: {len(final_results)} clauses")
+        return {
+            "document": name,
+            "document_id": document_id,
+            "success": True,
+            "total_clauses": len(final_results),
+            "queue_wait": scheduler.pop_document_waits(document_id),
+            "clauses": final_results
+        }
+
+    async def stream():
+        global in_flight_batches
+        tasks = [
+            asyncio.create_task(analyze_one(name, path, f"{batch_id}-{idx}"))
+            for idx, (name, path) in enumerate(uploads)
+        ]
+        try:
+            total_clauses = 0
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                total_clauses += result.get("total_clauses", 0)
+                yield json.dumps(result) + "\n"
+            yield json.dumps({
+                "summary": True,
+                "documents": len(uploads),
+                "total_clauses": total_clauses,
+                "unique_clauses": len(shared)
+            }) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            in_flight_batches -= 1
+            shutil.rmtree(batch_dir, ignore_errors=True)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/documents/{document_id}/clauses/{n}/simplify")
+async def simplify_clause(document_id: str, n: int):
+    """
+    Plain-English text for clause n (0-based, as in the /analyze response).
+    Generated on first request and cached with the document.
+    """
+    document = documents.get(document_id)
+    if document is None:
+        raise HTTPException(404, "Unknown document (it may have expired; analyze it again)")
+    if not 0 <= n < len(document["clauses"]):
+        raise HTTPException(404, f"Clause {n} not found")
+
+    cached = document["simplified"].get(n)
+    if cached is None and "spill" in document:
+        cached = document["spill"][n].get("simplified") or None
+    if isinstance(cached, str):
+        return {"document_id": document_id, "clause": n, "simplified": cached, "cached": True}
+
+    # Concurrent requests for the same clause share one generation
+    if cached is None:
+        cached = asyncio.wrap_future(scheduler.submit(document["clauses"][n], task="simplify"))
+        document["simplified"][n] = cached
+    try:
+        text = await asyncio.shield(cached)
+    except Exception as e:
+        document["simplified"].pop(n, None)
+        raise HTTPException(500, f"Simplification failed: {str(e)}")
+    document["simplified"][n] = text
+    return {"document_id": document_id, "clause": n, "simplified": text, "cached": False}
+
+
 @app.get("/health")
 async def health_check():
+    if worker_pool is not None:
+        healthy = worker_pool.healthy_count()
+        return {
+            "status": "healthy" if healthy else "degraded",
+            "model": worker_pool.model_name(),
+            "workers": f"{healthy}/{len(worker_pool.workers)} healthy"
+        }
     return {"status": "healthy", "model": MODEL_NAME}
 
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+@app.get("/stats")
+async def stats():
+    """Generation length distribution, cap hit rate and current load"""
+    return {
+        "in_flight_documents": in_flight_documents,
+        "max_in_flight_documents": MAX_IN_FLIGHT_DOCUMENTS,
+        "in_flight_batches": in_flight_batches,
+        "max_in_flight_batches": MAX_IN_FLIGHT_BATCHES,
+        "scheduler": scheduler.stats(),
+        "similarity_index_size": len(clause_index) if clause_index is not None else 0,
+        "stored_documents": len(documents),
+        "distilled_classifier": distilled_counts,
+        "strategies": get_strategy_stats(),
+        # Analyzer stats live with the workers when inference is remote
+        "escalation": get_escalation_stats() if worker_pool is None else {},
+        "workers": worker_pool.stats() if worker_pool is not None else None,
+        "generation": get_generation_stats(),
+        "replay": get_replay_stats()
+    }
+
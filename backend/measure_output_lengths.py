@@ -0,0 +1,106 @@
+"""
+Measure how many tokens the model actually generates per clause
+Run this to re-derive the budgets in generation.GENERATION_BUDGETS
+
+Usage:
+    python measure_output_lengths.py                   # built-in test clauses
+    python measure_output_lengths.py contract.pdf ...  # clauses from documents
+    python measure_output_lengths.py --two-pass ...    # also measure granite_api_advanced
+"""
+
+import sys
+
+import generation
+from test_approaches import TEST_CLAUSES
+
+# Every generation gets this flat budget while measuring so outputs are not
+# clipped by the current base + per_token * clause_tokens formula
+MEASURE_CEILING = 1024
+
+
+def flat_budget(kind: str, clause_tokens: int) -> int:
+    return MEASURE_CEILING
+
+
+def lift_budgets(modules):
+    """
+    Point each module's max_new_tokens_for at flat_budget. The generation
+    modules import it by name, so patching generation alone would not reach them.
+    """
+    for module in modules:
+        module.max_new_tokens_for = flat_budget
+
+
+def load_clauses(paths):
+    if not paths:
+        return [t["text"] for t in TEST_CLAUSES]
+
+    from text_extraction import extract_text
+    from clause_segmentation import segment_clauses
+
+    clauses = []
+    for path in paths:
+        clauses.extend(segment_clauses(extract_text(path)))
+    return clauses
+
+
+def suggest_budget(samples):
+    """
+    Fit new_tokens ~ base + per_token * clause_tokens so that every measured
+    output fits, and put the cap 10% above the largest output.
+    """
+    if not samples:
+        return None
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+    per_token = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x if var_x else 0.0
+    per_token = max(per_token, 0.0)
+    base = max(y - per_token * x for x, y in samples)
+    return {
+        "base": int(base) + 1,
+        "per_token": round(per_token, 2),
+        "min": min(y for _, y in samples),
+        "max": int(max(y for _, y in samples) * 1.1),
+    }
+
+
+def report(kinds):
+    stats = generation.get_generation_stats()
+    for kind in kinds:
+        samples = generation.get_samples(kind)
+        s = stats[kind]
+        print("\n" + "=" * 80)
+        print(f"{kind}: {s['calls']} generations")
+        print(f"   p50={s['p50_tokens']}  p90={s['p90_tokens']}  p99={s['p99_tokens']}  max={s['max_tokens']}")
+        current = generation.GENERATION_BUDGETS[kind]
+        hits = sum(1 for x, y in samples if y >= generation.max_new_tokens_for(kind, x))
+        print(f"   Current budget {current} would cap {hits}/{len(samples)} outputs")
+        print(f"   Suggested budget: {suggest_budget(samples)}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    two_pass = "--two-pass" in args
+    paths = [a for a in args if not a.startswith("--")]
+
+    clauses = load_clauses(paths)
+    print(f"📏 Measuring output lengths on {len(clauses)} clauses")
+
+    import granite_api
+    from granite_api import call_granite
+    lift_budgets([granite_api])
+    for clause in clauses:
+        call_granite(clause)
+    kinds = ["single_pass"]
+
+    if two_pass:
+        import granite_api_advanced
+        from granite_api_advanced import call_granite as call_granite_two_pass
+        lift_budgets([granite_api_advanced])
+        for clause in clauses:
+            call_granite_two_pass(clause)
+        kinds += ["extract_info", "final_analysis"]
+
+    report(kinds)
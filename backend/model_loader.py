@@ -0,0 +1,202 @@
+"""
+Model loading shared by every analysis strategy
+
+get_model() loads the model once per process on first use; granite_api.py
+and granite_api_advanced.py both take it from there, so importing several
+analyzers keeps a single copy of the weights.
+
+By default the model comes from the Hugging Face hub cache and its weights
+are converted to the runtime dtype on every start. A local snapshot made with
+`prepare-model` is already stored in the target dtype as a single safetensors
+file next to the tokenizer, so with CLAUSEWISE_MODEL_SNAPSHOT pointing at it
+the weights are memory-mapped as stored: no hub lookups, no conversion.
+With CLAUSEWISE_REPLAY set only the tokenizer is loaded (inference_replay.py).
+
+Device, dtype and torch thread count come from hardware_profile.py: the
+profile tuned for this host (`python hardware_profile.py tune`), else
+defaults from probing it.
+
+Usage:
+    python model_loader.py prepare-model ./model_snapshot [--dtype float32] [--device cpu]
+    python model_loader.py time-to-ready [./model_snapshot]
+
+Compare cold starts with benchmark_cold_start.py.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM
+
+from generation import COMPILE_MODE, compile_model
+from hardware_profile import active_config
+from inference_replay import REPLAY_PATH
+
+MODEL_NAME = "ibm-granite/granite-3.1-1b-a400m-instruct"
+
+# Directory written by prepare-model; empty = load from the hub
+SNAPSHOT_DIR = os.getenv("CLAUSEWISE_MODEL_SNAPSHOT", "")
+SNAPSHOT_INFO = "clausewise_snapshot.json"
+
+DTYPES = {"float32": torch.float32, "float16": torch.float16, "bfloat16": torch.bfloat16}
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_model():
+    """
+    The process-wide (tokenizer, model), loaded and prepared on first call.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            if REPLAY_PATH:
+                # Outputs come from a recording (inference_replay.py): no weights needed
+                tokenizer = AutoTokenizer.from_pretrained(SNAPSHOT_DIR or MODEL_NAME,
+                                                          local_files_only=bool(SNAPSHOT_DIR))
+                model = None
+            else:
+                tokenizer, model = load_model(MODEL_NAME, active_config(MODEL_NAME))
+            # Left padding so every prompt in a batch ends where generation starts
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            # Opt-in static cache + torch.compile (CLAUSEWISE_COMPILE=1)
+            if COMPILE_MODE and model is not None:
+                compile_model(model, tokenizer)
+            _shared = (tokenizer, model)
+        return _shared
+
+
+def load_model(model_name: str = MODEL_NAME, config: dict = None):
+    """
+    Returns (tokenizer, model), from the local snapshot if
+    CLAUSEWISE_MODEL_SNAPSHOT is set, else from the hub, with the device,
+    dtype and threads of config (see hardware_profile.active_config).
+    Logs time-to-ready.
+    """
+    config = config or {"device": "cpu", "dtype": "float32", "threads": None}
+    if config.get("threads"):
+        torch.set_num_threads(config["threads"])
+    start = time.perf_counter()
+    if SNAPSHOT_DIR:
+        tokenizer, model = load_snapshot(SNAPSHOT_DIR, model_name)
+        # A snapshot is stored in one dtype for one device; only threads apply
+        if (model.device.type, str(model.dtype).replace("torch.", "")) != (config["device"], config["dtype"]):
+            print(f"   Snapshot dtype/device used instead of the tuned {config['device']} {config['dtype']}")
+    else:
+        tokenizer, model = load_from_hub(model_name, config["device"], config["dtype"])
+    print(f"⏱️  Model ready in {time.perf_counter() - start:.2f}s")
+    return tokenizer, model
+
+
+def load_from_hub(model_name: str, device: str = "cpu", dtype: str = "float32"):
+    print("🔄 Loading Granite model...")
+    print(f"   CUDA available: {torch.cuda.is_available()}")
+    if device == "cuda":
+        print(f"   GPU: {torch.cuda.get_device_name(0)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    try:
+        print(f"   Loading on {device} in {dtype}...")
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            dtype=DTYPES[dtype],
+            device_map="auto" if device == "cuda" else "cpu",
+            low_cpu_mem_usage=True
+        )
+        print(f"✅ Model loaded on {device} in {dtype}")
+    except Exception as e:
+        if (device, dtype) == ("cpu", "float32"):
+            raise
+        print(f"⚠️  Error loading model: {str(e)[:200]}")
+        print(f"   Trying CPU fallback...")
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            dtype=torch.float32,
+            device_map="cpu",
+            low_cpu_mem_usage=True
+        )
+        print(f"✅ Model loaded on CPU (fallback)")
+    return tokenizer, model
+
+
+def load_snapshot(path: str, model_name: str = MODEL_NAME):
+    """Memory-map a prepare-model snapshot without touching the network"""
+    with open(os.path.join(path, SNAPSHOT_INFO), "r", encoding="utf-8") as f:
+        info = json.load(f)
+    if info["model_name"] != model_name:
+        print(f"⚠️  Snapshot holds {info['model_name']}, not {model_name}")
+
+    device = info["device"]
+    if device == "cuda" and not torch.cuda.is_available():
+        raise RuntimeError(f"Snapshot {path} was prepared for CUDA but no GPU is available")
+
+    print(f"🔄 Loading {info['model_name']} snapshot from {path} ({info['dtype']}, {device})...")
+    tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+    model = AutoModelForCausalLM.from_pretrained(
+        path,
+        dtype=DTYPES[info["dtype"]],
+        device_map="auto" if device == "cuda" else "cpu",
+        low_cpu_mem_usage=True,
+        local_files_only=True
+    )
+    print(f"✅ Model loaded from snapshot")
+    return tokenizer, model
+
+
+def prepare_model(output_dir: str, model_name: str = MODEL_NAME, dtype: str = "float32", device: str = "cpu"):
+    """
+    Write model_name in the target dtype as one safetensors file (a single
+    memory map at load time), plus the tokenizer, to output_dir.
+    """
+    print(f"🔄 Converting {model_name} to {dtype} for {device}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name, dtype=DTYPES[dtype], low_cpu_mem_usage=True)
+
+    os.makedirs(output_dir, exist_ok=True)
+    model.save_pretrained(output_dir, safe_serialization=True, max_shard_size="100GB")
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, SNAPSHOT_INFO), "w", encoding="utf-8") as f:
+        json.dump({"model_name": model_name, "dtype": dtype, "device": device}, f, indent=2)
+    print(f"✅ Snapshot written to {output_dir}")
+    print(f"   Start the backend with CLAUSEWISE_MODEL_SNAPSHOT={os.path.abspath(output_dir)}")
+
+
+def _option(args: list, name: str, default: str) -> str:
+    if name in args:
+        idx = args.index(name)
+        value = args[idx + 1]
+        del args[idx:idx + 2]
+        return value
+    return default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] not in ("prepare-model", "time-to-ready"):
+        print(__doc__)
+        sys.exit(1)
+
+    command = args.pop(0)
+    if command == "prepare-model":
+        dtype = _option(args, "--dtype", "float32")
+        device = _option(args, "--device", "cpu")
+        model_name = _option(args, "--model", MODEL_NAME)
+        if len(args) != 1 or dtype not in DTYPES or device not in ("cpu", "cuda"):
+            print(__doc__)
+            sys.exit(1)
+        prepare_model(args[0], model_name, dtype, device)
+    else:
+        start = time.perf_counter()
+        if args:
+            load_snapshot(args[0])
+        else:
+            load_from_hub(MODEL_NAME)
+        print(json.dumps({"time_to_ready": round(time.perf_counter() - start, 3)}))
@@ -0,0 +1,54 @@
+"""
+Output normalization shared by every analysis strategy
+
+Model text (simplified, reason) goes through normalize_text exactly once:
+HTML tags, markdown emphasis and HTML entities are removed and whitespace
+is collapsed. Analyses that went through it carry "clean": true, so neither
+build_clause_result nor the frontend process them again.
+
+The original clause text is document text, not model output, and is left
+as extracted.
+
+Compare throughput with the previous cleanup in benchmark_normalization.py.
+"""
+
+import html
+import re
+
+# Fields of an analysis that hold model-generated text
+MODEL_TEXT_FIELDS = ("simplified", "reason")
+
+_TAG = re.compile(r"<[^>]+>")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"\*(.+?)\*")
+_CODE = re.compile(r"`(.+?)`")
+# Entities html.unescape does not know (e.g. double-escaped or misspelled)
+_LEFTOVER_ENTITY = re.compile(r"&#?\w+;")
+
+
+def normalize_text(text) -> str:
+    """Plain text from model output: no HTML, no markdown, single spaces"""
+    if not isinstance(text, str):
+        text = str(text)
+    # Each pattern only runs when its marker character is present
+    if "<" in text:
+        text = _TAG.sub("", text)
+    if "*" in text:
+        text = _BOLD.sub(r"\1", text)
+        text = _ITALIC.sub(r"\1", text)
+    if "`" in text:
+        text = _CODE.sub(r"\1", text)
+    if "&" in text:
+        text = _LEFTOVER_ENTITY.sub("", html.unescape(text))
+    # str.split() also splits on the non-breaking spaces &nbsp; unescapes to
+    return " ".join(text.split())
+
+
+def normalize_analysis(result: dict) -> dict:
+    """Normalize an analysis' model text in place, once, and flag it clean"""
+    if not result.get("clean"):
+        for field in MODEL_TEXT_FIELDS:
+            if field in result:
+                result[field] = normalize_text(result[field])
+        result["clean"] = True
+    return result
@@ -0,0 +1,225 @@
+"""
+Staged, bounded-memory analysis for very large documents
+
+    extract → segment → infer → enhance → serialize
+
+A worker thread extracts pages (text_extraction.iter_text) and segments them
+as they arrive (clause_segmentation.iter_clauses), handing clauses to the
+event loop through a bounded queue; when inference falls behind, extraction
+blocks instead of buffering the document. At most PIPELINE_WINDOW clauses
+are in inference at once. Finished clauses are enhanced and written, in
+document order, as JSON lines to a spill file on disk, and the response is
+streamed from that file. Peak memory depends on the queue sizes, not on the
+number of pages.
+
+Measure it with benchmark_pipeline.py.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Callable
+
+from text_extraction import iter_text
+from clause_segmentation import iter_clauses
+
+# Clauses segmented ahead of inference
+PIPELINE_QUEUE_SIZE = int(os.getenv("CLAUSEWISE_PIPELINE_QUEUE", "32"))
+# Clauses passed from the extraction thread to the event loop at a time
+HANDOFF_BATCH = 8
+# Clauses submitted for inference and not yet written
+PIPELINE_WINDOW = int(os.getenv("CLAUSEWISE_PIPELINE_WINDOW", "64"))
+
+# Bytes per chunk when streaming a spilled response
+READ_CHUNK = 256 * 1024
+
+_DONE = object()
+
+
+class ResultSpill:
+    """
+    Clause results as JSON lines on disk, in document order.
+    Supports len() and random access (for on-demand simplification) without
+    loading the file; reads use os.pread, so they are safe from any thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w+b")
+        self._offsets = array("Q")
+        self._end = 0
+
+    def append(self, result: dict):
+        line = json.dumps(result).encode("utf-8")
+        self._offsets.append(self._end)
+        self._file.write(line + b"\n")
+        self._end += len(line) + 1
+
+    def finish(self):
+        """Flush writes; call before reading"""
+        self._file.flush()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, n: int) -> dict:
+        start = self._offsets[n]
+        end = self._offsets[n + 1] if n + 1 < len(self._offsets) else self._end
+        return json.loads(os.pread(self._file.fileno(), end - start - 1, start))
+
+    def clauses(self) -> "SpilledClauses":
+        return SpilledClauses(self)
+
+    def iter_json(self, fields: dict):
+        """
+        The response body: fields plus "clauses", the spilled results as a
+        JSON array, streamed from disk a chunk at a time.
+        """
+        head = json.dumps(fields)
+        yield (head[:-1] + (", " if fields else "") + '"clauses": [').encode("utf-8")
+        # Own descriptor: the response can outlive close() (e.g. on eviction)
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            position = 0
+            while position < self._end:
+                chunk = os.pread(fd, min(READ_CHUNK, self._end - position), position)
+                position += len(chunk)
+                if position >= self._end:
+                    chunk = chunk[:-1]
+                # One result per line (json.dumps escapes newlines in strings)
+                yield chunk.replace(b"\n", b", ")
+        finally:
+            os.close(fd)
+        yield b"]}"
+
+    def close(self, remove: bool = True):
+        self._file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class SpilledClauses:
+    """Read-only list of a spill's clause texts"""
+
+    def __init__(self, spill: ResultSpill):
+        self._spill = spill
+
+    def __len__(self) -> int:
+        return len(self._spill)
+
+    def __getitem__(self, n: int) -> str:
+        return self._spill[n]["original"]
+
+
+def _produce(file_path: str, queue: asyncio.Queue, loop, stop: threading.Event):
+    """Extract + segment stage (worker thread)"""
+    def put(item):
+        # Blocks while the queue is full: backpressure from inference
+        if not stop.is_set():
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    try:
+        batch = []
+        for clause in iter_clauses(iter_text(file_path)):
+            if stop.is_set():
+                return
+            batch.append(clause)
+            # Handing clauses over one at a time costs more than segmenting them
+            if len(batch) == HANDOFF_BATCH:
+                put(batch)
+                batch = []
+        if batch:
+            put(batch)
+    except Exception as e:
+        put(e)
+        return
+    put(_DONE)
+
+
+async def run_pipeline(file_path: str, spill: ResultSpill,
+                       submit: Callable[[str], asyncio.Future],
+                       finish: Callable[[str, bool, object], dict],
+                       fallback: Callable[[str], dict],
+                       deadline: float = None, executor=None) -> dict:
+    """
+    Analyze file_path into spill and return counts for the response.
+
+    submit(clause) -> future of (ok, out), as main.submit_clause
+    finish(clause, ok, out) -> the clause's final result (build + enhance)
+    fallback(clause) -> result for a clause not analyzed before the deadline
+    deadline: time.monotonic() value or None. Clauses are analyzed in
+        document order, so past it the rest of the document falls back.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE // HANDOFF_BATCH))
+    stop = threading.Event()
+    loop.run_in_executor(executor, _produce, file_path, queue, loop, stop)
+    # (clause, inference future or None once past the deadline), oldest first
+    in_flight = deque()
+    counts = {"total_clauses": 0, "model_analyzed_clauses": 0, "deadline_reached": False}
+
+    def oldest_ready():
+        return in_flight and (in_flight[0][1] is None or in_flight[0][1].done())
+
+    async def write_oldest():
+        clause, future = in_flight.popleft()
+        try:
+            # None: past the deadline before submitting; cancelled: the
+            # scheduler dropped it from the queue at the deadline
+            if future is None or future.cancelled():
+                raise asyncio.TimeoutError
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ok, out = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            counts["deadline_reached"] = True
+            result = fallback(clause)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # This task is being cancelled, not the clause
+                raise
+            counts["deadline_reached"] = True
+            result = fallback(clause)
+        except Exception as e:
+            # A failed batch: keyword scoring for its clauses, the document goes on
+            print(f"   ❌ Inference failed: {e}")
+            result = finish(clause, False, None)
+        else:
+            if isinstance(out, dict) and out.get("deadline_fallback"):
+                # Generation was cut off by the deadline
+                counts["deadline_reached"] = True
+            elif ok:
+                counts["model_analyzed_clauses"] += 1
+            result = finish(clause, ok, out)
+        spill.append(result)
+        counts["total_clauses"] += 1
+
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            for clause in batch:
+                # Past the deadline nothing new goes to the model
+                expired = deadline is not None and time.monotonic() >= deadline
+                in_flight.append((clause, None if expired else submit(clause)))
+                # Keep the window full, but write finished clauses right away
+                while len(in_flight) >= PIPELINE_WINDOW or oldest_ready():
+                    await write_oldest()
+        while in_flight:
+            await write_oldest()
+    finally:
+        stop.set()
+        for _, future in in_flight:
+            if future is not None:
+                future.cancel()
+        # Unblock a producer waiting on a full queue
+        while not queue.empty():
+            queue.get_nowait()
+    spill.finish()
+    return counts
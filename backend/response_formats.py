@@ -0,0 +1,193 @@
+"""
+/analyze response formats, chosen by the request's Accept header
+
+    application/json                        default: one dict per clause
+    application/vnd.clausewise.compact+json     compact (below)
+    application/vnd.clausewise.compact+msgpack  compact, msgpack-encoded
+                                                (needs the msgpack package)
+
+Compact responses keep the top-level fields and replace "clauses" with
+columns: every clause's original text appears once in "text" and is
+referenced by (start, length) pairs in "spans", risk levels are indexes
+into "risk_levels", and flags shared by all clauses (e.g. "clean") are
+stated once in "defaults". expand_compact() turns one back into the
+default form.
+
+Any format is compressed with brotli (if installed) or gzip when
+Accept-Encoding allows it. Sizes and timings: benchmark_response_formats.py.
+"""
+
+import gzip
+import json
+import os
+
+from fastapi.responses import Response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON = "application/json"
+COMPACT_JSON = "application/vnd.clausewise.compact+json"
+COMPACT_MSGPACK = "application/vnd.clausewise.compact+msgpack"
+
+COMPACT_VERSION = "compact/1"
+RISK_LEVELS = ["HIGH", "MEDIUM", "LOW"]
+# Clause keys stored as columns; everything else goes to defaults/extra
+COLUMNS = ("original", "simplified", "risk", "reason")
+
+# Smaller bodies are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+# Level 1 gets a 4 MB response to ~29% in ~50 ms; level 6 gets ~23% but
+# takes ~300 ms, longer than shipping the difference on most links
+GZIP_LEVEL = int(os.environ.get("CLAUSEWISE_GZIP_LEVEL", "1"))
+BROTLI_QUALITY = int(os.environ.get("CLAUSEWISE_BROTLI_QUALITY", "4"))
+
+
+def to_compact(payload: dict) -> dict:
+    """Columnar form of an /analyze response (see module docstring)"""
+    clauses = payload.get("clauses", [])
+    text_parts = []
+    starts = {}
+    position = 0
+    spans, risks, simplified, reasons, extras = [], [], [], [], []
+    for clause in clauses:
+        original = clause.get("original", "")
+        # Repeated clauses (e.g. boilerplate) point at the same span
+        if original not in starts:
+            starts[original] = position
+            text_parts.append(original)
+            position += len(original) + 1
+        spans += [starts[original], len(original)]
+        risk = clause.get("risk", "MEDIUM")
+        risks.append(RISK_LEVELS.index(risk) if risk in RISK_LEVELS else 1)
+        simplified.append(clause.get("simplified", ""))
+        reasons.append(clause.get("reason", ""))
+        extras.append({k: v for k, v in clause.items() if k not in COLUMNS})
+
+    # Flags every clause has with the same value are stated once
+    defaults = dict(extras[0]) if extras else {}
+    for extra in extras[1:]:
+        defaults = {k: v for k, v in defaults.items() if k in extra and extra[k] == v}
+
+    compact = {k: v for k, v in payload.items() if k != "clauses"}
+    compact.update({
+        "format": COMPACT_VERSION,
+        "text": "\n".join(text_parts),
+        "risk_levels": RISK_LEVELS,
+        "spans": spans,
+        "risk": risks,
+        "reason": reasons,
+        "defaults": defaults,
+    })
+    # Classify-only results have no simplified text
+    if any(simplified):
+        compact["simplified"] = simplified
+    extra = {str(i): {k: v for k, v in e.items() if k not in defaults or defaults[k] != v}
+             for i, e in enumerate(extras)}
+    compact["extra"] = {i: e for i, e in extra.items() if e}
+    return compact
+
+
+def expand_compact(compact: dict) -> dict:
+    """The default /analyze response from a compact one"""
+    text = compact["text"]
+    spans = compact["spans"]
+    levels = compact["risk_levels"]
+    simplified = compact.get("simplified")
+    clauses = []
+    for i, risk in enumerate(compact["risk"]):
+        start, length = spans[2 * i], spans[2 * i + 1]
+        clauses.append({
+            "original": text[start:start + length],
+            "simplified": simplified[i] if simplified else "",
+            "risk": levels[risk],
+            "reason": compact["reason"][i],
+            **compact["defaults"],
+            **compact["extra"].get(str(i), {}),
+        })
+    skip = {"format", "text", "risk_levels", "spans", "risk", "reason", "defaults", "simplified", "extra"}
+    payload = {k: v for k, v in compact.items() if k not in skip}
+    payload["clauses"] = clauses
+    return payload
+
+
+def negotiate_format(accept: str) -> str:
+    """The supported media type the client prefers; JSON if none"""
+    supported = [JSON, COMPACT_JSON] + ([COMPACT_MSGPACK] if msgpack is not None else [])
+    offers = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        offers.append((-q, position, media_type.lower()))
+    for q, _, media_type in sorted(offers):
+        if q < 0 and media_type in supported:
+            return media_type
+    return JSON
+
+
+def negotiate_encoding(accept_encoding: str):
+    """"br", "gzip" or None, from Accept-Encoding"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in item.split(";")]
+        if not any(p.replace(" ", "") in ("q=0", "q=0.0") for p in params):
+            accepted.add(coding.lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def encode_payload(payload: dict, media_type: str = JSON, encoding: str = None) -> bytes:
+    """Serialize (and compress) an /analyze response body"""
+    if media_type == COMPACT_MSGPACK:
+        body = msgpack.packb(to_compact(payload))
+    else:
+        data = to_compact(payload) if media_type == COMPACT_JSON else payload
+        # Same settings as FastAPI's JSONResponse
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return compress(body, encoding)
+
+
+def compress(body: bytes, encoding: str = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def decode_payload(body: bytes, media_type: str = JSON, encoding: str = None) -> dict:
+    """Inverse of encode_payload, always returning the default form"""
+    if encoding == "br":
+        body = brotli.decompress(body)
+    elif encoding == "gzip":
+        body = gzip.decompress(body)
+    data = msgpack.unpackb(body) if media_type == COMPACT_MSGPACK else json.loads(body)
+    return expand_compact(data) if media_type != JSON else data
+
+
+def render_response(payload: dict, headers) -> Response:
+    """The /analyze response in the format and encoding the request asks for"""
+    media_type = negotiate_format(headers.get("accept", ""))
+    encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+    body = encode_payload(payload, media_type)
+    response_headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        response_headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=response_headers)
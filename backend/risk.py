@@ -35,6 +35,18 @@ def assess_risk_by_keywords(clause_text: str) -> str:
     
     return 'LOW'
 
+def deadline_fallback(clause: str, risk: str = None) -> dict:
+    """Result for a clause the model did not get to (or finish) before the deadline"""
+    return {
+        "original": clause,
+        "simplified": "",
+        "risk": risk or assess_risk_by_keywords(clause),
+        "reason": "Deadline reached - fallback keyword scoring",
+        "fallback": True,
+        "deadline_fallback": True,
+        "clean": True
+    }
+
 def enhance_risk_assessment(results: List[Dict]) -> List[Dict]:
     """
     Hybrid approach: Use model risk but validate with keywords.
@@ -0,0 +1,198 @@
+"""
+Distilled risk classifier
+
+Every Granite analysis is a labeled example (clause -> HIGH/MEDIUM/LOW).
+This module logs them, fits a small logistic regression over hashed word
+n-gram features on CPU with NumPy, and scores new clauses in microseconds.
+Only clauses it is unsure about need to go to the LLM.
+
+Usage:
+    python risk_classifier.py train training_log.jsonl risk_model.npz
+    python risk_classifier.py evaluate training_log.jsonl risk_model.npz
+"""
+
+import json
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+LABELS = ["HIGH", "MEDIUM", "LOW"]
+N_FEATURES = 1 << 18
+NGRAM_SIZES = (1, 2)
+
+_TOKEN = re.compile(r"[a-z]+|\d+")
+
+
+def featurize(clause: str):
+    """
+    Hashed word 1-2 gram features.
+    Returns (indices, values) with log-scaled counts, L2-normalized.
+    """
+    words = _TOKEN.findall(clause.lower())
+    counts = {}
+    for n in NGRAM_SIZES:
+        for i in range(len(words) - n + 1):
+            h = zlib.crc32(" ".join(words[i:i + n]).encode()) % N_FEATURES
+            counts[h] = counts.get(h, 0) + 1
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    values /= np.linalg.norm(values)
+    return indices, values
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class RiskClassifier:
+    def __init__(self, weights=None, bias=None):
+        self.weights = weights if weights is not None else np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(LABELS), dtype=np.float32)
+
+    def predict_proba(self, clause: str):
+        indices, values = featurize(clause)
+        logits = values @ self.weights[indices] + self.bias
+        return _softmax(logits)
+
+    def classify(self, clause: str):
+        """Returns (risk label, confidence)"""
+        probs = self.predict_proba(clause)
+        best = int(probs.argmax())
+        return LABELS[best], float(probs[best])
+
+    def fit(self, clauses: list, labels: list, epochs: int = 20, learning_rate: float = 5.0,
+            l2: float = 1e-5, batch_size: int = 256, seed: int = 0):
+        """Mini-batch gradient descent on the multinomial logistic loss"""
+        if not clauses:
+            raise ValueError("Not enough data: no labeled clauses to train on")
+        features = [featurize(c) for c in clauses]
+        targets = np.array([LABELS.index(label) for label in labels])
+        rng = np.random.default_rng(seed)
+
+        for epoch in range(epochs):
+            order = rng.permutation(len(features))
+            total_loss = 0.0
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                rows = [features[i] for i in batch]
+                lengths = np.array([len(idx) for idx, _ in rows])
+                indices = np.concatenate([idx for idx, _ in rows])
+                values = np.concatenate([val for _, val in rows])
+                row_ids = np.repeat(np.arange(len(batch)), lengths)
+
+                # Sparse forward pass: logits[r] = sum of values * weights rows
+                logits = np.zeros((len(batch), len(LABELS)), dtype=np.float32)
+                np.add.at(logits, row_ids, values[:, None] * self.weights[indices])
+                logits += self.bias
+                probs = _softmax(logits)
+                total_loss -= np.log(probs[np.arange(len(batch)), targets[batch]] + 1e-9).sum()
+
+                grad_logits = probs
+                grad_logits[np.arange(len(batch)), targets[batch]] -= 1
+                grad_logits /= len(batch)
+
+                grad_weights = values[:, None] * grad_logits[row_ids]
+                touched = np.unique(indices)
+                self.weights[touched] *= (1 - learning_rate * l2)
+                np.add.at(self.weights, indices, -learning_rate * grad_weights)
+                self.bias -= learning_rate * grad_logits.sum(axis=0)
+
+            print(f"   epoch {epoch + 1}/{epochs}: loss {total_loss / len(features):.4f}")
+        return self
+
+    def save(self, path: str):
+        # Only rows touched by training are non-zero; store them sparsely
+        rows = np.flatnonzero(np.abs(self.weights).sum(axis=1))
+        np.savez_compressed(path, rows=rows, weights=self.weights[rows], bias=self.bias)
+
+    @classmethod
+    def load(cls, path: str) -> "RiskClassifier":
+        data = np.load(path)
+        weights = np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+        weights[data["rows"]] = data["weights"]
+        return cls(weights, data["bias"])
+
+
+class TrainingLog:
+    """Appends (clause, Granite analysis) pairs to a JSON lines file"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def append(self, clause: str, result: dict):
+        entry = {
+            "clause": clause,
+            "risk": result.get("risk"),
+            "simplified": result.get("simplified"),
+            "reason": result.get("reason"),
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+
+def load_examples(path: str):
+    clauses, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("risk") in LABELS:
+                clauses.append(entry["clause"])
+                labels.append(entry["risk"])
+    return clauses, labels
+
+
+def evaluate(model: RiskClassifier, clauses: list, labels: list, thresholds=(0.5, 0.7, 0.8, 0.9, 0.95)):
+    """Prints accuracy overall and per confidence threshold; returns it (None without examples)"""
+    if not labels:
+        print("⚠️  Not enough data to evaluate: no labeled clauses")
+        return None
+    predictions = [model.classify(c) for c in clauses]
+    correct = sum(1 for (label, _), truth in zip(predictions, labels) if label == truth)
+    print(f"Accuracy: {correct}/{len(labels)} ({correct / len(labels) * 100:.1f}%)")
+    for threshold in thresholds:
+        kept = [(label, truth) for (label, conf), truth in zip(predictions, labels) if conf >= threshold]
+        kept_correct = sum(1 for label, truth in kept if label == truth)
+        accuracy = kept_correct / len(kept) * 100 if kept else 0.0
+        print(f"   confidence >= {threshold}: {len(kept)}/{len(labels)} served locally "
+              f"({accuracy:.1f}% accurate), {len(labels) - len(kept)} escalated to Granite")
+    return correct / len(labels)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] not in ("train", "evaluate"):
+        print(__doc__)
+        sys.exit(1)
+
+    command, log_path, model_path = sys.argv[1:4]
+    clauses, labels = load_examples(log_path)
+    print(f"📚 Loaded {len(clauses)} labeled clauses from {log_path}")
+    if not clauses:
+        print("❌ Not enough data: the training log has no labeled clauses")
+        sys.exit(1)
+
+    if command == "train":
+        # Hold out every 5th example to report accuracy
+        train = [i for i in range(len(clauses)) if i % 5]
+        held_out = [i for i in range(len(clauses)) if not i % 5]
+        if train:
+            model = RiskClassifier().fit([clauses[i] for i in train], [labels[i] for i in train])
+            print("\nHeld-out evaluation:")
+            evaluate(model, [clauses[i] for i in held_out], [labels[i] for i in held_out])
+        else:
+            print("⚠️  Not enough data for a held-out evaluation; training on everything")
+        model = RiskClassifier().fit(clauses, labels)
+        model.save(model_path)
+        print(f"✅ Saved classifier to {model_path}")
+    else:
+        evaluate(RiskClassifier.load(model_path), clauses, labels)
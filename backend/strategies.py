@@ -0,0 +1,108 @@
+"""
+Analysis strategy registry
+
+Every strategy takes a batch of clauses and a deadline (or None) and
+returns one (success, result) tuple per clause, like call_granite_batch.
+All of them run on the one model instance from model_loader.get_model(),
+so /analyze can pick a strategy per request (e.g. to A/B test them live)
+without loading another copy of the weights or restarting.
+
+    single_pass    one generate call per batch (granite_api.py)
+    two_pass       extract key information, then analyze (granite_api_advanced.py)
+    adaptive       single pass, two-pass only for low-confidence clauses
+    classify_only  risk label from one forward pass, no simplified text
+
+Analyzer modules are imported on first use of their strategy.
+"""
+
+import os
+import time
+from typing import Callable, Dict
+
+from risk import deadline_fallback
+
+# Strategy used when a request does not name one
+DEFAULT_STRATEGY = os.getenv(
+    "CLAUSEWISE_STRATEGY",
+    "adaptive" if os.getenv("CLAUSEWISE_ADAPTIVE", "0") == "1" else "single_pass"
+)
+
+STRATEGIES: Dict[str, dict] = {}
+
+
+def register_strategy(name: str, full_analysis: bool = True):
+    """
+    Decorator adding a batch analysis function to the registry.
+    full_analysis: results include simplified text and a reason, so they
+        can be reused for similar clauses and logged as training data.
+    """
+    def decorator(run: Callable[[list, float], list]):
+        STRATEGIES[name] = {
+            "run": run,
+            "full_analysis": full_analysis,
+            "stats": {"batches": 0, "clauses": 0, "fallbacks": 0, "seconds": 0.0},
+        }
+        return run
+    return decorator
+
+
+def run_strategy(name: str, clauses: list, deadline: float = None) -> list:
+    """Run a registered strategy on a batch, recording its usage for /stats"""
+    start = time.perf_counter()
+    results = STRATEGIES[name]["run"](clauses, deadline)
+    record_strategy_run(name, clauses, results, time.perf_counter() - start)
+    return results
+
+
+def record_strategy_run(name: str, clauses: list, results: list, seconds: float):
+    """Count a batch toward the strategy's /stats (also for batches run on remote workers)"""
+    stats = STRATEGIES[name]["stats"]
+    stats["batches"] += 1
+    stats["clauses"] += len(clauses)
+    stats["fallbacks"] += sum(1 for ok, out in results if not ok or (isinstance(out, dict) and out.get("fallback")))
+    stats["seconds"] += seconds
+
+
+def get_strategy_stats() -> Dict[str, dict]:
+    """Per-strategy usage, latency and fallback rate for comparing them"""
+    stats = {}
+    for name, strategy in STRATEGIES.items():
+        s = strategy["stats"]
+        stats[name] = {
+            "batches": s["batches"],
+            "clauses": s["clauses"],
+            "fallback_rate": round(s["fallbacks"] / s["clauses"], 4) if s["clauses"] else 0.0,
+            "seconds_per_clause": round(s["seconds"] / s["clauses"], 3) if s["clauses"] else 0.0,
+        }
+    return stats
+
+
+@register_strategy("single_pass")
+def single_pass(clauses: list, deadline: float = None) -> list:
+    from granite_api import call_granite_batch
+    return call_granite_batch(clauses, deadline)
+
+
+@register_strategy("two_pass")
+def two_pass(clauses: list, deadline: float = None) -> list:
+    from granite_api_advanced import call_granite
+    results = []
+    for clause in clauses:
+        # Two sequential generations per clause: stop starting new ones at the deadline
+        if deadline is not None and time.monotonic() >= deadline:
+            results.append((True, deadline_fallback(clause)))
+            continue
+        results.append(call_granite(clause, deadline))
+    return results
+
+
+@register_strategy("adaptive")
+def adaptive(clauses: list, deadline: float = None) -> list:
+    from granite_api_adaptive import call_granite_batch_adaptive
+    return call_granite_batch_adaptive(clauses, deadline)
+
+
+@register_strategy("classify_only", full_analysis=False)
+def classify_only(clauses: list, deadline: float = None) -> list:
+    from granite_api import classify_clauses_batch
+    return classify_clauses_batch(clauses, deadline)
@@ -0,0 +1,161 @@
+"""
+Model-free stand-in for granite_api.py (and granite_api_advanced.py), for
+load testing main.app without loading or running Granite
+
+Each batch sleeps for a lognormal latency around
+    CLAUSEWISE_STUB_BATCH_MS + CLAUSEWISE_STUB_CLAUSE_MS * clauses
+(classify-only batches are one forward pass: CLASSIFY_SCALE of that) and
+returns keyword-scored analyses shaped like the real ones. A share of
+clauses (CLAUSEWISE_STUB_FALLBACK_RATE) come back as unparseable-output
+fallbacks, and batches that would outlive their deadline stop at it, as
+generate() does.
+
+install() must run before main is imported:
+
+    import stub_inference
+    stub_inference.install()
+    import main
+"""
+
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from generation import PROMPT_BUCKETS
+from normalization import normalize_analysis
+from risk import assess_risk_by_keywords, deadline_fallback
+
+MODEL_NAME = "stub"
+
+BATCH_MS = float(os.getenv("CLAUSEWISE_STUB_BATCH_MS", "400"))
+CLAUSE_MS = float(os.getenv("CLAUSEWISE_STUB_CLAUSE_MS", "150"))
+# Sigma of the lognormal multiplier (0 = fixed latency)
+JITTER = float(os.getenv("CLAUSEWISE_STUB_JITTER", "0.35"))
+FALLBACK_RATE = float(os.getenv("CLAUSEWISE_STUB_FALLBACK_RATE", "0.02"))
+CLASSIFY_SCALE = 0.1
+SIMPLIFY_SCALE = 0.6
+
+RISK_LABELS = ["HIGH", "MEDIUM", "LOW"]
+# Rough size of the single-pass prompt template in tokens
+TEMPLATE_TOKENS = 330
+
+_random = random.Random(int(os.getenv("CLAUSEWISE_STUB_SEED", "0")))
+_random_lock = threading.Lock()
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+class StubTokenizer:
+    """Word pieces and punctuation, about as many as a BPE tokenizer gives for English"""
+    eos_token_id = 0
+    pad_token_id = 0
+
+    def __call__(self, texts, add_special_tokens=False, **kwargs):
+        if isinstance(texts, str):
+            return {"input_ids": self.encode(texts)}
+        return {"input_ids": [self.encode(t) for t in texts]}
+
+    def encode(self, text, add_special_tokens=False):
+        return [0] * sum(1 + len(piece) // 8 for piece in _TOKEN.findall(text))
+
+
+tokenizer = StubTokenizer()
+model = None
+
+
+def _sleep(clauses: list, scale: float, deadline: float) -> bool:
+    """Sleep for one batch; False if the deadline cut it short"""
+    with _random_lock:
+        jitter = _random.lognormvariate(0, JITTER) if JITTER > 0 else 1.0
+    seconds = (BATCH_MS + CLAUSE_MS * len(clauses)) * scale * jitter / 1000
+    if deadline is not None and time.monotonic() + seconds > deadline:
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        return False
+    time.sleep(seconds)
+    return True
+
+
+def _fallback(clause: str) -> dict:
+    risk = assess_risk_by_keywords(clause)
+    return {
+        "original": clause,
+        "simplified": f"This clause discusses: {clause[:100]}",
+        "risk": risk,
+        "reason": f"Keyword-based analysis indicates {risk} risk. AI model response was unclear.",
+        "fallback": True
+    }
+
+
+def _analysis(clause: str) -> dict:
+    with _random_lock:
+        if _random.random() < FALLBACK_RATE:
+            return _fallback(clause)
+        confidence = round(_random.uniform(0.5, 1.0), 4)
+    risk = assess_risk_by_keywords(clause)
+    return normalize_analysis({
+        "original": clause,
+        "simplified": "In plain terms: " + " ".join(clause.split()[:25]),
+        "risk": risk,
+        "reason": f"The clause sets out obligations that carry {risk.lower()} risk for the reader.",
+        "risk_confidence": confidence
+    })
+
+
+def build_prompt(clause: str) -> str:
+    return clause
+
+
+def clause_token_range(bucket: int) -> tuple:
+    """Same arithmetic as granite_api.clause_token_range, with TEMPLATE_TOKENS"""
+    below = max([b for b in PROMPT_BUCKETS if b < bucket], default=TEMPLATE_TOKENS)
+    max_tokens = (bucket - TEMPLATE_TOKENS) // 2
+    min_tokens = max(0, (below - TEMPLATE_TOKENS) // 2) + 1
+    if max_tokens < 16:
+        raise ValueError(f"Prompt bucket {bucket} leaves {max_tokens} tokens for the clause")
+    return min(min_tokens, max_tokens // 2), max_tokens
+
+
+def call_granite_batch(clauses: list, deadline: float = None) -> list:
+    if not _sleep(clauses, 1.0, deadline):
+        return [(True, deadline_fallback(c)) for c in clauses]
+    return [(True, _analysis(c)) for c in clauses]
+
+
+def call_granite(clause: str, deadline: float = None):
+    # Two generations per clause
+    if not _sleep([clause], 2.0, deadline):
+        return True, deadline_fallback(clause)
+    return True, _analysis(clause)
+
+
+def classify_clauses_batch(clauses: list, deadline: float = None) -> list:
+    _sleep(clauses, CLASSIFY_SCALE, None)
+    results = []
+    for clause in clauses:
+        risk = assess_risk_by_keywords(clause)
+        scores = {label: (0.7 if label == risk else 0.15) for label in RISK_LABELS}
+        results.append((True, {
+            "original": clause,
+            "simplified": "",
+            "risk": risk,
+            "reason": "Label likelihood: " + ", ".join(f"{label} {p:.2f}" for label, p in scores.items()),
+            "risk_confidence": 0.7,
+            "classify_only": True
+        }))
+    return results
+
+
+def simplify_clauses_batch(clauses: list, deadline: float = None) -> list:
+    _sleep(clauses, SIMPLIFY_SCALE, deadline)
+    return ["In plain terms: " + " ".join(c.split()[:25]) for c in clauses]
+
+
+def install():
+    """Make `import granite_api` (and granite_api_advanced) resolve to this module"""
+    module = sys.modules[__name__]
+    sys.modules["granite_api"] = module
+    sys.modules["granite_api_advanced"] = module
+    print(f"🧪 Stub inference: {BATCH_MS:.0f} ms/batch + {CLAUSE_MS:.0f} ms/clause, "
+          f"jitter {JITTER}, fallback rate {FALLBACK_RATE:.0%}")
@@ -3,6 +3,8 @@ Test script to compare single-pass vs two-pass analysis approaches
 Run this to see which approach works better for your use case
 """
 
+import time
+
 # Test clauses with known risk levels
 TEST_CLAUSES = [
     {
@@ -47,7 +49,9 @@ def test_single_pass():
             print(f"Clause: {test['text'][:80]}...")
             print(f"Expected Risk: {test['expected_risk']}")
             
+            start = time.perf_counter()
             success, result = call_granite(test['text'])
+            seconds = time.perf_counter() - start
             
             if success:
                 actual_risk = result.get('risk', 'UNKNOWN')
@@ -61,7 +65,8 @@ def test_single_pass():
                     "test": i,
                     "expected": test['expected_risk'],
                     "actual": actual_risk,
-                    "correct": actual_risk == test['expected_risk']
+                    "correct": actual_risk == test['expected_risk'],
+                    "seconds": seconds
                 })
             else:
                 print("❌ Analysis failed")
@@ -69,7 +74,8 @@ def test_single_pass():
                     "test": i,
                     "expected": test['expected_risk'],
                     "actual": "FAILED",
-                    "correct": False
+                    "correct": False,
+                    "seconds": seconds
                 })
         
         # Summary
@@ -79,6 +85,7 @@ def test_single_pass():
         
         print("\n" + "="*80)
         print(f"SINGLE-PASS RESULTS: {correct}/{total} correct ({accuracy:.1f}% accuracy)")
+        print(f"Average latency: {sum(r['seconds'] for r in results) / max(total, 1):.1f}s per clause")
         print("="*80)
         
         return results
@@ -102,7 +109,9 @@ def test_two_pass():
             print(f"Clause: {test['text'][:80]}...")
             print(f"Expected Risk: {test['expected_risk']}")
             
+            start = time.perf_counter()
             success, result = call_granite(test['text'])
+            seconds = time.perf_counter() - start
             
             if success:
                 actual_risk = result.get('risk', 'UNKNOWN')
@@ -116,7 +125,8 @@ def test_two_pass():
                     "test": i,
                     "expected": test['expected_risk'],
                     "actual": actual_risk,
-                    "correct": actual_risk == test['expected_risk']
+                    "correct": actual_risk == test['expected_risk'],
+                    "seconds": seconds
                 })
             else:
                 print("❌ Analysis failed")
@@ -124,7 +134,8 @@ def test_two_pass():
                     "test": i,
                     "expected": test['expected_risk'],
                     "actual": "FAILED",
-                    "correct": False
+                    "correct": False,
+                    "seconds": seconds
                 })
         
         # Summary
@@ -134,6 +145,7 @@ def test_two_pass():
         
         print("\n" + "="*80)
         print(f"TWO-PASS RESULTS: {correct}/{total} correct ({accuracy:.1f}% accuracy)")
+        print(f"Average latency: {sum(r['seconds'] for r in results) / max(total, 1):.1f}s per clause")
         print("="*80)
         
         return results
@@ -142,9 +154,105 @@ def test_two_pass():
         print(f"❌ Error testing two-pass: {e}")
         return []
 
+def test_adaptive():
+    """Test single-pass with confidence-driven escalation to two-pass"""
+    print("\n" + "="*80)
+    print("TESTING ADAPTIVE APPROACH (granite_api_adaptive.py)")
+    print("="*80)
+    
+    try:
+        from granite_api_adaptive import call_granite_batch_adaptive, get_escalation_stats
+        
+        results = []
+        for i, test in enumerate(TEST_CLAUSES, 1):
+            print(f"\n--- Test Case {i}/{len(TEST_CLAUSES)} ---")
+            print(f"Clause: {test['text'][:80]}...")
+            print(f"Expected Risk: {test['expected_risk']}")
+            
+            start = time.perf_counter()
+            success, result = call_granite_batch_adaptive([test['text']])[0]
+            seconds = time.perf_counter() - start
+            actual_risk = result.get('risk', 'UNKNOWN') if success else "FAILED"
+            match = "✅ CORRECT" if actual_risk == test['expected_risk'] else "❌ WRONG"
+            
+            print(f"Actual Risk: {actual_risk} {match}")
+            print(f"Escalated: {'yes' if result.get('escalated') else 'no'} "
+                  f"(confidence {result.get('single_pass_confidence', result.get('risk_confidence', 'n/a'))})")
+            
+            results.append({
+                "test": i,
+                "expected": test['expected_risk'],
+                "actual": actual_risk,
+                "correct": actual_risk == test['expected_risk'],
+                "seconds": seconds
+            })
+        
+        # Summary
+        correct = sum(1 for r in results if r['correct'])
+        total = len(results)
+        accuracy = (correct / total * 100) if total > 0 else 0
+        stats = get_escalation_stats()
+        
+        print("\n" + "="*80)
+        print(f"ADAPTIVE RESULTS: {correct}/{total} correct ({accuracy:.1f}% accuracy)")
+        print(f"Average latency: {sum(r['seconds'] for r in results) / max(total, 1):.1f}s per clause")
+        print(f"Escalation rate: {stats['escalated']}/{stats['clauses']} ({stats['escalation_rate'] * 100:.0f}%)")
+        print("="*80)
+        
+        return results
+        
+    except Exception as e:
+        print(f"❌ Error testing adaptive: {e}")
+        return []
+
+def test_classify_only():
+    """Test label log-likelihood classification (one forward pass, no decoding)"""
+    print("\n" + "="*80)
+    print("TESTING CLASSIFY-ONLY APPROACH (granite_api.classify_clauses_batch)")
+    print("="*80)
+    
+    try:
+        from granite_api import classify_clauses_batch
+        
+        # All clauses in one batch, as the server runs them
+        start = time.perf_counter()
+        outputs = classify_clauses_batch([test['text'] for test in TEST_CLAUSES])
+        seconds = (time.perf_counter() - start) / len(TEST_CLAUSES)
+        
+        results = []
+        for i, (test, (success, result)) in enumerate(zip(TEST_CLAUSES, outputs), 1):
+            actual_risk = result.get('risk', 'UNKNOWN') if success else "FAILED"
+            match = "✅ CORRECT" if actual_risk == test['expected_risk'] else "❌ WRONG"
+            print(f"\n--- Test Case {i}/{len(TEST_CLAUSES)} ---")
+            print(f"Clause: {test['text'][:80]}...")
+            print(f"Expected Risk: {test['expected_risk']}")
+            print(f"Actual Risk: {actual_risk} {match} ({result.get('reason', '')})")
+            
+            results.append({
+                "test": i,
+                "expected": test['expected_risk'],
+                "actual": actual_risk,
+                "correct": actual_risk == test['expected_risk'],
+                "seconds": seconds
+            })
+        
+        correct = sum(1 for r in results if r['correct'])
+        total = len(results)
+        
+        print("\n" + "="*80)
+        print(f"CLASSIFY-ONLY RESULTS: {correct}/{total} correct ({correct / total * 100:.1f}% accuracy)")
+        print(f"Average latency: {seconds:.2f}s per clause")
+        print("="*80)
+        
+        return results
+        
+    except Exception as e:
+        print(f"❌ Error testing classify-only: {e}")
+        return []
+
 if __name__ == "__main__":
     print("\n" + "🔬 CLAUSEWISE PROMPT ENGINEERING TEST SUITE" + "\n")
-    print("This will test both approaches on 5 sample clauses")
+    print("This will test the single-pass, two-pass, adaptive and classify-only approaches on 5 sample clauses")
     print("Expected processing time: 5-10 minutes total\n")
     
     input("Press Enter to start testing...")
@@ -152,16 +260,7 @@ if __name__ == "__main__":
     # Test current approach (single-pass)
     single_results = test_single_pass()
     
-    print("\n\n" + "⏸️  PAUSE" + "\n")
-    print("To test the two-pass approach:")
-    print("1. Backup: copy granite_api.py granite_api_single.py")
-    print("2. Switch: copy granite_api_advanced.py granite_api.py")
-    print("3. Run this script again")
-    print("\nOr press Enter to skip two-pass testing...")
-    
-    input()
-    
-    # Optionally test two-pass if available
+    # Two-pass shares the same model instance (model_loader.get_model)
     try:
         two_results = test_two_pass()
         
@@ -187,4 +286,19 @@ if __name__ == "__main__":
     except ImportError:
         print("Two-pass approach not available (granite_api_advanced.py not active)")
     
+    # Adaptive: single-pass first, two-pass only for low-confidence clauses
+    adaptive_results = test_adaptive()
+    # Classify-only: risk labels without simplification
+    classify_results = test_classify_only()
+    if single_results and adaptive_results:
+        print("\n" + "="*80)
+        print("📊 ACCURACY / LATENCY TRADE-OFF")
+        print("="*80)
+        for label, results in [("Single-Pass", single_results), ("Two-Pass", two_results),
+                               ("Adaptive", adaptive_results), ("Classify", classify_results)]:
+            if results:
+                correct = sum(1 for r in results if r['correct'])
+                latency = sum(r['seconds'] for r in results) / len(results)
+                print(f"{label:<12} {correct}/{len(results)} correct, {latency:.1f}s per clause")
+    
     print("\n✅ Testing complete!")
@@ -0,0 +1,111 @@
+"""
+Tests for batch_scheduler.BatchScheduler batching, policies and failures
+
+Run with: python -m pytest test_batch_scheduler.py
+"""
+
+import threading
+
+import pytest
+
+from batch_scheduler import BatchScheduler
+
+
+def run_batches(policy: str, submissions: list, max_batch_size: int = 2) -> list:
+    """
+    Batches the scheduler forms for (document, clause, weight) submissions
+    queued while the single worker is busy, so they are all pending at once.
+    """
+    busy, release = threading.Event(), threading.Event()
+    batches = []
+
+    def infer(clauses, deadline):
+        if clauses == ["blocker"]:
+            busy.set()
+            release.wait(5)
+        else:
+            batches.append(list(clauses))
+        return clauses
+
+    scheduler = BatchScheduler(infer, max_batch_size, max_wait_ms=0, workers=1, policy=policy)
+    scheduler.submit("blocker", "blocker")
+    assert busy.wait(5)
+    futures = [scheduler.submit(clause, document, weight) for document, clause, weight in submissions]
+    release.set()
+    assert [f.result(timeout=5) for f in futures] == [clause for _, clause, _ in submissions]
+    return batches
+
+
+LONG_THEN_SHORT = [("long", f"a{i}", 1) for i in range(1, 5)] + [("short", f"b{i}", 1) for i in range(1, 3)]
+
+
+def test_fifo_keeps_arrival_order():
+    assert run_batches("fifo", LONG_THEN_SHORT) == [["a1", "a2"], ["a3", "a4"], ["b1", "b2"]]
+
+
+def test_round_robin_alternates_documents():
+    assert run_batches("round_robin", LONG_THEN_SHORT) == [["a1", "b1"], ["a2", "b2"], ["a3", "a4"]]
+
+
+def test_round_robin_weights():
+    submissions = [("heavy", f"a{i}", 2) for i in range(1, 5)] + [("light", f"b{i}", 1) for i in range(1, 3)]
+    assert run_batches("round_robin", submissions, max_batch_size=3) == [["a1", "a2", "b1"], ["a3", "a4", "b2"]]
+
+
+def test_shortest_first_drains_small_documents_first():
+    assert run_batches("shortest_first", LONG_THEN_SHORT) == [["b1", "b2"], ["a1", "a2"], ["a3", "a4"]]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BatchScheduler(lambda clauses, deadline: clauses, policy="lifo")
+
+
+def test_short_result_list_fails_every_future():
+    scheduler = BatchScheduler(lambda clauses, deadline: clauses[:1], max_batch_size=4, max_wait_ms=50)
+    futures = [scheduler.submit(clause, "doc") for clause in ("a", "b", "c")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 results for 3 clauses"):
+            future.result(timeout=5)
+
+
+def test_inference_error_reaches_every_future():
+    def infer(clauses, deadline):
+        raise ValueError("model failed")
+
+    scheduler = BatchScheduler(infer, max_batch_size=4, max_wait_ms=50)
+    futures = [scheduler.submit(clause, "doc") for clause in ("a", "b")]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+
+
+def test_tasks_are_batched_separately():
+    seen = []
+    lock = threading.Lock()
+
+    def infer_for(task):
+        def infer(clauses, deadline):
+            with lock:
+                seen.append((task, list(clauses)))
+            return [f"{task}:{clause}" for clause in clauses]
+        return infer
+
+    scheduler = BatchScheduler({"full": infer_for("full"), "simplify": infer_for("simplify")},
+                               max_batch_size=4, max_wait_ms=50)
+    full = scheduler.submit("a", "doc", task="full")
+    simplify = scheduler.submit("b", "doc", task="simplify")
+    assert full.result(timeout=5) == "full:a"
+    assert simplify.result(timeout=5) == "simplify:b"
+    assert sorted(seen) == [("full", ["a"]), ("simplify", ["b"])]
+    with pytest.raises(ValueError):
+        scheduler.submit("c", "doc", task="missing")
+
+
+def test_document_waits_are_popped():
+    scheduler = BatchScheduler(lambda clauses, deadline: clauses, max_batch_size=4, max_wait_ms=10)
+    futures = [scheduler.submit(clause, "doc") for clause in ("a", "b")]
+    for future in futures:
+        future.result(timeout=5)
+    assert scheduler.pop_document_waits("doc")["clauses"] == 2
+    assert scheduler.pop_document_waits("doc")["clauses"] == 0
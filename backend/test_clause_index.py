@@ -0,0 +1,76 @@
+"""
+Tests for clause_index.ClauseIndex near-duplicate lookup
+
+Run with: python -m pytest test_clause_index.py
+"""
+
+import pytest
+
+from clause_index import ClauseIndex
+
+CLAUSE = ("4.1 The Supplier shall indemnify and hold harmless the Customer against all losses "
+          "arising from any breach of this Agreement, and shall pay any amount due within 30 days "
+          "of written notice dated 1 January 2024.")
+ANALYSIS = {"risk": "HIGH", "simplified": "The supplier covers the customer's losses.", "reason": "indemnify"}
+
+
+@pytest.fixture
+def index():
+    index = ClauseIndex(threshold=0.95)
+    index.add(CLAUSE, ANALYSIS)
+    return index
+
+
+@pytest.mark.parametrize("variant", [
+    CLAUSE,
+    # Other numbering, party names and date
+    CLAUSE.replace("4.1", "7.3").replace("Supplier", "Vendor").replace("Customer", "Client")
+          .replace("1 January 2024", "March 5, 2025"),
+    "(b) " + CLAUSE[4:],
+])
+def test_near_duplicates_match(index, variant):
+    match = index.lookup(variant)
+    assert match is not None
+    result, similarity = match
+    assert result == ANALYSIS
+    assert similarity >= 0.95
+
+
+@pytest.mark.parametrize("variant", [
+    CLAUSE.replace("shall indemnify", "shall not indemnify"),
+    CLAUSE.replace("any breach", "no breach"),
+    CLAUSE.replace("30 days", "90 days"),
+    CLAUSE.replace("30 days", "30,000 days"),
+])
+def test_meaning_changes_do_not_match(index, variant):
+    assert index.lookup(variant) is None
+
+
+def test_unrelated_clause_does_not_match(index):
+    assert index.lookup("Either party may terminate this Agreement for convenience on ninety days notice.") is None
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = ClauseIndex(path, threshold=0.95)
+    index.add(CLAUSE, ANALYSIS)
+    index.close()
+
+    reloaded = ClauseIndex(path, threshold=0.95)
+    assert len(reloaded) == 1
+    assert reloaded.lookup(CLAUSE.replace("Supplier", "Vendor"))[0] == ANALYSIS
+    assert reloaded.lookup(CLAUSE.replace("30 days", "90 days")) is None
+
+    # New entries are appended to the same file
+    reloaded.add("The Customer shall keep all Confidential Information secret for five years.", {"risk": "MEDIUM"})
+    reloaded.close()
+    assert len(ClauseIndex(path, threshold=0.95)) == 2
+
+
+def test_entries_without_meaning_key_are_not_reused(tmp_path):
+    from clause_index import simhash
+    import json
+
+    path = tmp_path / "old.jsonl"
+    path.write_text(json.dumps({"simhash": simhash(CLAUSE), "result": ANALYSIS}) + "\n")
+    assert ClauseIndex(str(path)).lookup(CLAUSE) is None
@@ -0,0 +1,44 @@
+"""
+Tests for generation budgets (max_new_tokens_for) against clause segmentation limits
+
+Run with: python -m pytest test_generation.py
+"""
+
+import pytest
+
+import generation
+from generation import GENERATION_BUDGETS, PROMPT_BUCKETS, largest_fitting_bucket, max_new_tokens_for
+from stub_inference import TEMPLATE_TOKENS, clause_token_range
+
+
+def full_budget(kind, clause_tokens):
+    budget = GENERATION_BUDGETS[kind]
+    return int(budget["base"] + budget["per_token"] * clause_tokens)
+
+
+def test_longest_clause_fits_single_pass_budget():
+    # main.py segments to this bucket by default
+    bucket = largest_fitting_bucket("single_pass", clause_token_range)
+    longest = clause_token_range(bucket)[1]
+    assert max_new_tokens_for("single_pass", longest) >= full_budget("single_pass", longest)
+
+
+def test_falls_back_to_smallest_usable_bucket(monkeypatch):
+    monkeypatch.setitem(GENERATION_BUDGETS, "single_pass", {**GENERATION_BUDGETS["single_pass"], "max": 1})
+    usable = [b for b in PROMPT_BUCKETS if (b - TEMPLATE_TOKENS) // 2 >= 16]
+    assert largest_fitting_bucket("single_pass", clause_token_range) == usable[0]
+
+
+def test_no_usable_bucket(monkeypatch):
+    monkeypatch.setattr(generation, "PROMPT_BUCKETS", (64, 128))
+    with pytest.raises(ValueError):
+        largest_fitting_bucket("single_pass", clause_token_range)
+
+
+def test_warmup_batch_sizes_cover_scheduler_batches(monkeypatch):
+    monkeypatch.setattr(generation, "WARMUP_BATCH_SIZES", ())
+    monkeypatch.setenv("CLAUSEWISE_BATCH_SIZE", "6")
+    # Every batch the scheduler can form pads up to a warmed size
+    assert generation.warmup_batch_sizes() == (1, 6)
+    monkeypatch.setattr(generation, "WARMUP_BATCH_SIZES", (8, 2))
+    assert generation.warmup_batch_sizes() == (2, 8)
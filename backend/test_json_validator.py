@@ -0,0 +1,58 @@
+"""
+Tests for json_validator.repair_json_object / extract_json_object
+
+Run with: python -m pytest test_json_validator.py
+"""
+
+import pytest
+
+from benchmark_json_extractor import damage, fuzz, random_analysis
+from json_validator import extract_json_object, repair_json_object
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"risk": "HIGH", "reason": "r"}', {"risk": "HIGH", "reason": "r"}),
+    ('Here is the JSON:\n{"risk": "LOW"}\nDone.', {"risk": "LOW"}),
+    ('{"risk": "LOW",}', {"risk": "LOW"}),
+    ('{"a": "x"\n "b": "y"}', {"a": "x", "b": "y"}),
+    ('{"a": "say "hi" now"}', {"a": 'say "hi" now'}),
+    ('{"a": "line\nbreak"}', {"a": "line\nbreak"}),
+    ("{'a': 'b'}", {"a": "b"}),
+    # Apostrophes inside single-quoted strings are text, not delimiters
+    ("{'a': 'it's fine'}", {"a": "it's fine"}),
+    ("{'reason': 'the Company's notice', 'risk': 'HIGH'}", {"reason": "the Company's notice", "risk": "HIGH"}),
+    # A key missing its colon keeps its value
+    ('{"a" 1}', {"a": 1}),
+    ('{"risk" "HIGH", "reason": "r"}', {"risk": "HIGH", "reason": "r"}),
+    ('{"a"}', {"a": None}),
+    # Truncated output is closed off
+    ('{"a": "x", "b": "tru', {"a": "x", "b": "tru"}),
+    ('{"a": "x", "b', {"a": "x"}),
+    ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+])
+def test_extract_repairs(text, expected):
+    assert extract_json_object(text) == expected
+
+
+def test_no_object():
+    assert repair_json_object("no json here") is None
+    assert extract_json_object("no json here") is None
+
+
+def test_braces_inside_strings():
+    assert extract_json_object('{"a": "}{", "b": "[x]"} trailing }') == {"a": "}{", "b": "[x]"}
+
+
+def test_damaged_round_trip():
+    import random
+    rng = random.Random(1)
+    for _ in range(500):
+        text, expected = damage(rng, random_analysis(rng))
+        result = extract_json_object(text)
+        assert result is not None, text
+        if expected is not None:
+            assert result == expected, text
+
+
+def test_fuzz():
+    assert fuzz(5000, 0) == 0
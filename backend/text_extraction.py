@@ -1,6 +1,16 @@
-import docx
+import zipfile
+import xml.etree.ElementTree as ET
+
 import PyPDF2
 
+from clause_segmentation import SECTION_BREAK, ROW_BREAK
+
+# Characters per block when streaming plain text and DOCX paragraphs
+TEXT_BLOCK_CHARS = 64 * 1024
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
 def extract_text(file_path: str) -> str:
     """
     Extracts text from PDF, DOCX, or TXT.
@@ -15,11 +25,9 @@ def extract_text(file_path: str) -> str:
             for page in reader.pages:
                 text += page.extract_text() + "\n"
 
-    # DOCX
+    # DOCX (paragraphs and tables, see iter_docx)
     elif file_path.lower().endswith(".docx"):
-        doc = docx.Document(file_path)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
+        text = "".join(iter_docx(file_path))
 
     # TXT
     elif file_path.lower().endswith(".txt"):
@@ -27,3 +35,123 @@ def extract_text(file_path: str) -> str:
             text = f.read()
 
     return text.strip()
+
+def iter_text(file_path: str):
+    """
+    Yields a document's text a page (PDF) or block (DOCX, TXT) at a time,
+    so very large documents never sit in memory as one string.
+    """
+
+    # PDF
+    if file_path.lower().endswith(".pdf"):
+        with open(file_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            for page in reader.pages:
+                yield page.extract_text() + "\n"
+                # Parsed content streams are cached per reader; drop them once
+                # the page is done (objects still needed are parsed again)
+                reader.resolved_objects.clear()
+
+    # DOCX
+    elif file_path.lower().endswith(".docx"):
+        yield from iter_docx(file_path)
+
+    # TXT
+    elif file_path.lower().endswith(".txt"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            while True:
+                block = f.read(TEXT_BLOCK_CHARS)
+                if not block:
+                    break
+                yield block
+
+def iter_docx(file_path: str):
+    """
+    Streams a DOCX body straight from word/document.xml, in document order:
+    one line per paragraph, one per table row (cells joined with " | ",
+    ended by ROW_BREAK) and SECTION_BREAK where a section ends. Parsed
+    elements are discarded as soon as their text is out, so memory does not
+    grow with the document. Yields blocks of about TEXT_BLOCK_CHARS.
+    """
+    block = []
+    size = 0
+    # Open paragraphs (text boxes nest them), table cells and table rows
+    paragraphs, cells, rows = [], [], []
+    section_ends = False
+    skip = 0
+    depth = 0
+    body = None
+
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                depth += 1
+                if tag == _MC_FALLBACK:
+                    # Same content as the mc:Choice next to it
+                    skip += 1
+                elif skip:
+                    pass
+                elif tag == _W + "p":
+                    paragraphs.append([])
+                elif tag == _W + "tc":
+                    cells.append([])
+                elif tag == _W + "tr":
+                    rows.append([])
+                elif tag == _W + "body":
+                    body = elem
+                continue
+
+            depth -= 1
+            line = None
+            if tag == _MC_FALLBACK:
+                skip -= 1
+            elif skip:
+                pass
+            elif tag == _W + "t" and paragraphs:
+                paragraphs[-1].append(elem.text or "")
+            elif tag == _W + "tab" and paragraphs:
+                paragraphs[-1].append("\t")
+            elif tag in (_W + "br", _W + "cr") and paragraphs:
+                paragraphs[-1].append("\n")
+            elif tag == _W + "sectPr" and paragraphs:
+                # Section properties in a paragraph: the section ends with it
+                section_ends = True
+            elif tag == _W + "p":
+                text = "".join(paragraphs.pop())
+                if paragraphs:
+                    paragraphs[-1].append(" " + text)
+                elif cells:
+                    cells[-1].append(text)
+                else:
+                    line = text + "\n"
+                    if section_ends:
+                        line += SECTION_BREAK
+                        section_ends = False
+            elif tag == _W + "tc":
+                text = " ".join(t for t in cells.pop() if t)
+                if rows:
+                    rows[-1].append(text)
+            elif tag == _W + "tr":
+                text = " | ".join(t for t in rows.pop() if t)
+                if cells:
+                    # Nested table: part of the outer cell
+                    cells[-1].append(text)
+                elif text:
+                    line = text + ROW_BREAK + "\n"
+
+            if line:
+                block.append(line)
+                size += len(line)
+                if size >= TEXT_BLOCK_CHARS:
+                    yield "".join(block)
+                    block, size = [], 0
+            # Drop what has been read: rows of long tables, then whole
+            # top-level paragraphs and tables
+            if tag == _W + "tr":
+                elem.clear()
+            if depth == 2 and body is not None:
+                body.clear()
+
+    if block:
+        yield "".join(block)
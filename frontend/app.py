@@ -3,6 +3,7 @@ import requests
 import json
 from datetime import datetime
 import html
+import re
 
 # ============================================
 # PAGE CONFIGURATION
@@ -224,6 +225,8 @@ if 'processed_data' not in st.session_state:
     st.session_state.processed_data = None
 if 'uploaded_file_name' not in st.session_state:
     st.session_state.uploaded_file_name = None
+if 'simplified' not in st.session_state:
+    st.session_state.simplified = {}
 
 # ============================================
 # HELPER FUNCTIONS
@@ -234,18 +237,52 @@ def get_risk_badge_html(risk_level: str) -> str:
     icon = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(risk_lower, "⚪")
     return f'{icon} <span class="risk-badge risk-{risk_lower}">{risk_level}</span>'
 
+HTML_TAG = re.compile(r'<[^>]+>')
+
+def strip_html(text: str) -> str:
+    """Remove HTML tags and entities from results the backend has not normalized."""
+    return html.unescape(HTML_TAG.sub('', text)).strip()
+
+def display_text(clause: dict, field: str, default: str = '') -> str:
+    """Clause text ready for html.escape; the backend marks normalized results "clean"."""
+    text = clause.get(field) or default
+    return text if clause.get('clean') else strip_html(text)
+
+COMPACT_JSON = "application/vnd.clausewise.compact+json"
+
+def expand_compact(compact: dict) -> dict:
+    """Rebuild the clause list of a compact /analyze response (see backend/response_formats.py)."""
+    text, spans, simplified = compact["text"], compact["spans"], compact.get("simplified")
+    compact["clauses"] = [
+        {
+            "original": text[spans[2 * i]:spans[2 * i] + spans[2 * i + 1]],
+            "simplified": simplified[i] if simplified else "",
+            "risk": compact["risk_levels"][risk],
+            "reason": compact["reason"][i],
+            **compact["defaults"],
+            **compact["extra"].get(str(i), {}),
+        }
+        for i, risk in enumerate(compact["risk"])
+    ]
+    return compact
+
 def call_backend_analyze(uploaded_file):
-    """Call backend /analyze endpoint."""
+    """Call backend /analyze endpoint (fast risk-only pass)."""
     try:
         files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
         response = requests.post(
     f"{BACKEND_URL}/analyze",
     files=files,
+    data={"mode": "classify"},  # Simplified text is fetched per clause when opened
+    # Compact responses are a fraction of the size; requests handles gzip
+    headers={"Accept": f"{COMPACT_JSON}, application/json;q=0.5"},
     timeout=None   # No timeout - let it take as long as needed
 )
 
         
         if response.status_code == 200:
+            if response.headers.get("content-type", "").startswith(COMPACT_JSON):
+                return expand_compact(response.json()), None
             return response.json(), None
         else:
             return None, f"Backend error: {response.text}"
@@ -257,6 +294,23 @@ def call_backend_analyze(uploaded_file):
     except Exception as e:
         return None, f"❌ Error: {str(e)}"
 
+def get_simplified(document_id: str, clause_index: int) -> str:
+    """Fetch (and remember) the plain-English text for one clause."""
+    if clause_index in st.session_state.simplified:
+        return st.session_state.simplified[clause_index]
+    try:
+        response = requests.get(
+            f"{BACKEND_URL}/documents/{document_id}/clauses/{clause_index}/simplify",
+            timeout=None
+        )
+        if response.status_code != 200:
+            return f"Could not simplify this clause: {response.json().get('detail', response.text)}"
+        text = response.json()["simplified"]
+    except Exception as e:
+        return f"Could not simplify this clause: {str(e)}"
+    st.session_state.simplified[clause_index] = text
+    return text
+
 # ============================================
 # HEADER
 # ============================================
@@ -355,7 +409,7 @@ if st.session_state.processed_data is None:
         st.success(f"✅ File uploaded: **{uploaded_file.name}**")
         
         if st.button("🚀 Analyze Document", use_container_width=True):
-            with st.spinner("🔍 Performing deep analysis with IBM Granite AI... This may take several minutes for thorough clause-by-clause review."):
+            with st.spinner("🔍 Assessing clause risks with IBM Granite AI..."):
                 result, error = call_backend_analyze(uploaded_file)
                 
                 if error:
@@ -363,6 +417,7 @@ if st.session_state.processed_data is None:
                 elif result and result.get('success'):
                     st.session_state.processed_data = result
                     st.session_state.uploaded_file_name = uploaded_file.name
+                    st.session_state.simplified = {}
                     st.rerun()
                 else:
                     st.error("❌ Analysis failed. Please try again.")
@@ -372,7 +427,7 @@ if st.session_state.processed_data is None:
     st.markdown("""
     1. **Upload** your legal document (PDF, DOCX, or TXT)
     2. **Click** 'Analyze Document' to start AI analysis
-    3. **Review** simplified clauses and risk assessments
+    3. **Review** risk assessments and open any clause for a plain-English version
     4. **Export** results in JSON or Markdown format
     """)
 
@@ -439,38 +494,23 @@ else:
             label_visibility="collapsed"
         )
     
-    # Filter clauses
+    # Filter clauses (keeping each clause's position in the document)
     if risk_filter == "All Clauses":
-        filtered_clauses = clauses
+        filtered_clauses = list(enumerate(clauses))
     else:
-        filtered_clauses = [c for c in clauses if c.get('risk') == risk_filter]
+        filtered_clauses = [(n, c) for n, c in enumerate(clauses) if c.get('risk') == risk_filter]
     
     st.caption(f"Showing **{len(filtered_clauses)}** of **{len(clauses)}** clauses")
     
     # Display clauses
-    for idx, clause in enumerate(filtered_clauses, 1):
+    for idx, (clause_index, clause) in enumerate(filtered_clauses, 1):
         risk = clause.get('risk', 'MEDIUM')
-        original = clause.get('original', 'N/A')
-        simplified = clause.get('simplified', 'N/A')
-        reason = clause.get('reason', 'No reason provided')
-        
-        # Strip any HTML tags from the text (in case AI model generates them)
-        import re
-        def strip_html(text):
-            """Remove HTML tags from text"""
-            clean = re.sub(r'<[^>]+>', '', text)
-            # Also decode common HTML entities
-            clean = clean.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-            clean = clean.replace('&quot;', '"').replace('&#39;', "'")
-            return clean.strip()
-        
-        original_clean = strip_html(original)
-        simplified_clean = strip_html(simplified)
-        reason_clean = strip_html(reason)
+        # Only results from older backends still need their HTML stripped here
+        original_clean = display_text(clause, 'original', 'N/A')
+        reason_clean = display_text(clause, 'reason', 'No reason provided')
         
         # Now escape for safe HTML display
         original_escaped = html.escape(original_clean)
-        simplified_escaped = html.escape(simplified_clean)
         reason_escaped = html.escape(reason_clean)
         
         st.markdown(f"""
@@ -480,11 +520,6 @@ else:
                 {get_risk_badge_html(risk)}
             </div>
             
-            <div class="clause-simplified">
-                <strong>✨ Simplified:</strong><br>
-                {simplified_escaped}
-            </div>
-            
             <div class="clause-reason">
                 <strong>⚠️ Risk Analysis:</strong> {reason_escaped}
             </div>
@@ -499,6 +534,20 @@ else:
             </details>
         </div>
         """, unsafe_allow_html=True)
+        
+        # Plain-English text is only generated for clauses the user opens
+        if st.toggle("✨ Show simplified", key=f"simplify_{clause_index}"):
+            simplified = display_text(clause, 'simplified')
+            if not simplified:
+                # Normalized by the backend
+                with st.spinner("Simplifying clause..."):
+                    simplified = get_simplified(data.get('document_id'), clause_index)
+            st.markdown(f"""
+            <div class="clause-simplified">
+                <strong>✨ Simplified:</strong><br>
+                {html.escape(simplified)}
+            </div>
+            """, unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -508,7 +557,12 @@ else:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        json_str = json.dumps(clauses, indent=2)
+        # Include simplifications fetched so far
+        export_clauses = [
+            {**c, 'simplified': c.get('simplified') or st.session_state.simplified.get(n, '')}
+            for n, c in enumerate(clauses)
+        ]
+        json_str = json.dumps(export_clauses, indent=2)
         st.download_button(
             label="📥 Download JSON",
             data=json_str,
@@ -529,7 +583,7 @@ else:
         md_report += f"- 🟢 Low: {risk_counts['LOW']}\n\n"
         md_report += "---\n\n"
         
-        for idx, clause in enumerate(clauses, 1):
+        for idx, clause in enumerate(export_clauses, 1):
             md_report += f"## Clause {idx} - {clause.get('risk', 'MEDIUM')} Risk\n\n"
             md_report += f"**Simplified:** {clause.get('simplified', 'N/A')}\n\n"
             md_report += f"**Reason:** {clause.get('reason', 'N/A')}\n\n"
@@ -548,6 +602,7 @@ else:
         if st.button("🔄 Analyze New Document", use_container_width=True):
             st.session_state.processed_data = None
             st.session_state.uploaded_file_name = None
+            st.session_state.simplified = {}
             st.rerun()
 
 # ============================================